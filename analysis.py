@@ -0,0 +1,235 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+import pandas as pd
+
+from grammar_rules import prefill_grammar
+from lexicon import get_lexicon, lookup_key, prefill_vocabulary
+from metrics import record_parse_yield
+from table_parser import TableParser
+
+# utils.py(일반 텍스트 프롬프트)와 utils2.py(HTML/간결 프롬프트)가 함께 쓰는 분석 로직.
+# 두 모듈은 프롬프트 생성 함수와 API 호출 함수만 넘기고 나머지(어휘집/문법 규칙 선채움, 표 파싱)는 여기서 처리한다.
+# 비동기 버전은 어휘집(SQLite) 조회·저장과 문법 규칙 검사를 asyncio.to_thread로 실행해 이벤트 루프를 막지 않는다.
+
+# 프롬프트가 요구하는 행 수 (파싱 수율 지표의 기준)
+EXPECTED_VOCABULARY_ROWS = 40
+EXPECTED_GRAMMAR_ROWS = 5
+
+# 출력 언어별 결과 테이블 열 이름
+VOCABULARY_COLUMN_NAMES = {
+    "한국어": ["카테고리", "단어", "품사", "의미", "예문"],
+    "English": ["Category", "Word", "Part of Speech", "Meaning", "Example"],
+    "Tiếng Việt": ["Danh mục", "Từ vựng", "Từ loại", "Ý nghĩa", "Ví dụ"]
+}
+
+GRAMMAR_COLUMN_NAMES = {
+    "한국어": ["문법", "용법", "예문"],
+    "English": ["Pattern", "Usage", "Example"],
+    "Tiếng Việt": ["Mẫu câu", "Cách dùng", "Ví dụ"]
+}
+
+# create_prompt(text, output_language, task_type, exclude_words, candidate_words, known_words, known_patterns)
+PromptBuilder = Callable[..., str]
+ApiCall = Callable[[str], str]
+AsyncApiCall = Callable[[str], Awaitable[str]]
+
+
+def _note(label: str, items: list, html: bool) -> str:
+    if not html:
+        return label + " " + ", ".join(items) + "\n"
+    return "<p><strong>" + label + "</strong> " + ", ".join(items) + "</p>"
+
+
+def excluded_words_note(exclude_words: Optional[list], html: bool = False) -> str:
+    """이미 추출한 단어를 다시 고르지 않도록 하는 프롬프트 지침"""
+    if not exclude_words:
+        return ""
+    label = "Already extracted vocabulary (do NOT include these again; choose other words from the text instead):"
+    return _note(label, exclude_words, html)
+
+
+def candidate_words_note(candidate_words: Optional[list], html: bool = False) -> str:
+    """로컬 빈도 분석으로 고른 어휘 후보를 알려 모델이 직접 빈도를 세지 않도록 하는 프롬프트 지침"""
+    if not candidate_words:
+        return ""
+    label = ("Vocabulary candidates from local frequency analysis, most characteristic first (particles and endings "
+             "stripped, so give each word in its dictionary form; annotate these before looking for other words):")
+    return _note(label, candidate_words, html)
+
+
+def known_words_note(known_words: Optional[list], html: bool = False) -> str:
+    """어휘집에서 이미 채운 단어를 알려 나머지 단어만 출력하도록 하는 프롬프트 지침"""
+    if not known_words:
+        return ""
+    remaining = max(EXPECTED_VOCABULARY_ROWS - len(known_words), 0)
+    label = (f"Already defined in the local lexicon (do NOT output rows for these; they fill {len(known_words)} of the "
+             f"{EXPECTED_VOCABULARY_ROWS} vocabulary items, so output only the remaining {remaining}):")
+    return _note(label, known_words, html)
+
+
+def known_patterns_note(known_patterns: Optional[list], html: bool = False) -> str:
+    """로컬 규칙으로 이미 설명한 문법 패턴을 알려 나머지 패턴만 출력하도록 하는 프롬프트 지침"""
+    if not known_patterns:
+        return ""
+    remaining = max(EXPECTED_GRAMMAR_ROWS - len(known_patterns), 0)
+    label = (f"Grammar patterns already explained locally (do NOT output rows for these; they fill {len(known_patterns)} of "
+             f"the {EXPECTED_GRAMMAR_ROWS} grammar items, so output only the remaining {remaining}, choosing other "
+             "patterns in the text):")
+    return _note(label, known_patterns, html)
+
+
+def vocabulary_frame(response_text: str, output_language: str, known_rows: Optional[list] = None) -> pd.DataFrame:
+    """응답에서 어휘 테이블(5열)을 DataFrame으로 변환
+
+    known_rows(어휘집에서 채운 행)는 표 앞에 두고, 응답에서 새로 받은 행은 어휘집에 저장한다.
+    """
+    known_rows = known_rows or []
+    parser = TableParser(5)
+    data = parser.parse(response_text)
+    expected_rows = max(EXPECTED_VOCABULARY_ROWS - len(known_rows), 0)
+    record_parse_yield("vocabulary", len(data), expected_rows, parser.dropped_rows, parser.repaired_rows)
+    get_lexicon().add_rows(data, output_language)
+    known = {lookup_key(row[1]) for row in known_rows}
+    data = [row for row in data if lookup_key(row[1]) not in known]
+    return pd.DataFrame(known_rows + data, columns=VOCABULARY_COLUMN_NAMES[output_language])
+
+
+def grammar_frame(response_text: str, output_language: str, known_rows: Optional[list] = None) -> pd.DataFrame:
+    """응답에서 문법 테이블(3열)을 DataFrame으로 변환 (known_rows는 로컬 규칙으로 채운 행, 표 앞에 둠)"""
+    known_rows = known_rows or []
+    parser = TableParser(3)
+    data = parser.parse(response_text)
+    expected_rows = max(EXPECTED_GRAMMAR_ROWS - len(known_rows), 0)
+    record_parse_yield("grammar", len(data), expected_rows, parser.dropped_rows, parser.repaired_rows)
+    return pd.DataFrame(known_rows + data, columns=GRAMMAR_COLUMN_NAMES[output_language])
+
+
+def prefill_vocabulary_rows(text: str, output_language: str, exclude_words: Optional[list]) -> tuple[list, list, bool]:
+    """(모델에 보낼 후보, 어휘집에서 채운 행, 어휘집만으로 요구 행 수를 채웠는지) 반환"""
+    candidate_words, known_rows = prefill_vocabulary(text, output_language, exclude_words, EXPECTED_VOCABULARY_ROWS)
+    return candidate_words, known_rows, len(known_rows) >= EXPECTED_VOCABULARY_ROWS
+
+
+def prefill_grammar_rows(text: str, output_language: str) -> tuple[list, bool]:
+    """(로컬 규칙으로 채운 문법 행, 규칙만으로 요구 행 수를 채웠는지) 반환"""
+    known_rows = prefill_grammar(text, output_language, EXPECTED_GRAMMAR_ROWS)
+    return known_rows, len(known_rows) >= EXPECTED_GRAMMAR_ROWS
+
+
+def extract_vocabulary(text: str, output_language: str, exclude_words: Optional[list],
+                       create_prompt: PromptBuilder, call_api: ApiCall) -> pd.DataFrame:
+    """텍스트에서 어휘 분석 (어휘집에 있는 단어는 로컬에서 채우고 나머지만 요청)"""
+    candidate_words, known_rows, complete = prefill_vocabulary_rows(text, output_language, exclude_words)
+    if complete:  # 어휘집에 있는 단어만으로 충분하면 API를 호출하지 않음
+        return pd.DataFrame(known_rows, columns=VOCABULARY_COLUMN_NAMES[output_language])
+    prompt = create_prompt(text, output_language, "vocabulary", exclude_words,
+                           candidate_words, [row[1] for row in known_rows])
+    return vocabulary_frame(call_api(prompt), output_language, known_rows)
+
+
+def extract_grammar(text: str, output_language: str, create_prompt: PromptBuilder, call_api: ApiCall) -> pd.DataFrame:
+    """텍스트에서 문법 패턴 분석 (로컬 규칙으로 찾은 패턴을 먼저 채우고 나머지만 요청)"""
+    known_rows, complete = prefill_grammar_rows(text, output_language)
+    if complete:  # 로컬 규칙만으로 충분하면 API를 호출하지 않음
+        return pd.DataFrame(known_rows, columns=GRAMMAR_COLUMN_NAMES[output_language])
+    prompt = create_prompt(text, output_language, "grammar", known_patterns=[row[0] for row in known_rows])
+    return grammar_frame(call_api(prompt), output_language, known_rows)
+
+
+def extract_all(text: str, output_language: str, exclude_words: Optional[list],
+                create_prompt: PromptBuilder, call_api: ApiCall) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """어휘와 문법 패턴을 한 번의 API 호출로 분석 (한쪽이 로컬에서 모두 채워지면 다른 쪽만 요청)"""
+    known_grammar, grammar_complete = prefill_grammar_rows(text, output_language)
+    if grammar_complete:
+        grammar_result = pd.DataFrame(known_grammar, columns=GRAMMAR_COLUMN_NAMES[output_language])
+        return extract_vocabulary(text, output_language, exclude_words, create_prompt, call_api), grammar_result
+    candidate_words, known_rows, complete = prefill_vocabulary_rows(text, output_language, exclude_words)
+    if complete:
+        vocab_result = pd.DataFrame(known_rows, columns=VOCABULARY_COLUMN_NAMES[output_language])
+        return vocab_result, extract_grammar(text, output_language, create_prompt, call_api)
+    prompt = create_prompt(text, output_language, "all", exclude_words, candidate_words,
+                           [row[1] for row in known_rows], [row[0] for row in known_grammar])
+    response_text = call_api(prompt)
+    # 한 응답 안의 두 테이블을 열 개수로 구분
+    return (vocabulary_frame(response_text, output_language, known_rows),
+            grammar_frame(response_text, output_language, known_grammar))
+
+
+def analyze_text(text: str, output_language: str, include_vocabulary: bool, include_grammar: bool,
+                 exclude_words: Optional[list], create_prompt: PromptBuilder,
+                 call_api: ApiCall) -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """선택한 분석 종류에 맞춰 실행 (둘 다 선택 시 한 번의 호출로 처리)"""
+    if include_vocabulary and include_grammar:
+        return extract_all(text, output_language, exclude_words, create_prompt, call_api)
+    vocab_result = None
+    grammar_result = None
+    if include_vocabulary:
+        vocab_result = extract_vocabulary(text, output_language, exclude_words, create_prompt, call_api)
+    if include_grammar:
+        grammar_result = extract_grammar(text, output_language, create_prompt, call_api)
+    return vocab_result, grammar_result
+
+
+async def extract_vocabulary_async(text: str, output_language: str, exclude_words: Optional[list],
+                                   create_prompt: PromptBuilder, call_api_async: AsyncApiCall) -> pd.DataFrame:
+    """extract_vocabulary의 비동기 버전"""
+    candidate_words, known_rows, complete = await asyncio.to_thread(
+        prefill_vocabulary_rows, text, output_language, exclude_words
+    )
+    if complete:
+        return pd.DataFrame(known_rows, columns=VOCABULARY_COLUMN_NAMES[output_language])
+    prompt = create_prompt(text, output_language, "vocabulary", exclude_words,
+                           candidate_words, [row[1] for row in known_rows])
+    response_text = await call_api_async(prompt)
+    return await asyncio.to_thread(vocabulary_frame, response_text, output_language, known_rows)
+
+
+async def extract_grammar_async(text: str, output_language: str, create_prompt: PromptBuilder,
+                                call_api_async: AsyncApiCall) -> pd.DataFrame:
+    """extract_grammar의 비동기 버전"""
+    known_rows, complete = await asyncio.to_thread(prefill_grammar_rows, text, output_language)
+    if complete:
+        return pd.DataFrame(known_rows, columns=GRAMMAR_COLUMN_NAMES[output_language])
+    prompt = create_prompt(text, output_language, "grammar", known_patterns=[row[0] for row in known_rows])
+    response_text = await call_api_async(prompt)
+    return grammar_frame(response_text, output_language, known_rows)
+
+
+async def extract_all_async(text: str, output_language: str, exclude_words: Optional[list],
+                            create_prompt: PromptBuilder,
+                            call_api_async: AsyncApiCall) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """extract_all의 비동기 버전"""
+    known_grammar, grammar_complete = await asyncio.to_thread(prefill_grammar_rows, text, output_language)
+    if grammar_complete:
+        grammar_result = pd.DataFrame(known_grammar, columns=GRAMMAR_COLUMN_NAMES[output_language])
+        vocab_result = await extract_vocabulary_async(text, output_language, exclude_words, create_prompt,
+                                                      call_api_async)
+        return vocab_result, grammar_result
+    candidate_words, known_rows, complete = await asyncio.to_thread(
+        prefill_vocabulary_rows, text, output_language, exclude_words
+    )
+    if complete:
+        vocab_result = pd.DataFrame(known_rows, columns=VOCABULARY_COLUMN_NAMES[output_language])
+        return vocab_result, await extract_grammar_async(text, output_language, create_prompt, call_api_async)
+    prompt = create_prompt(text, output_language, "all", exclude_words, candidate_words,
+                           [row[1] for row in known_rows], [row[0] for row in known_grammar])
+    response_text = await call_api_async(prompt)
+    vocab_result = await asyncio.to_thread(vocabulary_frame, response_text, output_language, known_rows)
+    return vocab_result, grammar_frame(response_text, output_language, known_grammar)
+
+
+async def analyze_text_async(text: str, output_language: str, include_vocabulary: bool, include_grammar: bool,
+                             exclude_words: Optional[list], create_prompt: PromptBuilder,
+                             call_api_async: AsyncApiCall) -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """analyze_text의 비동기 버전"""
+    if include_vocabulary and include_grammar:
+        return await extract_all_async(text, output_language, exclude_words, create_prompt, call_api_async)
+    vocab_result = None
+    grammar_result = None
+    if include_vocabulary:
+        vocab_result = await extract_vocabulary_async(text, output_language, exclude_words, create_prompt,
+                                                      call_api_async)
+    if include_grammar:
+        grammar_result = await extract_grammar_async(text, output_language, create_prompt, call_api_async)
+    return vocab_result, grammar_result
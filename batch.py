@@ -0,0 +1,178 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+from chunker import merge_pages
+from export import EXPORT_FORMATS, available_formats, write_frame
+from job_journal import DEFAULT_JOURNAL_PATH, JobJournal
+from utils2 import MAX_CONCURRENT_PAGES, analysis_job_id, analyze_pages, iter_pdf_pages
+from vocab_index import VocabularyIndex, deduplicate_vocabulary
+
+SUPPORTED_SUFFIXES = ('.txt', '.pdf')
+OUTPUT_LANGUAGES = ("한국어", "English", "Tiếng Việt")
+
+# 동시에 처리할 문서 수 (문서마다 --concurrency개의 페이지를 동시에 분석)
+MAX_CONCURRENT_DOCUMENTS = int(os.getenv('MAX_CONCURRENT_DOCUMENTS', '2'))
+
+
+def iter_input_files(paths: Iterable[str]) -> Iterator[tuple[Path, Path]]:
+    """입력 경로에서 분석할 파일을 찾아 (파일 경로, 출력 파일 이름의 기준이 될 상대 경로) 반환
+
+    디렉터리는 하위 디렉터리까지 .txt/.pdf 파일을 이름순으로 찾는다.
+    """
+    for path in map(Path, paths):
+        if path.is_dir():
+            for file_path in sorted(path.rglob('*')):
+                if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_SUFFIXES:
+                    yield file_path, file_path.relative_to(path)
+        elif path.suffix.lower() in SUPPORTED_SUFFIXES:
+            yield path, Path(path.name)
+        else:
+            print(f"건너뜀 (지원하지 않는 형식): {path}", file=sys.stderr)
+
+
+def read_pages(file_path: Path) -> Iterator[dict]:
+    """문서 본문을 {"page", "text"} 단위로 반환 (PDF는 한 페이지씩 지연 추출, 텍스트 파일은 한 페이지로 취급)"""
+    if file_path.suffix.lower() == '.pdf':
+        yield from iter_pdf_pages(str(file_path))
+        return
+    text = file_path.read_text(encoding='utf-8-sig')
+    if text.strip():
+        yield {"page": 1, "text": text}
+
+
+def analyze_document(file_path: Path, output_language: str, include_vocabulary: bool = True,
+                     include_grammar: bool = True, max_workers: int = MAX_CONCURRENT_PAGES,
+                     journal: Optional[JobJournal] = None, job_id: Optional[str] = None) -> pd.DataFrame:
+    """문서 하나를 분석해 어휘/문법 결과를 한 DataFrame으로 반환 ('type', 'page' 열 포함)"""
+    all_vocab_results = []
+    all_grammar_results = []
+    page_results = analyze_pages(
+        merge_pages(read_pages(file_path)), output_language, include_vocabulary, include_grammar,
+        max_workers=max_workers, vocabulary_index=VocabularyIndex(), journal=journal, job_id=job_id
+    )
+    for page_result in page_results:
+        pages = page_result["pages"]
+        page_num = str(pages[0]) if len(pages) == 1 else f"{pages[0]}-{pages[-1]}"
+        if page_result["vocabulary"] is not None and not page_result["vocabulary"].empty:
+            all_vocab_results.append(page_result["vocabulary"].assign(page=page_num))
+        if page_result["grammar"] is not None and not page_result["grammar"].empty:
+            all_grammar_results.append(page_result["grammar"].assign(page=page_num))
+
+    results = []
+    if all_vocab_results:
+        results.append(deduplicate_vocabulary(pd.concat(all_vocab_results, ignore_index=True)).assign(type='vocabulary'))
+    if all_grammar_results:
+        results.append(pd.concat(all_grammar_results, ignore_index=True).assign(type='grammar'))
+    if not results:
+        return pd.DataFrame(columns=['type', 'page'])
+    return pd.concat(results, ignore_index=True)
+
+
+def write_results(df: pd.DataFrame, output_path: Path, output_format: str) -> None:
+    """결과를 임시 파일에 쓴 뒤 교체 (중단되어도 반쯤 쓰인 결과 파일이 남지 않음)"""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(output_path.name + '.tmp')
+    write_frame(df, temp_path, output_format)
+    os.replace(temp_path, output_path)
+
+
+def output_path_for(relative_path: Path, output_dir: Path, output_format: str) -> Path:
+    # 확장자만 다른 입력(a.txt, a.pdf)이 같은 출력 파일을 쓰지 않도록 원래 확장자를 유지
+    extension, _ = EXPORT_FORMATS[output_format]
+    return output_dir / relative_path.with_name(f"{relative_path.name}.{extension}")
+
+
+def process_document(file_path: Path, output_path: Path, args: argparse.Namespace,
+                     journal: Optional[JobJournal] = None) -> int:
+    """문서 하나를 분석해 결과 파일로 저장하고 행 수 반환
+
+    journal이 있으면 완료된 단위를 기록하므로, 실패 후 다시 실행하면 남은 단위만 분석한다.
+    """
+    include_vocabulary = 'vocabulary' in args.tasks
+    include_grammar = 'grammar' in args.tasks
+    job_id = None
+    if journal is not None:
+        job_id = analysis_job_id(file_path.read_bytes(), args.language, include_vocabulary, include_grammar)
+        journal.start_job(job_id, str(file_path))
+    try:
+        df = analyze_document(
+            file_path, args.language, include_vocabulary, include_grammar, args.concurrency, journal, job_id
+        )
+    except Exception:
+        if journal is not None:
+            journal.finish_job(job_id, 'failed')
+        raise
+    write_results(df, output_path, args.format)
+    if journal is not None:
+        journal.finish_job(job_id)
+    return len(df)
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Analyze Korean .txt/.pdf files without the UI and write one result file per document."
+    )
+    parser.add_argument('inputs', nargs='+', help="Files or directories (searched recursively for .txt/.pdf)")
+    parser.add_argument('-o', '--output-dir', default='results', help="Directory for result files (default: results)")
+    parser.add_argument('-f', '--format', choices=available_formats(), default='jsonl',
+                        help="Output format; parquet/arrow need pyarrow (default: jsonl)")
+    parser.add_argument('-l', '--language', choices=OUTPUT_LANGUAGES, default="English",
+                        help="Language for meanings and explanations (default: English)")
+    parser.add_argument('-t', '--tasks', nargs='+', choices=('vocabulary', 'grammar'),
+                        default=['vocabulary', 'grammar'], help="Analyses to run (default: both)")
+    parser.add_argument('-j', '--jobs', type=int, default=MAX_CONCURRENT_DOCUMENTS,
+                        help=f"Documents processed at the same time (default: {MAX_CONCURRENT_DOCUMENTS})")
+    parser.add_argument('-c', '--concurrency', type=int, default=MAX_CONCURRENT_PAGES,
+                        help=f"Pages analysed in parallel per document (default: {MAX_CONCURRENT_PAGES})")
+    parser.add_argument('--overwrite', action='store_true', help="Re-analyze documents whose result file already exists")
+    parser.add_argument('--journal', default=DEFAULT_JOURNAL_PATH,
+                        help=f"Job journal for resuming interrupted documents (default: {DEFAULT_JOURNAL_PATH})")
+    parser.add_argument('--no-journal', action='store_true', help="Do not record or resume per-page progress")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list] = None) -> int:
+    args = parse_args(argv)
+    output_dir = Path(args.output_dir)
+
+    jobs = []
+    for file_path, relative_path in iter_input_files(args.inputs):
+        output_path = output_path_for(relative_path, output_dir, args.format)
+        if output_path.exists() and not args.overwrite:
+            print(f"건너뜀 (결과 있음): {file_path}", file=sys.stderr)
+            continue
+        jobs.append((file_path, output_path))
+
+    journal = None if args.no_journal else JobJournal(args.journal)
+    failures = 0
+    started = time.perf_counter()
+    # API 호출은 공용 속도 제한기를 거치므로 문서/페이지 동시성을 높여도 할당량을 넘지 않음
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = {
+            executor.submit(process_document, file_path, output_path, args, journal): (file_path, output_path)
+            for file_path, output_path in jobs
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            file_path, output_path = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"[{done}/{len(jobs)}] 실패: {file_path}: {str(e)}", file=sys.stderr)
+            else:
+                print(f"[{done}/{len(jobs)}] {file_path} -> {output_path} ({rows}행)", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    print(f"완료: {len(jobs) - failures}개 성공, {failures}개 실패 ({elapsed:.1f}초)", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
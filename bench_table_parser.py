@@ -0,0 +1,79 @@
+"""표 파서 마이크로 벤치마크
+
+    python bench_table_parser.py [--rows 20000] [--repeat 5]
+
+합성 응답(어휘 표 여러 개 + 문법 표, 일부 행은 셀 안 '|'나 빈 셀 포함)으로
+기존 파서와 TableParser의 처리 속도와 추출 행 수를 비교한다.
+"""
+import argparse
+import random
+import timeit
+
+from table_parser import TableParser
+
+CATEGORIES = ("Core", "Topic", "Expression", "Advanced")
+
+
+def legacy_parse(response_text: str, expected_columns: int) -> list:
+    """기존 parse_table_response (열 수가 다른 행은 버리고 처음 찾은 행을 헤더로 제외)"""
+    data = []
+    for line in response_text.split('\n'):
+        line = line.strip()
+        if '|' not in line or line.startswith('|-'):
+            continue
+        items = [item.strip() for item in line.split('|')]
+        items = [item for item in items if item]
+        if len(items) == expected_columns:
+            data.append(items)
+    return data[1:] if len(data) > 1 else []
+
+
+def synthetic_response(rows: int, ragged_ratio: float = 0.05, seed: int = 0) -> str:
+    """카테고리별 표와 문법 표로 이루어진 큰 응답 생성 (ragged_ratio만큼 열 수가 어긋난 행 포함)"""
+    rng = random.Random(seed)
+    lines = ["Here is the vocabulary analysis."]
+    per_category = max(1, rows // len(CATEGORIES))
+    for category in CATEGORIES:
+        lines += [
+            f"### {category}",
+            "| Category | Korean Word | Part of Speech | Meaning | Example |",
+            "|---|---|---|---|---|",
+        ]
+        for i in range(per_category):
+            example = f"예문 {i}번입니다."
+            if rng.random() < ragged_ratio:
+                example = rng.choice(["A | B 중에서 고르세요.", ""])
+            lines.append(f"| {category} | 단어{i} | 명사 | meaning {i} | {example} |")
+    lines += [
+        "### Grammar",
+        "| Grammar Pattern | Usage | Example |",
+        "|---|---|---|",
+    ]
+    lines += [f"| -패턴{i} | usage {i} | 예문 {i} |" for i in range(5)]
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the markdown table parser.")
+    parser.add_argument('--rows', type=int, default=20000, help="Vocabulary rows in the synthetic response")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per parser (best is reported)")
+    args = parser.parse_args()
+
+    text = synthetic_response(args.rows)
+    print(f"response: {len(text):,} chars, {args.rows:,} vocabulary rows")
+
+    candidates = {
+        "legacy": lambda: legacy_parse(text, 5),
+        "TableParser": lambda: TableParser(5).parse(text),
+    }
+    for name, parse in candidates.items():
+        best = min(timeit.repeat(parse, number=1, repeat=args.repeat))
+        print(f"{name:>12}: {best * 1000:8.1f} ms  {args.rows / best:12,.0f} rows/s  {len(parse()):,} rows")
+
+    table_parser = TableParser(5)
+    table_parser.parse(text)
+    print(f"tables={table_parser.tables} repaired={table_parser.repaired_rows} dropped={table_parser.dropped_rows}")
+
+
+if __name__ == "__main__":
+    main()
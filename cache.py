@@ -0,0 +1,147 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Optional
+
+# 캐시 설정 (환경 변수로 조정 가능)
+DEFAULT_CACHE_PATH = os.getenv('GEMINI_CACHE_PATH', os.path.join('.cache', 'gemini_responses.sqlite3'))
+DEFAULT_MAX_ENTRIES = int(os.getenv('GEMINI_CACHE_MAX_ENTRIES', '5000'))
+DEFAULT_MAX_BYTES = int(os.getenv('GEMINI_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+DEFAULT_MAX_AGE = float(os.getenv('GEMINI_CACHE_MAX_AGE', str(30 * 24 * 60 * 60)))  # seconds
+
+
+def normalize_prompt(prompt: str) -> str:
+    """캐시 키 계산용 프롬프트 정규화 (유니코드 NFC + 공백 정리)"""
+    prompt = unicodedata.normalize('NFC', prompt)
+    return ' '.join(prompt.split())
+
+
+def make_cache_key(prompt: str, model_name: str, prompt_version: str) -> str:
+    """프롬프트, 모델 이름, 템플릿 버전으로 캐시 키 생성"""
+    payload = '\x00'.join([prompt_version, model_name, normalize_prompt(prompt)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite 기반 API 응답 캐시 (크기/기간 기반 LRU 제거, 적중 통계 포함)"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, max_age: Optional[float] = DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if path != ':memory:' and directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)')
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return bool(self.max_age) and now - created_at > self.max_age
+
+    def get(self, key: str) -> Optional[str]:
+        """캐시 조회 (없거나 만료되면 None)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, created_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or self._is_expired(row[1], now):
+                if row is not None:
+                    self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """캐시 저장 후 제한 초과분 제거"""
+        now = time.time()
+        size = len(value.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, value, size, now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """만료 항목 삭제 후, 개수/용량 제한을 넘으면 가장 오래 사용되지 않은 항목부터 삭제"""
+        if self.max_age:
+            self._conn.execute('DELETE FROM responses WHERE created_at < ?', (now - self.max_age,))
+
+        count, total = self._conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        stale_keys = []
+        rows = self._conn.execute('SELECT key, size FROM responses ORDER BY accessed_at ASC').fetchall()
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale_keys.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany('DELETE FROM responses WHERE key = ?', stale_keys)
+
+    def stats(self) -> dict:
+        """적중/실패 횟수와 현재 캐시 크기"""
+        with self._lock:
+            count, total = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": count,
+            "bytes": total,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self.hits = 0
+            self.misses = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """프로세스 공용 캐시 인스턴스 (처음 사용할 때 생성)"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
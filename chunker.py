@@ -0,0 +1,89 @@
+import os
+import re
+from typing import Callable, Iterable, Iterator
+
+from rate_limiter import estimate_tokens
+
+# 한 번의 API 호출에 넣을 본문 토큰 예산 (프롬프트 지침 제외)
+CHUNK_TOKEN_BUDGET = int(os.getenv('CHUNK_TOKEN_BUDGET', '1500'))
+
+# 문장 경계: 문장부호(닫는 따옴표/괄호 포함) 뒤 공백, 또는 줄바꿈
+# 공백이 뒤따를 때만 나누므로 3.5 같은 소수점은 나뉘지 않음
+_SENTENCE_BOUNDARY = re.compile(
+    r'(?:(?<=[.!?。！？…])|(?<=[.!?。！？…]["\'”’」』)\]]))\s+|\n+'
+)
+
+
+def split_sentences(text: str) -> list:
+    """한국어 텍스트를 문장 단위로 분리"""
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+
+def _split_long_sentence(sentence: str, max_tokens: int, count_tokens: Callable[[str], int]) -> list:
+    """예산보다 긴 한 문장을 글자 수 비율로 잘라 예산 안에 맞춤"""
+    pieces = []
+    while sentence:
+        size = max(1, int(len(sentence) * max_tokens / max(count_tokens(sentence), 1)))
+        while size > 1 and count_tokens(sentence[:size]) > max_tokens:
+            size = int(size * 0.9)
+        pieces.append(sentence[:size].strip())
+        sentence = sentence[size:]
+    return [piece for piece in pieces if piece]
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKEN_BUDGET,
+               count_tokens: Callable[[str], int] = estimate_tokens) -> list:
+    """문장을 토큰 예산까지 채워 청크 목록으로 묶음
+
+    count_tokens 기본값은 빠른 로컬 추정이며, 정확한 값이 필요하면
+    gemini_client.count_tokens(모델 토큰 계산 API)를 넘긴다.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for sentence in split_sentences(text):
+        tokens = count_tokens(sentence)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(' '.join(current))
+            current, current_tokens = [], 0
+        if tokens > max_tokens:
+            chunks.extend(_split_long_sentence(sentence, max_tokens, count_tokens))
+            continue
+        current.append(sentence)
+        current_tokens += tokens
+
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def merge_pages(page_texts: Iterable[dict], max_tokens: int = CHUNK_TOKEN_BUDGET,
+                count_tokens: Callable[[str], int] = estimate_tokens) -> Iterator[dict]:
+    """짧은 페이지는 예산까지 합치고 긴 페이지는 나눠서 분석 단위로 반환
+
+    각 항목은 {"page": 첫 페이지 번호, "pages": [포함된 페이지 번호], "text": 본문}.
+    입력을 차례로 읽으므로 iter_pdf_pages 생성기와 함께 써도 지연 처리가 유지된다.
+    """
+    pages = []
+    texts = []
+    current_tokens = 0
+
+    def flush() -> dict:
+        return {"page": pages[0], "pages": list(pages), "text": '\n'.join(texts)}
+
+    for page_data in page_texts:
+        tokens = count_tokens(page_data["text"])
+        if pages and current_tokens + tokens > max_tokens:
+            yield flush()
+            pages, texts, current_tokens = [], [], 0
+        if tokens > max_tokens:
+            for chunk in chunk_text(page_data["text"], max_tokens, count_tokens):
+                yield {"page": page_data["page"], "pages": [page_data["page"]], "text": chunk}
+            continue
+        pages.append(page_data["page"])
+        texts.append(page_data["text"])
+        current_tokens += tokens
+
+    if pages:
+        yield flush()
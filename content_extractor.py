@@ -0,0 +1,106 @@
+import re
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+# 본문과 무관한 태그 (내용째 삭제)
+BOILERPLATE_TAGS = (
+    'script', 'style', 'noscript', 'template', 'iframe', 'svg', 'canvas', 'form', 'button', 'select',
+    'nav', 'header', 'footer', 'aside',
+)
+# id/class에 이 단어가 들어간 요소는 메뉴·광고·댓글 등으로 보고 삭제
+_BOILERPLATE_ATTR = re.compile(
+    r'(^|[-_\s])(nav|gnb|lnb|menu|header|footer|sidebar|aside|banner|ad|ads|advert|sponsor|promo|share|sns|'
+    r'social|comment|reply|related|recommend|popular|ranking|rank|subscribe|newsletter|copyright|breadcrumb|'
+    r'popup|modal|cookie)([-_\s]|$)',
+    re.IGNORECASE
+)
+# 국내 언론사/포털에서 흔히 쓰는 기사 본문 컨테이너
+ARTICLE_SELECTORS = (
+    '#dic_area', '#newsct_article', '#articleBodyContents', '#articeBody', '#articleBody', '#article_body',
+    '#article-view-content-div', '#news_body_area', '.article_body', '.article-body', '.news_body',
+    '.news_end', '[itemprop="articleBody"]', 'article', 'main',
+)
+# 본문으로 인정할 최소 글자 수 (이보다 짧으면 다음 후보/점수 방식 사용)
+MIN_ARTICLE_CHARS = 200
+
+_BLOCK_TAGS = ('div', 'section', 'article', 'main', 'td')
+_TEXT_TAGS = ('p', 'h1', 'h2', 'h3', 'h4', 'li', 'blockquote', 'pre')
+
+
+def _make_soup(html: str) -> BeautifulSoup:
+    try:
+        return BeautifulSoup(html, 'lxml')
+    except FeatureNotFound:  # lxml이 없으면 기본 파서 사용
+        return BeautifulSoup(html, 'html.parser')
+
+
+def _remove_boilerplate(soup: BeautifulSoup) -> None:
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    # 기사 컨테이너와 그 상위 요소는 class에 'has-sidebar' 같은 단어가 있어도 지우지 않음
+    protected = set()
+    for selector in ARTICLE_SELECTORS:
+        for tag in soup.select(selector):
+            protected.add(id(tag))
+            protected.update(id(parent) for parent in tag.parents)
+    for tag in soup.find_all(True):
+        if tag.decomposed or id(tag) in protected or tag.name in ('html', 'body'):
+            continue
+        attributes = ' '.join([tag.get('id') or ''] + list(tag.get('class') or []))
+        if attributes.strip() and _BOILERPLATE_ATTR.search(attributes):
+            tag.decompose()
+
+
+def _text_length(tag) -> int:
+    return len(tag.get_text(' ', strip=True))
+
+
+def _score(tag) -> float:
+    """본문 점수: 텍스트 양에서 링크 텍스트를 빼고 문단 수를 가산"""
+    text_chars = _text_length(tag)
+    link_chars = sum(_text_length(link) for link in tag.find_all('a'))
+    paragraphs = len(tag.find_all(_TEXT_TAGS, recursive=False)) + len(tag.find_all('br', recursive=False))
+    return text_chars - 2 * link_chars + 30 * paragraphs
+
+
+def _find_article(soup: BeautifulSoup):
+    for selector in ARTICLE_SELECTORS:
+        tag = soup.select_one(selector)
+        if tag is not None and _text_length(tag) >= MIN_ARTICLE_CHARS:
+            return tag
+    candidates = soup.find_all(_BLOCK_TAGS)
+    if not candidates:
+        return soup.body or soup
+    return max(candidates, key=_score)
+
+
+def _clean_lines(text: str) -> str:
+    lines = (' '.join(line.split()) for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def extract_main_content(html: str) -> dict:
+    """HTML에서 메뉴·광고·스크립트를 걷어내고 기사 제목과 본문만 추출
+
+    반환값: {"title", "text", "original_chars", "extracted_chars", "reduction"}
+    (reduction은 원본 대비 줄어든 글자 비율, 0~1)
+    """
+    soup = _make_soup(html)
+    title_tag = soup.find('h1') or soup.find('title')
+    title = ' '.join(title_tag.get_text(' ', strip=True).split()) if title_tag else ''
+
+    _remove_boilerplate(soup)
+    article = _find_article(soup)
+    text = _clean_lines(article.get_text('\n'))
+    if title and title not in text[:len(title) * 2]:
+        text = f"{title}\n{text}" if text else title
+
+    original_chars = len(html)
+    extracted_chars = len(text)
+    return {
+        "title": title,
+        "text": text,
+        "original_chars": original_chars,
+        "extracted_chars": extracted_chars,
+        "reduction": 1 - extracted_chars / original_chars if original_chars else 0.0,
+    }
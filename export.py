@@ -0,0 +1,181 @@
+import io
+import json
+import os
+from typing import BinaryIO, Optional, Union
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet/Arrow 내보내기는 pyarrow가 설치된 경우에만 사용
+    pa = None
+    pq = None
+
+# 형식별 (파일 확장자, MIME 타입)
+EXPORT_FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "jsonl": ("jsonl", "application/x-ndjson"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow": ("arrow", "application/vnd.apache.arrow.file"),
+}
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+# 고유값 비율이 이 값 이하인 문자열 열은 사전(categorical) 인코딩 (카테고리, 품사, type, page 등)
+CATEGORICAL_MAX_RATIO = float(os.getenv('EXPORT_CATEGORICAL_MAX_RATIO', '0.5'))
+# 한 번에 쓰는 행 수 (Parquet row group / Arrow record batch 크기)
+WRITE_BATCH_ROWS = int(os.getenv('EXPORT_WRITE_BATCH_ROWS', '10000'))
+
+
+def available_formats() -> list:
+    """현재 환경에서 쓸 수 있는 내보내기 형식"""
+    return [fmt for fmt in EXPORT_FORMATS if fmt not in COLUMNAR_FORMATS or pa is not None]
+
+
+def _is_text_column(values: pd.Series) -> bool:
+    # pandas 3부터 문자열 열의 기본 dtype이 object가 아닌 str이므로 둘 다 확인
+    return pd.api.types.is_string_dtype(values) or pd.api.types.is_object_dtype(values)
+
+
+def categorical_columns(df: pd.DataFrame, max_ratio: float = CATEGORICAL_MAX_RATIO) -> list:
+    """반복 값이 많아 사전 인코딩할 문자열 열 목록
+
+    어휘/문법 표를 합친 DataFrame에서는 한쪽 표에만 있는 열이 대부분 비어 있으므로
+    고유값 비율을 값이 있는 행 기준으로 계산한다.
+    """
+    columns = []
+    for column in df.columns:
+        values = df[column]
+        present = int(values.notna().sum())
+        if present and _is_text_column(values) and values.nunique() <= max_ratio * present:
+            columns.append(column)
+    return columns
+
+
+def _is_integer_column(values: pd.Series) -> bool:
+    # 어휘/문법 표를 합치면 occurrences 같은 정수 열에 NaN이 섞여 float가 되므로 값으로 판단
+    if pd.api.types.is_integer_dtype(values):
+        return True
+    if not pd.api.types.is_float_dtype(values):
+        return False
+    present = values.dropna()
+    return not present.empty and bool((present % 1 == 0).all())
+
+
+class ResultWriter:
+    """분석 결과를 배치 단위로 이어 쓰는 내보내기 도구 (CSV/JSONL/Parquet/Arrow)
+
+    write()를 여러 번 호출해 이어 쓸 수 있고, 한 번의 write()도 WRITE_BATCH_ROWS 행씩 나눠 기록한다.
+    열 구성과 스키마는 첫 write() 또는 columns 인자로 정해지며, 이후 배치에 없는 열은 빈 값으로 쓴다.
+    (어휘 중복 제거에 문서 전체가 필요하므로 batch.py와 UI는 문서 결과를 모은 뒤 한 번에 쓴다)
+    Parquet/Arrow에서는 categorical 열(생략하면 첫 배치 기준으로 자동 선택)을 사전 인코딩한다.
+    """
+
+    def __init__(self, sink: Union[str, os.PathLike, BinaryIO], export_format: str = "csv",
+                 columns: Optional[list] = None, categorical: Optional[list] = None):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"지원하지 않는 내보내기 형식: {export_format}")
+        if export_format in COLUMNAR_FORMATS and pa is None:
+            raise ValueError(f"{export_format} 내보내기에는 pyarrow가 필요합니다")
+        self.export_format = export_format
+        self.columns = list(columns) if columns is not None else None
+        self.categorical = categorical
+        self.rows_written = 0
+        self._owns_sink = isinstance(sink, (str, os.PathLike))
+        self._sink = open(sink, 'wb') if self._owns_sink else sink
+        self._schema = None
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, df: pd.DataFrame) -> None:
+        """DataFrame을 WRITE_BATCH_ROWS 행씩 나눠 기록"""
+        if self.columns is None:
+            self.columns = list(df.columns)
+        df = df.reindex(columns=self.columns)
+        for start in range(0, len(df), WRITE_BATCH_ROWS):
+            self._write_batch(df.iloc[start:start + WRITE_BATCH_ROWS])
+
+    def _write_batch(self, df: pd.DataFrame) -> None:
+        if self.export_format == "csv":
+            # 첫 배치에만 헤더와 BOM(엑셀 한글 표시용)을 씀
+            first = self.rows_written == 0
+            df.to_csv(self._sink, header=first, index=False, mode='wb', encoding='utf-8-sig' if first else 'utf-8')
+        elif self.export_format == "jsonl":
+            for record in df.to_dict(orient='records'):
+                # 어휘/문법 행은 열이 다르므로 해당 표에 없는 열(NaN)은 빼고 기록
+                record = {key: value for key, value in record.items() if not pd.isna(value)}
+                self._sink.write((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+        else:
+            if self._schema is None:
+                self._open_columnar(df)
+            batch = self._record_batch(df)
+            if self.export_format == "parquet":
+                self._writer.write_table(pa.Table.from_batches([batch]))
+            else:
+                self._writer.write_batch(batch)
+        self.rows_written += len(df)
+
+    def _open_columnar(self, df: pd.DataFrame) -> None:
+        categorical = set(self.categorical if self.categorical is not None else categorical_columns(df))
+        fields = []
+        for column in self.columns:
+            if _is_integer_column(df[column]):
+                field_type = pa.int64()
+            elif pd.api.types.is_float_dtype(df[column]) and df[column].notna().any():
+                field_type = pa.float64()
+            elif column in categorical:
+                field_type = pa.dictionary(pa.int32(), pa.string())
+            else:
+                field_type = pa.string()
+            fields.append(pa.field(str(column), field_type))
+        self._schema = pa.schema(fields)
+        if self.export_format == "parquet":
+            self._writer = pq.ParquetWriter(self._sink, self._schema)
+        else:
+            self._writer = pa.ipc.new_file(self._sink, self._schema)
+
+    def _record_batch(self, df: pd.DataFrame):
+        arrays = []
+        for field, column in zip(self._schema, self.columns):
+            values = df[column]
+            if pa.types.is_int64(field.type):
+                array = pa.Array.from_pandas(values.astype('Int64'), type=pa.int64())
+            elif pa.types.is_float64(field.type):
+                array = pa.Array.from_pandas(values, type=pa.float64())
+            else:
+                values = values.where(values.isna(), values.astype(str))
+                array = pa.Array.from_pandas(values, type=pa.string())
+            if isinstance(array, pa.ChunkedArray):
+                # pandas의 str/확장 dtype 열은 ChunkedArray로 변환되는데 RecordBatch는 Array만 받음
+                array = array.combine_chunks()
+            if pa.types.is_dictionary(field.type):
+                array = array.dictionary_encode()
+            arrays.append(array)
+        return pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+
+    def close(self) -> None:
+        """형식별 마무리(Parquet footer 등)를 쓰고, 경로로 연 파일이면 닫음"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._owns_sink and not self._sink.closed:
+            self._sink.close()
+
+
+def write_frame(df: pd.DataFrame, sink: Union[str, os.PathLike, BinaryIO], export_format: str = "csv") -> None:
+    """DataFrame 전체를 한 번에 내보냄"""
+    with ResultWriter(sink, export_format) as writer:
+        writer.write(df)
+
+
+def export_buffer(df: pd.DataFrame, export_format: str = "csv") -> io.BytesIO:
+    """다운로드 버튼에 그대로 넘길 수 있는 메모리 버퍼 (문자열/바이트 사본을 따로 만들지 않음)"""
+    buffer = io.BytesIO()
+    write_frame(df, buffer, export_format)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,373 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Iterator, Optional
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from cache import get_response_cache, make_cache_key
+from metrics import API_CALL_SECONDS, API_RETRIES, API_TOKENS, CACHE_LOOKUPS, log_event
+from rate_limiter import estimate_tokens, get_rate_limiter
+
+# API 호출 제한을 위한 설정
+MAX_RETRIES = 3
+RETRY_DELAY = 1  # seconds (백오프 기준 시간)
+MAX_RETRY_DELAY = 30  # seconds
+# 빈 응답(안전 필터 차단 포함)은 일시적일 수 있어 이 횟수만큼만 다시 요청
+EMPTY_RESPONSE_RETRIES = 1
+
+# 할당량 초과(429) 오류
+QUOTA_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+)
+# 재시도할 일시적 오류 (그 외 오류는 바로 실패)
+TRANSIENT_ERRORS = QUOTA_ERRORS + (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    ConnectionError,
+    TimeoutError,
+)
+
+MODEL_NAME = 'gemini-pro'
+
+# 전송 방식 ('grpc' 또는 'rest', 비우면 라이브러리 기본값)
+GEMINI_TRANSPORT = os.getenv('GEMINI_TRANSPORT') or None
+
+# 앱 시작 시 모델 예열 여부
+PREWARM_MODELS = os.getenv('GEMINI_PREWARM', '1') == '1'
+
+# 모델 레지스트리: (모델 이름, 생성 설정) -> GenerativeModel
+_models: dict = {}
+_warmed_keys: set = set()
+_models_lock = threading.Lock()
+
+
+class EmptyResponseError(Exception):
+    """내용 없는 응답 (빈 텍스트 또는 안전 필터 등으로 차단되어 텍스트가 없는 후보)"""
+
+
+class TokenUsageLog:
+    """호출별 입력/출력 토큰 수 기록 (응답의 usage_metadata 기준, 프롬프트 버전별 비교용)"""
+
+    def __init__(self, max_records: int = 1000):
+        self._records = deque(maxlen=max_records)
+        self._totals: dict = {}
+        self._lock = threading.Lock()
+
+    def record(self, prompt_version: str, model_name: str, input_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            self._records.append({
+                "timestamp": time.time(),
+                "prompt_version": prompt_version,
+                "model": model_name,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+            })
+            totals = self._totals.setdefault(prompt_version, {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+            totals["calls"] += 1
+            totals["input_tokens"] += input_tokens
+            totals["output_tokens"] += output_tokens
+
+    def records(self) -> list:
+        """최근 호출 기록 (최대 max_records개)"""
+        with self._lock:
+            return list(self._records)
+
+    def summary(self) -> dict:
+        """프롬프트 버전별 호출 수, 총/평균 토큰 수"""
+        with self._lock:
+            return {
+                version: dict(
+                    totals,
+                    avg_input_tokens=totals["input_tokens"] / totals["calls"],
+                    avg_output_tokens=totals["output_tokens"] / totals["calls"],
+                )
+                for version, totals in self._totals.items()
+            }
+
+
+token_usage = TokenUsageLog()
+
+
+def _record_usage(response, prompt_version: str, model_name: str) -> dict:
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return {}
+    token_usage.record(prompt_version, model_name, usage.prompt_token_count, usage.candidates_token_count)
+    API_TOKENS.inc(usage.prompt_token_count, prompt_version=prompt_version, direction='input')
+    API_TOKENS.inc(usage.candidates_token_count, prompt_version=prompt_version, direction='output')
+    return {"input_tokens": usage.prompt_token_count, "output_tokens": usage.candidates_token_count}
+
+
+def _observe_call(prompt_version: str, model_name: str, started: float, attempt: int,
+                  response=None, error: Optional[Exception] = None) -> None:
+    """API 호출 1회의 지연 시간·결과·토큰 수를 지표와 JSON 로그에 기록"""
+    elapsed = time.perf_counter() - started
+    outcome = 'success' if error is None else 'error'
+    API_CALL_SECONDS.observe(elapsed, prompt_version=prompt_version, outcome=outcome)
+    fields = _record_usage(response, prompt_version, model_name) if response is not None else {}
+    if error is not None:
+        fields["error"] = type(error).__name__
+    log_event('gemini_call', prompt_version=prompt_version, model=model_name, outcome=outcome,
+              attempt=attempt, latency_seconds=round(elapsed, 4), **fields)
+
+
+def _record_cache_lookup(hit: bool) -> None:
+    CACHE_LOOKUPS.inc(result='hit' if hit else 'miss')
+
+
+def configure_client(api_key: Optional[str], transport: Optional[str] = GEMINI_TRANSPORT) -> None:
+    """Gemini 클라이언트 설정 (설정이 바뀌면 보관 중인 모델도 새로 생성)"""
+    options = {"api_key": api_key}
+    if transport:
+        options["transport"] = transport
+    with _models_lock:
+        genai.configure(**options)
+        _models.clear()
+        _warmed_keys.clear()
+
+
+def _registry_key(model_name: str, generation_config: Optional[dict]) -> tuple:
+    return model_name, json.dumps(generation_config or {}, sort_keys=True)
+
+
+def get_model(model_name: str = MODEL_NAME, generation_config: Optional[dict] = None) -> genai.GenerativeModel:
+    """프로세스 공용 GenerativeModel 반환 (없으면 한 번만 생성, 스레드 간 공유)"""
+    key = _registry_key(model_name, generation_config)
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                model = genai.GenerativeModel(model_name, generation_config=generation_config)
+                _models[key] = model
+    return model
+
+
+def prewarm(model_name: str = MODEL_NAME, generation_config: Optional[dict] = None,
+            open_connection: bool = True) -> genai.GenerativeModel:
+    """앱 시작 시 모델을 미리 생성하고, 가벼운 토큰 계산 요청으로 연결(TLS)을 열어 둠
+
+    같은 모델은 프로세스당 한 번만 예열하므로 Streamlit 재실행마다 호출해도 됨.
+    """
+    model = get_model(model_name, generation_config)
+    key = _registry_key(model_name, generation_config)
+    with _models_lock:
+        needs_warmup = open_connection and key not in _warmed_keys
+        _warmed_keys.add(key)
+    if needs_warmup:
+        try:
+            model.count_tokens("warm up")
+        except Exception as e:
+            print(f"모델 예열 실패: {str(e)}")
+    return model
+
+
+def count_tokens(text: str, model_name: str = MODEL_NAME) -> int:
+    """모델 토큰 계산 API로 정확한 토큰 수 반환 (네트워크 호출이므로 필요한 경우에만 사용)"""
+    return get_model(model_name).count_tokens(text).total_tokens
+
+
+def _is_transient(error: Exception) -> bool:
+    """재시도할 가치가 있는 일시적 오류인지 (잘못된 입력 등은 재시도하지 않음)"""
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def _should_retry(error: Exception, attempt: int) -> bool:
+    """attempt번째 시도가 error로 실패했을 때 다시 요청할지"""
+    if isinstance(error, EmptyResponseError):
+        return attempt <= EMPTY_RESPONSE_RETRIES
+    return _is_transient(error) and attempt < MAX_RETRIES
+
+
+def _server_retry_delay(error: Exception) -> Optional[float]:
+    """서버가 알려준 재시도 대기 시간 (RetryInfo 또는 Retry-After 헤더)"""
+    for detail in getattr(error, 'details', None) or []:
+        retry_delay = getattr(detail, 'retry_delay', None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+
+    response = getattr(error, 'response', None)
+    retry_after = getattr(response, 'headers', {}).get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            return None
+    return None
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """재시도 전 대기 시간: 서버 힌트 우선, 없으면 지수 백오프 + full jitter"""
+    hint = _server_retry_delay(error)
+    if hint is not None:
+        delay = hint + random.uniform(0, RETRY_DELAY)
+    else:
+        delay = random.uniform(0, min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** attempt))
+    API_RETRIES.inc(error=type(error).__name__)
+    if isinstance(error, QUOTA_ERRORS):
+        # 할당량 초과는 계정 전체 문제이므로 다른 스레드/세션의 호출도 함께 멈춤
+        get_rate_limiter().pause(delay)
+    return delay
+
+
+def _response_text(response) -> str:
+    try:
+        text = response.text
+    except ValueError as e:  # 차단된 후보처럼 parts가 없으면 .text 접근이 ValueError를 냄
+        raise EmptyResponseError(f"빈 응답 받음: {str(e)}") from e
+    if not text:
+        raise EmptyResponseError("빈 응답 받음")
+    return text
+
+
+def _settle_tokens(limiter, reserved_tokens: int, response) -> None:
+    """예약한 프롬프트 추정치를 응답의 실제 입력+출력 토큰 수로 정산 (usage_metadata가 없으면 그대로 둠)"""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None:
+        limiter.settle(reserved_tokens, usage.prompt_token_count + usage.candidates_token_count)
+
+
+def _generate_content(prompt: str, model_name: str, prompt_version: str) -> str:
+    """Gemini API 호출 with 속도 제한 및 일시적 오류 재시도"""
+    limiter = get_rate_limiter()
+    tokens = estimate_tokens(prompt)
+    for attempt in range(1, MAX_RETRIES + 1):
+        limiter.acquire(tokens)
+        started = time.perf_counter()
+        try:
+            model = get_model(model_name)
+            response = model.generate_content(prompt)
+            text = _response_text(response)
+        except Exception as e:
+            _observe_call(prompt_version, model_name, started, attempt, error=e)
+            print(f"API 호출 오류: {str(e)}")
+            if not _should_retry(e, attempt):
+                raise
+            delay = _retry_delay(e, attempt)
+        else:
+            _observe_call(prompt_version, model_name, started, attempt, response=response)
+            _settle_tokens(limiter, tokens, response)
+            return text
+        time.sleep(delay)
+
+
+async def _generate_content_async(prompt: str, model_name: str, prompt_version: str) -> str:
+    """Gemini API 비동기 호출 (동기 버전과 같은 속도 제한/재시도 규칙)"""
+    limiter = get_rate_limiter()
+    tokens = estimate_tokens(prompt)
+    for attempt in range(1, MAX_RETRIES + 1):
+        await limiter.acquire_async(tokens)
+        started = time.perf_counter()
+        try:
+            model = get_model(model_name)
+            response = await model.generate_content_async(prompt)
+            text = _response_text(response)
+        except Exception as e:
+            _observe_call(prompt_version, model_name, started, attempt, error=e)
+            print(f"API 호출 오류: {str(e)}")
+            if not _should_retry(e, attempt):
+                raise
+            delay = _retry_delay(e, attempt)
+        else:
+            _observe_call(prompt_version, model_name, started, attempt, response=response)
+            _settle_tokens(limiter, tokens, response)
+            return text
+        await asyncio.sleep(delay)
+
+
+def generate_text(prompt: str, prompt_version: str, model_name: str = MODEL_NAME,
+                  use_cache: bool = True) -> str:
+    """프롬프트 결과 텍스트 반환 (동일 프롬프트는 디스크 캐시에서 응답)"""
+    if not use_cache:
+        return _generate_content(prompt, model_name, prompt_version)
+
+    cache = get_response_cache()
+    key = make_cache_key(prompt, model_name, prompt_version)
+    cached_text = cache.get(key)
+    _record_cache_lookup(cached_text is not None)
+    if cached_text is not None:
+        return cached_text
+
+    response_text = _generate_content(prompt, model_name, prompt_version)
+    cache.set(key, response_text)
+    return response_text
+
+
+async def generate_text_async(prompt: str, prompt_version: str, model_name: str = MODEL_NAME,
+                              use_cache: bool = True) -> str:
+    """generate_text의 비동기 버전 (캐시 조회는 이벤트 루프를 막지 않도록 스레드에서 실행)"""
+    if not use_cache:
+        return await _generate_content_async(prompt, model_name, prompt_version)
+
+    cache = get_response_cache()
+    key = make_cache_key(prompt, model_name, prompt_version)
+    cached_text = await asyncio.to_thread(cache.get, key)
+    _record_cache_lookup(cached_text is not None)
+    if cached_text is not None:
+        return cached_text
+
+    response_text = await _generate_content_async(prompt, model_name, prompt_version)
+    await asyncio.to_thread(cache.set, key, response_text)
+    return response_text
+
+
+def _chunk_text(chunk) -> str:
+    # 내용 없이 종료 정보만 담긴 조각은 .text 접근 시 오류가 나므로 건너뜀
+    return chunk.text if getattr(chunk, 'parts', None) else ''
+
+
+def stream_text(prompt: str, prompt_version: str, model_name: str = MODEL_NAME,
+                use_cache: bool = True) -> Iterator[str]:
+    """응답을 생성되는 대로 조각 단위로 반환 (완료되면 전체 응답을 캐시에 저장)
+
+    캐시에 있으면 전체 응답을 한 조각으로 반환한다. 이미 조각을 내보낸 뒤 오류가 나면
+    중복 출력을 막기 위해 재시도하지 않는다.
+    """
+    cache = get_response_cache() if use_cache else None
+    key = make_cache_key(prompt, model_name, prompt_version)
+    if cache is not None:
+        cached_text = cache.get(key)
+        _record_cache_lookup(cached_text is not None)
+        if cached_text is not None:
+            yield cached_text
+            return
+
+    limiter = get_rate_limiter()
+    tokens = estimate_tokens(prompt)
+    chunks = []
+    for attempt in range(1, MAX_RETRIES + 1):
+        limiter.acquire(tokens)
+        started = time.perf_counter()
+        try:
+            model = get_model(model_name)
+            response = model.generate_content(prompt, stream=True)
+            for chunk in response:
+                text = _chunk_text(chunk)
+                if text:
+                    chunks.append(text)
+                    yield text
+            if not chunks:
+                raise EmptyResponseError("빈 응답 받음")
+        except Exception as e:
+            _observe_call(prompt_version, model_name, started, attempt, error=e)
+            print(f"API 호출 오류: {str(e)}")
+            if chunks or not _should_retry(e, attempt):
+                raise
+            delay = _retry_delay(e, attempt)
+        else:
+            _observe_call(prompt_version, model_name, started, attempt, response=response)
+            _settle_tokens(limiter, tokens, response)
+            break
+        time.sleep(delay)
+
+    response_text = ''.join(chunks)
+    if cache is not None:
+        cache.set(key, response_text)
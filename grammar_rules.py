@@ -0,0 +1,310 @@
+import os
+import re
+from typing import Optional
+
+from chunker import split_sentences
+
+# 0이면 로컬 규칙을 쓰지 않고 문법 분석을 모두 모델에 맡김
+GRAMMAR_RULES_ENABLED = os.getenv('GRAMMAR_RULES_ENABLED', '1') != '0'
+
+_HANGUL_BASE = 0xAC00
+
+
+def _syllables(medials: tuple, final: int) -> str:
+    """중성(medials)과 종성(final)이 정해진 모든 한글 음절의 문자 클래스 (초성은 전부)"""
+    chars = (
+        chr(_HANGUL_BASE + (initial * 21 + medial) * 28 + final)
+        for initial in range(19) for medial in medials
+    )
+    return '[' + ''.join(chars) + ']'
+
+
+# 받침 없이 ㅏ/ㅐ/ㅓ/ㅕ/ㅘ/ㅙ/ㅝ로 끝나는 음절: -아/어 활용형 (가, 해, 먹어, 마셔, 봐, 돼, 줘)
+# ㅔ는 조사 '에'(학교에서)와 겹치므로 제외
+_AEO = _syllables((0, 1, 4, 6, 9, 10, 14), 0)
+# ㄴ 받침 음절: -(으)ㄴ/는 관형형 (한, 먹은, 가는)
+_N_FINAL = _syllables(tuple(range(21)), 4)
+# ㄹ 받침 음절: -(으)ㄹ 관형형 (할, 먹을, 갈)
+_L_FINAL = _syllables(tuple(range(21)), 8)
+# 어미 앞에 어간이 있어야 함
+_STEM = r'(?<=[가-힣])'
+# 어미 뒤에 같은 어절이 이어지지 않아야 함
+_END = r'(?![가-힣])'
+
+# 접속사처럼 굳어져 학습 문법으로 세지 않는 어절
+STOP_EOJEOLS = frozenset((
+    '그래서', '그러니까', '그런데', '그러면', '그러면서', '하지만', '그렇지만', '그러므로',
+    '따라서', '어서', '이어서', '나아가서', '게다가', '왜냐하면',
+    '측면', '표면', '화면', '장면', '정면', '반면', '이면', '라면', '전면', '방면',
+))
+
+# 문법 규칙: 같은 위치에서는 앞의 규칙이 먼저 맞음 (면서가 면보다 앞)
+# min_count는 명사 등과 겹칠 수 있는 애매한 규칙에서 확정에 필요한 등장 횟수 (모자라면 모델에 맡김)
+GRAMMAR_RULES = (
+    {
+        "pattern": "-고 싶다",
+        "regex": _STEM + r'고\s+싶',
+        "usage": {
+            "한국어": "동사 어간 뒤에 붙어 말하는 사람(의문문에서는 듣는 사람)의 바람을 나타냄. 3인칭은 '-고 싶어 하다'.",
+            "English": "Verb stem + 고 싶다 expresses the speaker's wish (\"want to\"); use -고 싶어 하다 for a third person.",
+            "Tiếng Việt": "Gốc động từ + 고 싶다 diễn tả mong muốn của người nói (\"muốn\"); ngôi thứ ba dùng -고 싶어 하다.",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-고 있다",
+        "regex": _STEM + r'고\s+(?:있|계시|계세|계십)',
+        "usage": {
+            "한국어": "동사 어간 뒤에 붙어 동작이 진행 중임을 나타냄. 높임은 '-고 계시다'.",
+            "English": "Verb stem + 고 있다 marks an action in progress (\"be -ing\"); honorific form -고 계시다.",
+            "Tiếng Việt": "Gốc động từ + 고 있다 diễn tả hành động đang diễn ra (\"đang\"); dạng kính ngữ -고 계시다.",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-아/어서",
+        "regex": _AEO + r'서' + _END,
+        "usage": {
+            "한국어": "앞 내용이 뒤 내용의 이유이거나 앞 동작에 이어 뒤 동작이 일어남을 나타냄. 명령문·청유문에는 이유로 쓰지 않음.",
+            "English": "Links clauses as reason (\"because/so\") or sequence (\"and then\"); not used for reasons before commands or suggestions.",
+            "Tiếng Việt": "Nối hai mệnh đề chỉ nguyên nhân (\"vì... nên\") hoặc trình tự (\"rồi\"); không dùng chỉ lý do trước câu mệnh lệnh, rủ rê.",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-(으)니까",
+        "regex": _STEM + r'니까(?:요)?' + _END,
+        "usage": {
+            "한국어": "이유나 근거를 나타내며 뒤에 명령문·청유문이 올 수 있음. 어떤 일을 하고 나서 알게 된 사실에도 씀.",
+            "English": "Gives a reason, often before commands or suggestions (\"since\"); also marks a discovery after an action.",
+            "Tiếng Việt": "Chỉ lý do, thường đứng trước câu mệnh lệnh hoặc rủ rê (\"vì\"); cũng chỉ điều phát hiện ra sau khi làm gì.",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-(으)ㄴ/는데",
+        "regex": _N_FINAL + r'데(?:요)?' + _END,
+        "usage": {
+            "한국어": "뒤 내용의 배경이나 상황을 먼저 제시하거나 앞뒤 내용을 대조함. 문장 끝에서는 상대의 반응을 기대하는 말투.",
+            "English": "Sets up background for the next clause or contrasts two clauses (\"and/but\"); at sentence end it invites a response.",
+            "Tiếng Việt": "Nêu bối cảnh cho mệnh đề sau hoặc đối lập hai vế (\"nhưng\"); ở cuối câu thể hiện chờ phản hồi.",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-(으)면서",
+        "regex": _STEM + r'면서' + _END,
+        "usage": {
+            "한국어": "두 동작이나 상태가 동시에 일어남을 나타냄. 앞뒤 주어가 같아야 함.",
+            "English": "Two actions or states happening at the same time (\"while\"); both clauses share the subject.",
+            "Tiếng Việt": "Hai hành động hay trạng thái xảy ra đồng thời (\"vừa... vừa\"); hai vế cùng chủ ngữ.",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-(으)면",
+        "regex": _STEM + r'면' + _END,
+        "usage": {
+            "한국어": "조건이나 가정을 나타냄.",
+            "English": "Condition or supposition (\"if/when\").",
+            "Tiếng Việt": "Chỉ điều kiện hoặc giả định (\"nếu\").",
+        },
+        "min_count": 2,
+    },
+    {
+        "pattern": "-아/어야 하다",
+        "regex": _AEO + r'야\s*(?:하|한|할|해|했|합|되|돼|될|됩)',
+        "usage": {
+            "한국어": "반드시 해야 하는 의무나 필요를 나타냄.",
+            "English": "Obligation or necessity (\"must, have to\").",
+            "Tiếng Việt": "Chỉ nghĩa vụ hoặc sự cần thiết (\"phải\").",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-(으)ㄹ 수 있다/없다",
+        "regex": _L_FINAL + r'\s+수\s*(?:가\s*|도\s*)?(?:있|없)',
+        "usage": {
+            "한국어": "능력이나 가능성의 유무를 나타냄.",
+            "English": "Ability or possibility (\"can / cannot\").",
+            "Tiếng Việt": "Chỉ khả năng làm được hay không (\"có thể / không thể\").",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-(으)ㄹ 것이다",
+        "regex": _L_FINAL + r'\s+(?:것이|것입|거예|거야|겁니|거에요)',
+        "usage": {
+            "한국어": "미래의 일이나 말하는 사람의 추측·의지를 나타냄.",
+            "English": "Future events, the speaker's guess or intention (\"will, probably\").",
+            "Tiếng Việt": "Chỉ việc tương lai, phỏng đoán hoặc ý định của người nói (\"sẽ\").",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-(으)ㄹ 때",
+        "regex": _L_FINAL + r'\s+때(?!문)',
+        "usage": {
+            "한국어": "어떤 동작이나 상황이 일어나는 시간을 나타냄.",
+            "English": "The time when an action or situation happens (\"when\").",
+            "Tiếng Việt": "Chỉ thời điểm hành động hay tình huống xảy ra (\"khi\").",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-기 때문에",
+        "regex": _STEM + r'기\s+때문(?:에|이)',
+        "usage": {
+            "한국어": "앞 내용이 뒤 내용의 원인임을 분명하게 나타냄. 명령문·청유문에는 쓰지 않음.",
+            "English": "States a cause explicitly (\"because\"); not used before commands or suggestions.",
+            "Tiếng Việt": "Nêu rõ nguyên nhân (\"vì\"); không dùng trước câu mệnh lệnh, rủ rê.",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-기 위해(서)",
+        "regex": _STEM + r'기\s+위(?:해|한|하여)',
+        "usage": {
+            "한국어": "목적을 나타냄. 명사 뒤에서는 '을/를 위해'.",
+            "English": "Purpose (\"in order to\"); after nouns use 을/를 위해.",
+            "Tiếng Việt": "Chỉ mục đích (\"để\"); sau danh từ dùng 을/를 위해.",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-기 전에",
+        "regex": _STEM + r'기\s+전에',
+        "usage": {
+            "한국어": "뒤 동작이 앞 동작보다 먼저 일어남을 나타냄.",
+            "English": "The main action happens before this one (\"before -ing\").",
+            "Tiếng Việt": "Hành động chính xảy ra trước hành động này (\"trước khi\").",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-(으)ㄴ 후에",
+        "regex": _N_FINAL + r'\s+(?:후|뒤|다음)에',
+        "usage": {
+            "한국어": "앞 동작이 끝난 뒤에 뒤 동작이 일어남을 나타냄.",
+            "English": "The main action happens after this one is finished (\"after -ing\").",
+            "Tiếng Việt": "Hành động chính xảy ra sau khi hành động này kết thúc (\"sau khi\").",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-지만",
+        "regex": _STEM + r'지만' + _END,
+        "usage": {
+            "한국어": "앞 내용과 반대되거나 다른 내용을 이어 줌.",
+            "English": "Contrast between two clauses (\"but, although\").",
+            "Tiếng Việt": "Nối hai vế đối lập (\"nhưng\").",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-(으)려고",
+        "regex": _STEM + r'려고(?:요)?' + _END,
+        "usage": {
+            "한국어": "의도나 목적을 나타냄. 명령문·청유문에는 쓰지 않음.",
+            "English": "Intention or purpose (\"in order to, planning to\"); not used before commands or suggestions.",
+            "Tiếng Việt": "Chỉ ý định hoặc mục đích (\"định, để\"); không dùng trước câu mệnh lệnh, rủ rê.",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-게 되다",
+        "regex": _STEM + r'게\s+(?:되|됐|돼|된|될|됩)',
+        "usage": {
+            "한국어": "주어의 의지와 관계없이 어떤 상황에 이르게 됨을 나타냄.",
+            "English": "Coming to a situation regardless of one's intention (\"end up, come to\").",
+            "Tiếng Việt": "Đi đến một tình huống không theo ý muốn (\"trở nên, được\").",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-도록",
+        "regex": _STEM + r'도록' + _END,
+        "usage": {
+            "한국어": "뒤 동작의 목적이나 정도, 한계를 나타냄.",
+            "English": "Purpose, degree or limit of the following action (\"so that, until\").",
+            "Tiếng Việt": "Chỉ mục đích, mức độ hoặc giới hạn của hành động sau (\"để, đến mức\").",
+        },
+        "min_count": 1,
+    },
+    {
+        "pattern": "-아/어 보다",
+        "regex": _AEO + r'\s+(?:보|봤|봐|봅|볼)',
+        "usage": {
+            "한국어": "어떤 동작을 시도하거나 경험함을 나타냄.",
+            "English": "Trying something or having experienced it (\"try -ing, have done\").",
+            "Tiếng Việt": "Thử làm hoặc đã từng trải qua (\"thử, đã từng\").",
+        },
+        "min_count": 2,
+    },
+)
+
+# 모든 규칙을 하나의 정규식으로 묶어 텍스트를 한 번만 훑음 (그룹 이름 r<번호>로 규칙 구분)
+_RULES_PATTERN = re.compile('|'.join(
+    f'(?P<r{index}>{rule["regex"]})' for index, rule in enumerate(GRAMMAR_RULES)
+))
+_EOJEOL_REST = re.compile(r'[가-힣]*')
+
+
+def _first_eojeol(text: str, start: int) -> str:
+    """매치가 시작된 어절 전체 (앞뒤로 한글이 끝나는 곳까지)"""
+    begin = start
+    while begin > 0 and '가' <= text[begin - 1] <= '힣':
+        begin -= 1
+    return _EOJEOL_REST.match(text, begin).group()
+
+
+def _sentence_spans(text: str) -> list:
+    spans = []
+    cursor = 0
+    for sentence in split_sentences(text):
+        start = text.find(sentence, cursor)
+        spans.append((start, start + len(sentence), sentence))
+        cursor = start + len(sentence)
+    return spans
+
+
+def detect_patterns(text: str) -> list:
+    """텍스트에서 알려진 문법 패턴을 찾아 등장 횟수가 많은 순으로 반환
+
+    각 항목은 {"pattern", "count", "positions", "example", "confirmed"}이며, example은 처음 나온
+    문장, confirmed는 규칙의 min_count를 채워 로컬 결과로 쓸 수 있는지 여부다.
+    """
+    found = {}
+    for match in _RULES_PATTERN.finditer(text):
+        if _first_eojeol(text, match.start()) in STOP_EOJEOLS:
+            continue
+        index = int(match.lastgroup[1:])
+        found.setdefault(index, []).append(match.start())
+
+    spans = _sentence_spans(text)
+    results = []
+    for index, positions in found.items():
+        rule = GRAMMAR_RULES[index]
+        example = next((sentence for start, end, sentence in spans if start <= positions[0] < end), '')
+        results.append({
+            "pattern": rule["pattern"],
+            "count": len(positions),
+            "positions": positions,
+            "example": example,
+            "confirmed": len(positions) >= rule["min_count"],
+        })
+    results.sort(key=lambda result: (-result["count"], result["positions"][0]))
+    return results
+
+
+def prefill_grammar(text: str, output_language: str, max_rows: Optional[int] = None) -> list:
+    """확정된 패턴으로 문법 표 행(문법, 용법, 예문) 목록 생성 (많이 나온 순, 최대 max_rows개)"""
+    if not GRAMMAR_RULES_ENABLED:
+        return []
+    usages = {rule["pattern"]: rule["usage"] for rule in GRAMMAR_RULES}
+    rows = [
+        [result["pattern"], usages[result["pattern"]].get(output_language, usages[result["pattern"]]["English"]),
+         result["example"]]
+        for result in detect_patterns(text) if result["confirmed"]
+    ]
+    return rows[:max_rows] if max_rows else rows
@@ -0,0 +1,128 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from cache import ResponseCache
+
+# 요청 제한 (환경 변수로 조정 가능)
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))  # seconds
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '20'))  # seconds (소켓 읽기 한 번의 대기 시간)
+TOTAL_TIMEOUT = float(os.getenv('HTTP_TOTAL_TIMEOUT', '60'))  # seconds (본문을 조금씩 보내는 서버 대비 전체 상한)
+MAX_BYTES = int(os.getenv('HTTP_MAX_BYTES', str(5 * 1024 * 1024)))
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+USER_AGENT = os.getenv('HTTP_USER_AGENT', 'KoreanTextAnalyzer/1.0')
+
+# 조건부 요청용 디스크 캐시 (ETag/Last-Modified가 있는 응답만 저장)
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', os.path.join('.cache', 'http_responses.sqlite3'))
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv('HTTP_CACHE_MAX_ENTRIES', '2000'))
+HTTP_CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+
+_CHUNK_SIZE = 64 * 1024
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    # 연결 실패와 일시적인 게이트웨이 오류만 짧게 재시도
+    retry = Retry(total=2, connect=2, read=0, backoff_factor=0.5,
+                  status_forcelist=(502, 503, 504), allowed_methods=frozenset(['GET', 'HEAD']))
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+def _decode(body: bytes, response: requests.Response) -> str:
+    """본문 디코딩 (헤더의 charset, 없으면 HTML meta charset, 그래도 없으면 UTF-8)"""
+    encoding = None
+    if 'charset' in response.headers.get('Content-Type', '').lower():
+        encoding = response.encoding
+    if encoding is None:
+        match = _META_CHARSET.search(body[:4096])
+        encoding = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return body.decode(encoding, errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+class HttpFetcher:
+    """연결 풀을 공유하고 ETag/Last-Modified로 조건부 요청을 보내는 HTTP 클라이언트
+
+    같은 URL을 다시 가져오면 304 응답일 때 본문을 받지 않고 디스크 캐시의 내용을 반환한다.
+    본문은 스트리밍으로 받으며 max_bytes나 total_timeout을 넘으면 ValueError를 발생시킨다.
+    """
+
+    def __init__(self, cache: Optional[ResponseCache] = None, max_bytes: int = MAX_BYTES,
+                 timeout: tuple = (CONNECT_TIMEOUT, READ_TIMEOUT), total_timeout: float = TOTAL_TIMEOUT):
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.total_timeout = total_timeout
+        self.session = _create_session()
+
+    def _read_body(self, response: requests.Response, url: str) -> bytes:
+        content_length = response.headers.get('Content-Length')
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            raise ValueError(f"응답이 너무 큽니다 ({content_length} bytes > {self.max_bytes}): {url}")
+
+        deadline = time.monotonic() + self.total_timeout
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(_CHUNK_SIZE):
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise ValueError(f"응답이 너무 큽니다 (> {self.max_bytes} bytes): {url}")
+            if time.monotonic() > deadline:
+                raise ValueError(f"응답 수신 시간 초과 ({self.total_timeout}s): {url}")
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def fetch(self, url: str) -> str:
+        """URL 본문을 텍스트로 반환 (요청 오류는 requests 예외로 전달)"""
+        cached = None
+        headers = {}
+        if self.cache is not None:
+            cached_value = self.cache.get(url)
+            if cached_value is not None:
+                cached = json.loads(cached_value)
+                if cached.get("etag"):
+                    headers['If-None-Match'] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers['If-Modified-Since'] = cached["last_modified"]
+
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304 and cached is not None:
+                return cached["text"]
+            response.raise_for_status()
+            text = _decode(self._read_body(response, url), response)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+        if self.cache is not None and (etag or last_modified):
+            self.cache.set(url, json.dumps(
+                {"etag": etag, "last_modified": last_modified, "text": text}, ensure_ascii=False
+            ))
+        return text
+
+
+_default_fetcher: Optional[HttpFetcher] = None
+_default_fetcher_lock = threading.Lock()
+
+
+def get_http_fetcher() -> HttpFetcher:
+    """프로세스 공용 HTTP 클라이언트 (처음 사용할 때 생성)"""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            cache = ResponseCache(HTTP_CACHE_PATH, HTTP_CACHE_MAX_ENTRIES, HTTP_CACHE_MAX_BYTES, max_age=None)
+            _default_fetcher = HttpFetcher(cache)
+        return _default_fetcher
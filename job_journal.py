@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+
+# 작업 기록 파일 경로 (환경 변수로 조정 가능)
+DEFAULT_JOURNAL_PATH = os.getenv('JOB_JOURNAL_PATH', os.path.join('.cache', 'jobs.sqlite3'))
+
+RESULT_TABLES = ("vocabulary", "grammar")
+
+
+def make_job_id(document: bytes, **settings) -> str:
+    """문서 내용과 분석 설정으로 작업 ID 생성 (같은 문서·설정으로 다시 실행하면 같은 작업을 이어서 진행)"""
+    payload = hashlib.sha256(document).hexdigest() + json.dumps(settings, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _frame_to_json(df: Optional[pd.DataFrame]) -> Optional[str]:
+    if df is None:
+        return None
+    return json.dumps({"columns": list(df.columns), "data": df.values.tolist()}, ensure_ascii=False)
+
+
+def _frame_from_json(payload: Optional[str]) -> Optional[pd.DataFrame]:
+    if payload is None:
+        return None
+    table = json.loads(payload)
+    return pd.DataFrame(table["data"], columns=table["columns"])
+
+
+class JobJournal:
+    """SQLite 기반 작업 기록 (분석 단위별 상태와 결과 표를 저장)
+
+    analyze_pages가 단위 하나를 끝낼 때마다 결과를 기록하므로, 중간에 실패하거나 프로세스가
+    종료되어도 완료된 단위는 다시 호출하지 않고 이어서 진행할 수 있고 부분 결과도 내보낼 수 있다.
+    단위는 merge_pages 결과의 순서(position)로 구분한다.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if path != ':memory:' and directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS units (
+                job_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                pages TEXT NOT NULL,
+                status TEXT NOT NULL,
+                vocabulary TEXT,
+                grammar TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, position)
+            )
+        """)
+
+    def start_job(self, job_id: str, source: str, settings: Optional[dict] = None) -> None:
+        """작업 등록 (이미 있으면 상태만 running으로 되돌림)"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO jobs (job_id, source, settings, status, created_at, updated_at) '
+                "VALUES (?, ?, ?, 'running', ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET status = 'running', updated_at = excluded.updated_at",
+                (job_id, source, json.dumps(settings or {}, ensure_ascii=False), now, now)
+            )
+
+    def finish_job(self, job_id: str, status: str = 'done') -> None:
+        with self._lock:
+            self._conn.execute(
+                'UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?', (status, time.time(), job_id)
+            )
+
+    def job_status(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT status FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def record_unit(self, job_id: str, position: int, result: dict) -> None:
+        """완료된 단위의 결과 저장 (result는 analyze_pages 결과 형식)"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO units (job_id, position, pages, status, vocabulary, grammar, error, updated_at) '
+                "VALUES (?, ?, ?, 'done', ?, ?, NULL, ?)",
+                (job_id, position, json.dumps(result["pages"]), _frame_to_json(result.get("vocabulary")),
+                 _frame_to_json(result.get("grammar")), time.time())
+            )
+
+    def record_failure(self, job_id: str, position: int, pages: list, error: Exception) -> None:
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO units (job_id, position, pages, status, vocabulary, grammar, error, updated_at) '
+                "VALUES (?, ?, ?, 'failed', NULL, NULL, ?, ?)",
+                (job_id, position, json.dumps(pages), f"{type(error).__name__}: {error}", time.time())
+            )
+
+    def completed_units(self, job_id: str) -> dict:
+        """완료된 단위 결과 {position: {"page", "pages", "vocabulary", "grammar"}}"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT position, pages, vocabulary, grammar FROM units "
+                "WHERE job_id = ? AND status = 'done' ORDER BY position",
+                (job_id,)
+            ).fetchall()
+        units = {}
+        for position, pages, vocabulary, grammar in rows:
+            pages = json.loads(pages)
+            units[position] = {
+                "page": pages[0],
+                "pages": pages,
+                "vocabulary": _frame_from_json(vocabulary),
+                "grammar": _frame_from_json(grammar),
+            }
+        return units
+
+    def results(self, job_id: str) -> list:
+        """완료된 단위 결과를 순서대로 반환 (실패/중단된 작업의 부분 결과 내보내기용)"""
+        return [unit for _, unit in sorted(self.completed_units(job_id).items())]
+
+    def progress(self, job_id: str) -> dict:
+        """상태별 단위 수 (예: {"done": 36, "failed": 1})"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT status, COUNT(*) FROM units WHERE job_id = ? GROUP BY status', (job_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def delete_job(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM units WHERE job_id = ?', (job_id,))
+            self._conn.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_journal: Optional[JobJournal] = None
+_default_journal_lock = threading.Lock()
+
+
+def get_job_journal() -> JobJournal:
+    """프로세스 공용 작업 기록 인스턴스 (처음 사용할 때 생성)"""
+    global _default_journal
+    with _default_journal_lock:
+        if _default_journal is None:
+            _default_journal = JobJournal()
+        return _default_journal
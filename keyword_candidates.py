@@ -0,0 +1,168 @@
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional
+
+# 참조 코퍼스 파일 경로 (문서 빈도 표, 없으면 TF-IDF 대신 빈도만으로 순위 결정)
+REFERENCE_CORPUS_PATH = os.getenv('REFERENCE_CORPUS_PATH', os.path.join('.cache', 'reference_corpus.json'))
+# 프롬프트에 넣을 후보 단어 수 (0이면 후보 목록을 넣지 않음)
+MAX_CANDIDATE_WORDS = int(os.getenv('MAX_CANDIDATE_WORDS', '60'))
+# 후보로 인정할 최소 음절 수 (조사/어미를 떼고 남은 한 음절 어간은 대부분 용언이라 제외)
+MIN_CANDIDATE_LENGTH = 2
+
+# 한글 연속 구간 (어절에서 숫자·영문·문장부호를 뺀 부분)
+_HANGUL_RUN = re.compile(r'[가-힣]+')
+
+# 어절 끝에서 떼어 낼 어미와 조사 (긴 것부터 비교)
+ENDINGS = (
+    '했습니다', '합니다', '됩니다', '입니다', '습니다', '었습니다', '았습니다', '했어요', '해요', '이에요', '예요',
+    '했다', '한다', '된다', '이다', '하는', '되는', '하고', '하여', '해서', '하면', '하게', '하기', '되어', '되고',
+    '했던', '하던', '한', '된', '할', '될', '적인', '적으로',
+)
+PARTICLES = (
+    '에서는', '에게서', '으로서', '으로써', '으로는', '에서도', '까지는', '부터는', '에게는', '이라는', '라는',
+    '에서', '에게', '한테', '께서', '으로', '까지', '부터', '처럼', '보다', '마다', '이나', '이며', '이고', '에는',
+    '와', '과', '은', '는', '이', '가', '을', '를', '에', '의', '도', '만', '로', '들',
+)
+_SUFFIXES = tuple(sorted(set(ENDINGS + PARTICLES), key=len, reverse=True))
+# 한 어절에서 떼어 낼 최대 접미사 수 (예: 학생 + 들 + 에게)
+_MAX_STRIPPED_SUFFIXES = 2
+
+# 학습 어휘로 의미가 적은 기능어
+STOPWORDS = frozenset((
+    '그리고', '그러나', '하지만', '그래서', '그런데', '또한', '또는', '및', '때문', '위해', '통해', '대해', '대한',
+    '따라', '이것', '그것', '저것', '이런', '그런', '저런', '우리', '저희', '여기', '거기', '지금', '정말', '아주',
+    '매우', '가장', '모든', '어떤', '무엇', '있는', '없는', '같은', '경우', '정도', '이후', '이전',
+))
+
+
+def strip_suffixes(eojeol: str) -> str:
+    """어절 끝의 조사와 어미를 떼어 낸 어간 반환 (한 음절 접미사는 두 음절 이상 남을 때만 뗌)"""
+    word = eojeol
+    for _ in range(_MAX_STRIPPED_SUFFIXES):
+        for suffix in _SUFFIXES:
+            min_stem = 2 if len(suffix) == 1 else 1
+            if word.endswith(suffix) and len(word) - len(suffix) >= min_stem:
+                word = word[:-len(suffix)]
+                break
+        else:
+            break
+    return word
+
+
+def tokenize(text: str) -> list:
+    """텍스트를 어절 단위로 나누고 조사·어미를 뗀 단어 목록 반환 (등장 순서 유지)"""
+    return [strip_suffixes(eojeol) for eojeol in _HANGUL_RUN.findall(text)]
+
+
+def _terms(text: str) -> list:
+    return [word for word in tokenize(text) if len(word) >= MIN_CANDIDATE_LENGTH and word not in STOPWORDS]
+
+
+def term_frequencies(text: str) -> Counter:
+    """후보가 될 수 있는 단어별 등장 횟수 (처음 나온 순서 유지)"""
+    return Counter(_terms(text))
+
+
+class ReferenceCorpus:
+    """TF-IDF 계산용 참조 코퍼스 (문서 수와 단어별 문서 빈도만 보관)
+
+    어느 글에나 흔히 나오는 단어는 IDF가 낮아 후보 순위가 내려가고, 해당 글에만 자주 나오는
+    주제어가 위로 올라간다. 문서가 하나도 없으면 모든 단어의 IDF가 같아 빈도 순이 된다.
+    """
+
+    def __init__(self, documents: int = 0, document_frequency: Optional[dict] = None):
+        self.documents = documents
+        self.document_frequency = Counter(document_frequency or {})
+
+    def add_document(self, text: str) -> None:
+        self.documents += 1
+        self.document_frequency.update(set(_terms(text)))
+
+    def idf(self, word: str) -> float:
+        return math.log((1 + self.documents) / (1 + self.document_frequency.get(word, 0))) + 1
+
+    def save(self, path: str = REFERENCE_CORPUS_PATH) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"documents": self.documents, "document_frequency": self.document_frequency},
+                      f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str = REFERENCE_CORPUS_PATH) -> 'ReferenceCorpus':
+        """저장된 코퍼스를 읽음 (파일이 없으면 빈 코퍼스)"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data["documents"], data["document_frequency"])
+
+
+def rank_candidates(text: str, limit: Optional[int] = MAX_CANDIDATE_WORDS,
+                    corpus: Optional[ReferenceCorpus] = None, exclude: Optional[Iterable[str]] = None) -> list:
+    """TF-IDF 점수가 높은 순으로 어휘 후보 목록 반환 (동점이면 먼저 나온 단어 우선)"""
+    corpus = corpus if corpus is not None else get_reference_corpus()
+    excluded = set(exclude or ())
+    frequencies = term_frequencies(text)
+    scored = [
+        (count * corpus.idf(word), word) for word, count in frequencies.items() if word not in excluded
+    ]
+    # sorted는 안정 정렬이므로 점수가 같으면 Counter의 삽입 순서(첫 등장 순)가 유지됨
+    words = [word for _, word in sorted(scored, key=lambda item: -item[0])]
+    return words[:limit] if limit else words
+
+
+_default_corpus: Optional[ReferenceCorpus] = None
+_default_corpus_lock = threading.Lock()
+
+
+def get_reference_corpus() -> ReferenceCorpus:
+    """REFERENCE_CORPUS_PATH의 참조 코퍼스 (처음 사용할 때 한 번 읽음)"""
+    global _default_corpus
+    with _default_corpus_lock:
+        if _default_corpus is None:
+            _default_corpus = ReferenceCorpus.load(REFERENCE_CORPUS_PATH)
+        return _default_corpus
+
+
+def vocabulary_candidates(text: str, exclude_words: Optional[list] = None) -> list:
+    """프롬프트에 넣을 어휘 후보 (MAX_CANDIDATE_WORDS가 0이면 빈 목록)"""
+    if MAX_CANDIDATE_WORDS <= 0:
+        return []
+    return rank_candidates(text, MAX_CANDIDATE_WORDS, exclude=exclude_words)
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the reference corpus used to rank vocabulary candidates.")
+    parser.add_argument('inputs', nargs='+', help="UTF-8 text files (or directories of .txt files), one document each")
+    parser.add_argument('-o', '--output', default=REFERENCE_CORPUS_PATH,
+                        help=f"Corpus file to write (default: {REFERENCE_CORPUS_PATH})")
+    parser.add_argument('--append', action='store_true', help="Add to the existing corpus instead of replacing it")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list] = None) -> int:
+    args = parse_args(argv)
+    corpus = ReferenceCorpus.load(args.output) if args.append else ReferenceCorpus()
+    for name in args.inputs:
+        path = Path(name)
+        files = sorted(path.rglob('*.txt')) if path.is_dir() else [path]
+        for file_path in files:
+            corpus.add_document(file_path.read_text(encoding='utf-8-sig'))
+    corpus.save(args.output)
+    print(f"{args.output}: 문서 {corpus.documents}개, 단어 {len(corpus.document_frequency)}개", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
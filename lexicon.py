@@ -0,0 +1,146 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Iterable, Optional
+
+from keyword_candidates import vocabulary_candidates
+from metrics import LEXICON_LOOKUPS
+
+# 어휘집 파일 경로 (환경 변수로 조정 가능)
+DEFAULT_LEXICON_PATH = os.getenv('LEXICON_PATH', os.path.join('.cache', 'lexicon.sqlite3'))
+# 0이면 어휘집을 조회하지 않고 모든 후보를 모델에 보냄 (결과 학습은 계속)
+LEXICON_ENABLED = os.getenv('LEXICON_ENABLED', '1') != '0'
+# 이 횟수 이상 받은 정의만 로컬에서 채움 (한 번 잘못 받은 정의가 계속 재사용되지 않도록 올릴 수 있음)
+LEXICON_MIN_OCCURRENCES = int(os.getenv('LEXICON_MIN_OCCURRENCES', '1'))
+
+# 어휘 표 열 순서 (카테고리, 단어, 품사, 의미, 예문)
+VOCABULARY_COLUMNS = 5
+
+_PARENTHESES = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+# 모델은 '공부하다'처럼 사전형으로 답하고 로컬 후보는 '공부'처럼 어간만 남으므로 조회 키에서 뗌
+_VERB_SUFFIXES = ('하다', '되다')
+
+
+def lookup_key(word: str) -> str:
+    """어휘집 조회 키 (NFC, 괄호 설명·공백 제거, 하다/되다 동사는 어근)"""
+    word = unicodedata.normalize('NFC', str(word))
+    word = ''.join(_PARENTHESES.sub(' ', word).split())
+    for suffix in _VERB_SUFFIXES:
+        if word.endswith(suffix) and len(word) > len(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+class Lexicon:
+    """이전 분석에서 받은 어휘 정의를 (단어, 품사, 출력 언어)별로 모아 두는 SQLite 어휘집
+
+    같은 단어를 다시 만나면 모델에 보내지 않고 저장된 행(카테고리, 단어, 품사, 의미, 예문)으로 채운다.
+    같은 항목을 여러 번 받으면 처음 받은 정의를 유지하고 등장 횟수만 늘린다.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEXICON_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if path != ':memory:' and directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                word TEXT NOT NULL,
+                part_of_speech TEXT NOT NULL,
+                output_language TEXT NOT NULL,
+                word_key TEXT NOT NULL,
+                category TEXT NOT NULL,
+                meaning TEXT NOT NULL,
+                example TEXT NOT NULL,
+                occurrences INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (word, part_of_speech, output_language)
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_key ON entries(output_language, word_key)')
+
+    def add_rows(self, rows: Iterable[list], output_language: str) -> int:
+        """파싱한 어휘 표 행들을 어휘집에 합치고 저장한 행 수 반환 (단어나 의미가 빈 행은 건너뜀)"""
+        now = time.time()
+        entries = []
+        for row in rows:
+            if len(row) != VOCABULARY_COLUMNS:
+                continue
+            category, word, part_of_speech, meaning, example = (str(cell).strip() for cell in row)
+            key = lookup_key(word)
+            if key and meaning:
+                entries.append((word, part_of_speech, output_language, key, category, meaning, example, now))
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO entries (word, part_of_speech, output_language, word_key, category, meaning, example, '
+                'occurrences, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?) '
+                'ON CONFLICT(word, part_of_speech, output_language) DO UPDATE SET '
+                'occurrences = occurrences + 1, updated_at = excluded.updated_at',
+                entries
+            )
+        return len(entries)
+
+    def lookup(self, words: Iterable[str], output_language: str, limit: Optional[int] = None,
+               min_occurrences: int = LEXICON_MIN_OCCURRENCES) -> list:
+        """단어들의 저장된 표 행 목록 (입력 순서, 단어마다 가장 많이 받은 품사의 행 하나)"""
+        keys = list(dict.fromkeys(key for key in map(lookup_key, words) if key))
+        if not keys:
+            return []
+        found = {}
+        with self._lock:
+            # SQLite의 바인딩 변수 수 제한을 넘지 않도록 나눠서 조회
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                cursor = self._conn.execute(
+                    'SELECT word_key, category, word, part_of_speech, meaning, example FROM entries '
+                    f'WHERE output_language = ? AND occurrences >= ? AND word_key IN ({",".join("?" * len(batch))}) '
+                    'ORDER BY occurrences DESC, updated_at DESC',
+                    [output_language, min_occurrences] + batch
+                )
+                for key, *row in cursor:
+                    found.setdefault(key, row)
+        rows = [found[key] for key in keys if key in found]
+        LEXICON_LOOKUPS.inc(len(found), result='hit')
+        LEXICON_LOOKUPS.inc(len(keys) - len(found), result='miss')
+        return rows[:limit] if limit else rows
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_lexicon: Optional[Lexicon] = None
+_default_lexicon_lock = threading.Lock()
+
+
+def get_lexicon() -> Lexicon:
+    """프로세스 공용 어휘집 (처음 사용할 때 생성)"""
+    global _default_lexicon
+    with _default_lexicon_lock:
+        if _default_lexicon is None:
+            _default_lexicon = Lexicon()
+        return _default_lexicon
+
+
+def prefill_vocabulary(text: str, output_language: str, exclude_words: Optional[list] = None,
+                       max_rows: Optional[int] = None) -> tuple[list, list]:
+    """로컬 어휘 후보를 어휘집과 대조해 (모델에 보낼 후보, 로컬에서 채운 표 행) 반환"""
+    candidates = vocabulary_candidates(text, exclude_words)
+    if not LEXICON_ENABLED or not candidates:
+        return candidates, []
+    known_rows = get_lexicon().lookup(candidates, output_language, limit=max_rows)
+    known = {lookup_key(row[1]) for row in known_rows}
+    return [word for word in candidates if lookup_key(word) not in known], known_rows
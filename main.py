@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import extract_vocabulary, extract_grammar, fetch_url_content
+from utils import analyze_long_text, fetch_article
 import pandas as pd
 from typing import Optional
 
@@ -22,7 +22,7 @@ def download_results(df: pd.DataFrame, output_language: str) -> tuple[str, str,
     }
     
     # 언어별 파일명
-    file_names = 
+    file_names = {
         "한국어": "한국어_분석_결과.csv",
         "English": "korean_analysis_results.csv",
         "Tiếng Việt": "ket_qua_phan_tich.csv"
@@ -147,7 +147,12 @@ def main():
         url_input = st.text_input("Enter URL:")
         if url_input:
             try:
-                user_input = fetch_url_content(url_input)
+                article = fetch_article(url_input)
+                user_input = article["text"]
+                st.caption(
+                    f"Extracted article text: {article['extracted_chars']:,} of {article['original_chars']:,} "
+                    f"characters ({article['reduction']:.0%} smaller)"
+                )
             except Exception as e:
                 st.error(f"Error fetching URL content: {str(e)}")
 
@@ -156,14 +161,13 @@ def main():
             with st.spinner('Analyzing text... Please wait.'):  
                 try:
                     # Call analysis functions here
-                    vocab_result = None
-                    grammar_result = None
+                    include_vocabulary = "Vocabulary" in analysis_type or "Both" in analysis_type
+                    include_grammar = "Grammar" in analysis_type or "Both" in analysis_type
 
-                    if "Vocabulary" in analysis_type or "Both" in analysis_type:
-                        vocab_result = extract_vocabulary(user_input, output_language)
-                    
-                    if "Grammar" in analysis_type or "Both" in analysis_type:
-                        grammar_result = extract_grammar(user_input, output_language)
+                    # 긴 텍스트는 토큰 예산 단위로 나눠 분석 (둘 다 선택 시 청크당 한 번의 호출)
+                    vocab_result, grammar_result = analyze_long_text(
+                        user_input, output_language, include_vocabulary, include_grammar
+                    )
 
                     # Display results
                     if vocab_result is not None:
@@ -0,0 +1,269 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# 호출별 JSON 로그 파일 경로 (비우면 기록하지 않음)
+METRICS_JSON_LOG = os.getenv('METRICS_JSON_LOG') or None
+# Prometheus 수집용 HTTP 포트 (비우면 서버를 띄우지 않음)
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0')) or None
+# 서버를 열 주소 (기본은 로컬만, 다른 호스트에서 수집하려면 0.0.0.0 등으로 설정)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+DEFAULT_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, math.inf)
+
+
+def _label_key(labelnames: tuple, labels: dict) -> tuple:
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames: tuple, key: tuple, extra: Optional[dict] = None) -> str:
+    pairs = list(zip(labelnames, key)) + list((extra or {}).items())
+    if not pairs:
+        return ''
+    escaped = (f'{name}="{_escape_label_value(value)}"' for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    return '+Inf' if value == math.inf else repr(float(value))
+
+
+class Counter:
+    """누적 카운터 (레이블별)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [dict(zip(self.labelnames, key), value=value) for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """히스토그램 (Prometheus 버킷 + 백분위 계산용 최근 관측값 보관)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_LATENCY_BUCKETS, reservoir_size: int = 1024):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets)) if math.inf in buckets else tuple(sorted(buckets)) + (math.inf,)
+        self.reservoir_size = reservoir_size
+        self._series: dict = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {
+                    "buckets": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                    "recent": deque(maxlen=self.reservoir_size),
+                }
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+            series["recent"].append(value)
+
+    def percentile(self, q: float, **labels) -> Optional[float]:
+        """최근 관측값 기준 백분위 (q는 0~100)"""
+        with self._lock:
+            series = self._series.get(_label_key(self.labelnames, labels))
+            values = sorted(series["recent"]) if series else []
+        if not values:
+            return None
+        index = min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))
+        return values[index]
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    labels = _format_labels(self.labelnames, key, {"le": _format_value(bound)})
+                    lines.append(f'{self.name}_bucket{labels} {count}')
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f'{self.name}_sum{labels} {_format_value(series["sum"])}')
+                lines.append(f'{self.name}_count{labels} {series["count"]}')
+        return lines
+
+    def snapshot(self) -> list:
+        with self._lock:
+            keys = sorted(self._series)
+            counts = {key: (self._series[key]["count"], self._series[key]["sum"]) for key in keys}
+        result = []
+        for key in keys:
+            labels = dict(zip(self.labelnames, key))
+            count, total = counts[key]
+            result.append(dict(
+                labels,
+                count=count,
+                mean=total / count if count else None,
+                p50=self.percentile(50, **labels),
+                p90=self.percentile(90, **labels),
+                p99=self.percentile(99, **labels),
+            ))
+        return result
+
+
+class MetricsRegistry:
+    """프로세스 내 지표 저장소"""
+
+    def __init__(self):
+        self._metrics: dict = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), **kwargs) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, **kwargs)
+
+    def render_prometheus(self) -> str:
+        """Prometheus 텍스트 형식으로 전체 지표 출력"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> dict:
+        """JSON으로 직렬화할 수 있는 지표 요약 (히스토그램은 p50/p90/p99 포함)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+registry = MetricsRegistry()
+
+API_CALL_SECONDS = registry.histogram(
+    'gemini_api_call_seconds', 'Latency of a single Gemini API attempt.', ('prompt_version', 'outcome'))
+API_RETRIES = registry.counter(
+    'gemini_api_retries_total', 'Retries after transient Gemini API errors.', ('error',))
+API_TOKENS = registry.counter(
+    'gemini_api_tokens_total', 'Tokens reported by Gemini usage metadata.', ('prompt_version', 'direction'))
+CACHE_LOOKUPS = registry.counter(
+    'gemini_cache_lookups_total', 'Response cache lookups.', ('result',))
+LEXICON_LOOKUPS = registry.counter(
+    'lexicon_lookups_total', 'Vocabulary candidates looked up in the local lexicon.', ('result',))
+TABLE_ROWS_PARSED = registry.counter(
+    'table_rows_parsed_total', 'Table rows recovered from responses.', ('task',))
+TABLE_ROWS_EXPECTED = registry.counter(
+    'table_rows_expected_total', 'Table rows requested in prompts.', ('task',))
+TABLE_ROWS_REPAIRED = registry.counter(
+    'table_rows_repaired_total', 'Table rows kept after fixing their cell count.', ('task',))
+TABLE_ROWS_DROPPED = registry.counter(
+    'table_rows_dropped_total', 'Table rows dropped because their cells could not be repaired.', ('task',))
+CONTENT_EXTRACTION_RATIO = registry.histogram(
+    'content_extraction_ratio', 'Extracted article characters divided by raw HTML characters.',
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0))
+TABLE_PARSE_YIELD = registry.histogram(
+    'table_parse_yield_ratio', 'Parsed rows divided by requested rows, per response.', ('task',),
+    buckets=(0.25, 0.5, 0.75, 0.9, 1.0, 1.5, math.inf))
+
+
+_json_log_lock = threading.Lock()
+
+
+def log_event(event: str, **fields) -> None:
+    """METRICS_JSON_LOG가 설정된 경우 이벤트를 JSON 한 줄로 기록"""
+    if not METRICS_JSON_LOG:
+        return
+    line = json.dumps(dict(fields, event=event, timestamp=time.time()), ensure_ascii=False)
+    with _json_log_lock:
+        with open(METRICS_JSON_LOG, 'a', encoding='utf-8') as log_file:
+            log_file.write(line + '\n')
+
+
+def record_parse_yield(task: str, parsed_rows: int, expected_rows: int,
+                       dropped_rows: int = 0, repaired_rows: int = 0) -> None:
+    """표 파싱 결과 행 수를 요청한 행 수와 비교해 기록 (복구/버린 행 수 포함)"""
+    TABLE_ROWS_PARSED.inc(parsed_rows, task=task)
+    TABLE_ROWS_EXPECTED.inc(expected_rows, task=task)
+    TABLE_ROWS_REPAIRED.inc(repaired_rows, task=task)
+    TABLE_ROWS_DROPPED.inc(dropped_rows, task=task)
+    if expected_rows:
+        TABLE_PARSE_YIELD.observe(parsed_rows / expected_rows, task=task)
+    log_event('table_parse', task=task, parsed_rows=parsed_rows, expected_rows=expected_rows,
+              dropped_rows=dropped_rows, repaired_rows=repaired_rows)
+
+
+def record_content_extraction(url: str, original_chars: int, extracted_chars: int) -> None:
+    """URL 본문 추출로 줄어든 글자 수 기록"""
+    if original_chars:
+        CONTENT_EXTRACTION_RATIO.observe(extracted_chars / original_chars)
+    log_event('content_extraction', url=url, original_chars=original_chars, extracted_chars=extracted_chars)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = registry.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = METRICS_PORT,
+                         host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """Prometheus 수집용 HTTP 서버를 백그라운드 스레드로 시작 (프로세스당 한 번)"""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        return _server
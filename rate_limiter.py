@@ -0,0 +1,108 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from typing import Optional
+
+# 계정 할당량 (분당 요청 수 / 분당 토큰 수, 환경 변수로 조정 가능)
+REQUESTS_PER_MINUTE = float(os.getenv('GEMINI_RPM', '60'))
+TOKENS_PER_MINUTE = float(os.getenv('GEMINI_TPM', '120000'))
+
+
+def estimate_tokens(text: str) -> int:
+    """빠른 로컬 토큰 수 추정 (ASCII 약 4자당 1토큰, 한글 등은 1자당 1토큰으로 보수적으로 계산)"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars))
+
+
+class TokenBucket:
+    """토큰 버킷 (예약 방식: 먼저 차감하고, 부족분이 채워질 때까지 기다릴 시간을 돌려줌)"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+        self._updated_at = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """amount만큼 차감하고 대기 시간(초) 반환 (호출자는 잠금 안에서 사용)"""
+        self._refill(now)
+        self._tokens -= min(amount, self.capacity)
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.refill_per_second
+
+    def adjust(self, amount: float, now: float) -> None:
+        """이미 예약한 양을 amount만큼 추가 차감 (음수면 그만큼 반환, 호출자는 잠금 안에서 사용)"""
+        self._refill(now)
+        self._tokens = min(self.capacity, self._tokens - min(amount, self.capacity))
+
+
+class RateLimiter:
+    """요청 수/토큰 수 버킷을 함께 쓰는 공용 속도 제한기
+
+    한 프로세스 안의 모든 스레드와 Streamlit 세션이 같은 인스턴스를 공유한다.
+    여러 프로세스로 배포하는 경우에는 프로세스 수만큼 할당량을 나눠 설정해야 한다.
+    """
+
+    def __init__(self, requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = TOKENS_PER_MINUTE):
+        self._request_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self._token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 0) -> float:
+        """요청 1건과 tokens만큼을 예약하고 기다려야 할 시간(초) 반환"""
+        with self._lock:
+            now = time.monotonic()
+            return max(
+                self._request_bucket.reserve(1, now),
+                self._token_bucket.reserve(tokens, now),
+                self._blocked_until - now,
+            )
+
+    def settle(self, reserved_tokens: int, actual_tokens: int) -> None:
+        """응답을 받은 뒤 실제 토큰 수(입력+출력)로 예약분을 정산
+
+        호출 전에는 출력 길이를 알 수 없어 프롬프트 추정치만 예약하므로, 실제 사용량과의 차이를
+        토큰 버킷에 반영해 출력 토큰도 분당 토큰 할당량에 포함되게 한다.
+        """
+        with self._lock:
+            self._token_bucket.adjust(actual_tokens - reserved_tokens, time.monotonic())
+
+    def acquire(self, tokens: int = 0) -> None:
+        """할당량이 생길 때까지 대기 (동기)"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        """할당량이 생길 때까지 대기 (비동기)"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """서버가 429로 재시도 시점을 알려주면 모든 호출자를 그 시간 동안 멈춤 (재시도 폭주 방지)"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """프로세스 공용 속도 제한기"""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
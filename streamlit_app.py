@@ -1,42 +1,220 @@
 import streamlit as st
-from utils2 import extract_vocabulary, extract_grammar, extract_text_from_pdf
+from utils2 import (
+    analysis_job_id, analyze_pages, analyze_text, analyze_text_multilingual, extract_text_from_pdf_parallel,
+    iter_pdf_pages, stream_analysis, GRAMMAR_COLUMN_NAMES, MAX_CONCURRENT_PAGES, OUTPUT_LANGUAGES,
+    VOCABULARY_COLUMN_NAMES
+)
+from gemini_client import PREWARM_MODELS, get_model, prewarm, token_usage
+from export import EXPORT_FORMATS, available_formats, export_buffer
+from job_journal import get_job_journal
+from metrics import API_CALL_SECONDS, TABLE_PARSE_YIELD, start_metrics_server
+from chunker import chunk_text, merge_pages
+from vocab_index import MAX_EXCLUDED_WORDS, VocabularyIndex, deduplicate_vocabulary
+import functools
+import hashlib
+import io
 import pandas as pd
 from typing import Optional
 
-def download_results(df: pd.DataFrame, output_language: str) -> tuple[str, str, bytes]:
+@st.cache_resource
+def load_resources():
+    """
+    Create process-wide resources once, however often the script reruns
+
+    Returns:
+        The shared Gemini model (connection pre-warmed when PREWARM_MODELS is on)
+    """
+    model = prewarm() if PREWARM_MODELS else get_model()
+    # Expose Prometheus metrics when METRICS_PORT is set (no-op otherwise)
+    start_metrics_server()
+    get_job_journal()
+    return model
+
+def analyze_chunk(text: str, output_language: str, include_vocabulary: bool, include_grammar: bool,
+                  exclude_words: Optional[list] = None,
+                  all_languages: bool = False) -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """
+    analyze_text, or with all_languages one request for every output language (the others are cached for a later switch)
+
+    Makes no Streamlit calls, so analyze_pages' worker threads can use it directly. Repeated chunks are
+    served by the per-language result cache and the response cache, which are shared across sessions.
+    """
+    if all_languages:
+        results = analyze_text_multilingual(text, OUTPUT_LANGUAGES, include_vocabulary, include_grammar, exclude_words)
+        return results[output_language]
+    return analyze_text(text, output_language, include_vocabulary, include_grammar, exclude_words)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def analyze_text_cached(text: str, output_language: str, include_vocabulary: bool, include_grammar: bool,
+                        exclude_words: Optional[list] = None,
+                        all_languages: bool = False) -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """
+    analyze_chunk memoised per text/language/task, shared by all sessions of this server
+
+    Only call this from the script thread: st.cache_data needs the ScriptRunContext that worker threads lack.
+    """
+    return analyze_chunk(text, output_language, include_vocabulary, include_grammar, exclude_words, all_languages)
+
+def analysis_key(document: bytes, output_language: str, include_vocabulary: bool, include_grammar: bool,
+                 *extra) -> str:
+    """
+    Identify an analysis by its input and the settings that change its result
+    """
+    digest = hashlib.sha256(document).hexdigest()
+    return '|'.join(map(str, (digest, output_language, include_vocabulary, include_grammar) + extra))
+
+def render_sections(sections: list) -> None:
+    """
+    Re-render stored result tables without calling the API
+
+    Args:
+        sections: (title, DataFrame or None) pairs; None renders the title alone
+    """
+    for title, df in sections:
+        st.subheader(title)
+        if df is not None:
+            st.dataframe(df, use_container_width=True, hide_index=True)
+
+def render_export(combined_results: pd.DataFrame, output_language: str, export_format: str) -> None:
+    """
+    Show the download button and preview for the combined results
+    """
+    # 다운로드 버튼 준비
+    button_label, file_name, mime, export_data = download_results(
+        combined_results, 
+        output_language,
+        export_format
+    )
+    
+    # 다운로드 버튼 표시
+    st.download_button(
+        label=button_label,
+        data=export_data,
+        file_name=file_name,
+        mime=mime,
+        help=f"{export_format.upper()} 형식으로 분석 결과를 다운로드합니다."
+    )
+    
+    # Preview result before download
+    st.write("미리보기:")
+    st.dataframe(combined_results)
+
+def download_results(df: pd.DataFrame, output_language: str,
+                     export_format: str = "csv") -> tuple[str, str, str, io.BytesIO]:
     """
     Prepare results for download with proper encoding based on language
     
     Args22
         df: DataFrame containing the analysis results
         output_language: Selected output language
+        export_format: One of EXPORT_FORMATS (csv, jsonl, parquet, arrow)
     
     Returns:
-        tuple: (button_label, filename, csv_data)
+        tuple: (button_label, filename, mime, data buffer)
     """
+    extension, mime = EXPORT_FORMATS[export_format]
+
     # 언어별 다운로드 버튼 레이블
     button_labels = {
-        "한국어": "분석 결과 다운로드 (CSV)",
-        "English": "Download Analysis Results (CSV)",
-        "Tiếng Việt": "Tải kết quả phân tích (CSV)"
+        "한국어": "분석 결과 다운로드 ({})",
+        "English": "Download Analysis Results ({})",
+        "Tiếng Việt": "Tải kết quả phân tích ({})"
     }
     
     # 언어별 파일명
     file_names = {
-        "한국어": "한국어_분석_결과.csv",
-        "English": "korean_analysis_results.csv",
-        "Tiếng Việt": "ket_qua_phan_tich.csv"
+        "한국어": "한국어_분석_결과",
+        "English": "korean_analysis_results",
+        "Tiếng Việt": "ket_qua_phan_tich"
     }
     
-    # CSV 데이터 생성 (UTF-8 with BOM)
-    csv_data = df.to_csv(index=False, encoding='utf-8-sig').encode('utf-8-sig')
+    # 버퍼에 바로 기록해 그대로 넘김 (CSV는 UTF-8 with BOM, 문자열 사본을 따로 만들지 않음)
+    data = export_buffer(df, export_format)
     
     return (
-        button_labels.get(output_language, button_labels["Tiếng Việt"]),
-        file_names.get(output_language, file_names["Tiếng Việt"]),
-        csv_data
+        button_labels.get(output_language, button_labels["Tiếng Việt"]).format(export_format.upper()),
+        f"{file_names.get(output_language, file_names['Tiếng Việt'])}.{extension}",
+        mime,
+        data
     )
 
+def journal_results_to_frame(page_results: list) -> pd.DataFrame:
+    """
+    Combine page results recorded in the job journal into one export table
+
+    Args:
+        page_results: Completed units from JobJournal.results, in page order
+
+    Returns:
+        DataFrame with vocabulary rows followed by grammar rows, tagged with 'type' and 'page'
+    """
+    tables = {"vocabulary": [], "grammar": []}
+    for page_result in page_results:
+        pages = page_result["pages"]
+        page_num = str(pages[0]) if len(pages) == 1 else f"{pages[0]}-{pages[-1]}"
+        for table, frames in tables.items():
+            if page_result[table] is not None and not page_result[table].empty:
+                frames.append(page_result[table].assign(page=page_num))
+    results = []
+    if tables["vocabulary"]:
+        results.append(deduplicate_vocabulary(pd.concat(tables["vocabulary"], ignore_index=True)).assign(type='vocabulary'))
+    if tables["grammar"]:
+        results.append(pd.concat(tables["grammar"], ignore_index=True).assign(type='grammar'))
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+
+def stream_results_to_tables(texts: list[str], output_language: str, include_vocabulary: bool,
+                             include_grammar: bool,
+                             all_languages: bool = False) -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """
+    Render vocabulary/grammar rows live as the model generates them
+
+    Args:
+        texts: Chunks of the input text, analysed one after another into the same tables
+        all_languages: Fetch every output language in one request per chunk (tables fill per chunk, not per row)
+
+    Returns:
+        tuple: (vocab_result, grammar_result) with the complete tables
+    """
+    titles = {"vocabulary": "Vocabulary Analysis", "grammar": "Grammar Analysis"}
+    columns = {
+        "vocabulary": VOCABULARY_COLUMN_NAMES[output_language],
+        "grammar": GRAMMAR_COLUMN_NAMES[output_language]
+    }
+    rows = {"vocabulary": [], "grammar": []}
+
+    # Reserve a slot per table so vocabulary stays above grammar regardless of arrival order
+    sections = {table: st.container() for table in titles}
+    placeholders = {}
+
+    # Words found in earlier chunks are excluded from later prompts
+    vocabulary_index = VocabularyIndex()
+
+    for position, text in enumerate(texts):
+        exclude_words = vocabulary_index.known_words(MAX_EXCLUDED_WORDS)
+        chunk_start = len(rows["vocabulary"])
+        if all_languages:
+            chunk_tables = zip(("vocabulary", "grammar"), analyze_text_cached(
+                text, output_language, include_vocabulary, include_grammar, exclude_words, all_languages=True
+            ))
+            chunk_rows = [(table, row) for table, df in chunk_tables if df is not None for row in df.values.tolist()]
+        else:
+            chunk_rows = stream_analysis(text, output_language, include_vocabulary, include_grammar, exclude_words)
+        for table, row in chunk_rows:
+            if table not in placeholders:
+                sections[table].subheader(titles[table])
+                placeholders[table] = sections[table].empty()
+            rows[table].append(row)
+            placeholders[table].dataframe(
+                pd.DataFrame(rows[table], columns=columns[table]),
+                use_container_width=True,
+                hide_index=True
+            )
+        vocabulary_index.add((row[1] for row in rows["vocabulary"][chunk_start:]), position=position)
+
+    vocab_result = pd.DataFrame(rows["vocabulary"], columns=columns["vocabulary"]) if include_vocabulary else None
+    grammar_result = pd.DataFrame(rows["grammar"], columns=columns["grammar"]) if include_grammar else None
+    return vocab_result, grammar_result
+
 def main():
     # Initialize dark mode state if not already set
     if 'dark_mode' not in st.session_state:
@@ -48,6 +226,9 @@ def main():
         layout="wide"
     )
 
+    # Create the shared Gemini model (and metrics server, job journal) once per process
+    load_resources()
+
     # Toggle for dark mode in sidebar
     with st.sidebar:
         st.header("Theme Settings 🎨")
@@ -141,8 +322,45 @@ def main():
             index=0
         )
         
+        all_languages = st.checkbox(
+            "Fetch all output languages at once",
+            value=False,
+            help="One request returns meanings in every output language, so switching the language later needs no new API calls."
+        )
         show_romanization = st.checkbox("Show Romanization", value=True)
         show_examples = st.checkbox("Show Example Sentences", value=True)
+        max_concurrent_pages = st.slider(
+            "Max Concurrent Pages (PDF)",
+            min_value=1,
+            max_value=max(16, MAX_CONCURRENT_PAGES),
+            value=MAX_CONCURRENT_PAGES,
+            help="Number of PDF pages analysed in parallel."
+        )
+        export_format = st.selectbox(
+            "Export Format",
+            available_formats(),
+            index=0,
+            help="Parquet/Arrow keep repeated columns (category, part of speech) dictionary-encoded."
+        )
+
+        # Input/output tokens per prompt variant, from the API's usage metadata
+        with st.expander("Token Usage"):
+            usage_summary = token_usage.summary()
+            if usage_summary:
+                st.dataframe(pd.DataFrame.from_dict(usage_summary, orient="index"), use_container_width=True)
+            else:
+                st.caption("No API calls yet.")
+
+        # Per-attempt latency percentiles and table parse yield
+        with st.expander("Performance Metrics"):
+            latency = API_CALL_SECONDS.snapshot()
+            parse_yield = TABLE_PARSE_YIELD.snapshot()
+            if latency:
+                st.dataframe(pd.DataFrame(latency), use_container_width=True)
+            if parse_yield:
+                st.dataframe(pd.DataFrame(parse_yield), use_container_width=True)
+            if not latency and not parse_yield:
+                st.caption("No API calls yet.")
 
     # Main content
     input_type = st.radio("Input Type:", ["Paste Text", "Upload File PDF"])
@@ -156,117 +374,151 @@ def main():
         uploaded_file = st.file_uploader("Choose a PDF file", type=['pdf'])
         if uploaded_file:
             pdf_file = uploaded_file
+        page_col1, page_col2 = st.columns(2)
+        first_page = page_col1.number_input("First page", min_value=1, value=1, step=1)
+        last_page = page_col2.number_input("Last page (0 = last page of file)", min_value=0, value=0, step=1)
+        parallel_extraction = st.checkbox(
+            "Multi-process text extraction",
+            value=False,
+            help="Extract large PDFs on several CPU cores before analysis starts."
+        )
 
-    if st.button("Analyze Text", key="analyze"):
-        if user_input or pdf_file:
-            with st.spinner('Analyzing text... Please wait.'):  
-                try:
-                     # Initialize variables to store all results
-                    all_vocab_results = []
-                    all_grammar_results = []
-                    
-                    if pdf_file:
-                        page_texts = extract_text_from_pdf(pdf_file)
-                        for page_data in page_texts:
-                            page_num = page_data["page"]
-                            text = page_data["text"]
-                             
-                            st.subheader(f"Page {page_num}")
-                            
-                            # Perform analysis
-                            vocab_result = None
-                            grammar_result = None
-
-                            if "Vocabulary" in analysis_type or "Both" in analysis_type:
-                                vocab_result = extract_vocabulary(text, output_language)
-                                if not vocab_result.empty:  # Check if there are results
-                                    all_vocab_results.append(vocab_result.assign(page=page_num))
-                            
-                            if "Grammar" in analysis_type or "Both" in analysis_type:
-                                grammar_result = extract_grammar(text, output_language)
-                                if not grammar_result.empty:
-                                    all_grammar_results.append(grammar_result.assign(page=page_num))
-                            
-                            # Display results for each page
-                            if vocab_result is not None and not vocab_result.empty:
-                                st.subheader(f"Vocabulary Analysis - Page {page_num}")
-                                st.dataframe(vocab_result, use_container_width=True, hide_index=True)
-                            
-                            if grammar_result is not None and not grammar_result.empty:
-                                st.subheader(f"Grammar Analysis - Page {page_num}")
-                                st.dataframe(grammar_result, use_container_width=True, hide_index=True)
-
-                    elif user_input:
-                        # Call analysis functions here
-                        vocab_result = None
-                        grammar_result = None
-
-                        if "Vocabulary" in analysis_type or "Both" in analysis_type:
-                            vocab_result = extract_vocabulary(user_input, output_language)
-                            if not vocab_result.empty:
-                                all_vocab_results.append(vocab_result)
+    include_vocabulary = "Vocabulary" in analysis_type or "Both" in analysis_type
+    include_grammar = "Grammar" in analysis_type or "Both" in analysis_type
+
+    current_key = None
+    if pdf_file:
+        current_key = analysis_key(pdf_file.getvalue(), output_language, include_vocabulary, include_grammar,
+                                   int(first_page), int(last_page))
+    elif user_input:
+        current_key = analysis_key(user_input.encode('utf-8'), output_language, include_vocabulary, include_grammar)
+
+    # Results live in session state, so widget changes rerun the script without re-analysing
+    stored = st.session_state.get('analysis')
+    analyze_clicked = st.button("Analyze Text", key="analyze")
+
+    if analyze_clicked and not (user_input or pdf_file):
+        st.warning("Please provide some text or a PDF file to analyze!")
+    elif analyze_clicked and not (stored and stored["key"] == current_key):
+        with st.spinner('Analyzing text... Please wait.'):  
+            journal = None
+            job_id = None
+            try:
+                 # Initialize variables to store all results
+                all_vocab_results = []
+                all_grammar_results = []
+                sections = []
+                
+                if pdf_file:
+                    if parallel_extraction:
+                        page_texts = extract_text_from_pdf_parallel(pdf_file, int(first_page), int(last_page) or None)
+                    else:
+                        # Pages are read lazily, so page 1 is analysed while later pages are still being extracted
+                        page_texts = iter_pdf_pages(pdf_file, int(first_page), int(last_page) or None)
+                    # Short pages are merged (and long ones split) up to the token budget
+                    page_chunks = merge_pages(page_texts)
+                    # Every finished chunk is checkpointed, so re-running the same file resumes after a failure
+                    journal = get_job_journal()
+                    job_id = analysis_job_id(
+                        pdf_file.getvalue(), output_language, include_vocabulary, include_grammar,
+                        first_page=int(first_page), last_page=int(last_page)
+                    )
+                    journal.start_job(job_id, pdf_file.name)
+                    # Chunks are analysed concurrently but returned in page order
+                    page_results = analyze_pages(
+                        page_chunks, output_language, include_vocabulary, include_grammar,
+                        max_workers=max_concurrent_pages,
+                        vocabulary_index=VocabularyIndex(),
+                        journal=journal,
+                        job_id=job_id,
+                        analyze=functools.partial(analyze_chunk, all_languages=all_languages)
+                    )
+                    for page_result in page_results:
+                        pages = page_result["pages"]
+                        page_num = str(pages[0]) if len(pages) == 1 else f"{pages[0]}-{pages[-1]}"
+                        vocab_result = page_result["vocabulary"]
+                        grammar_result = page_result["grammar"]
                         
-                        if "Grammar" in analysis_type or "Both" in analysis_type:
-                            grammar_result = extract_grammar(user_input, output_language)
-                            if not grammar_result.empty:
-                                all_grammar_results.append(grammar_result)
-
-                        # Display results
-                        if vocab_result is not None and not vocab_result.empty:
-                            st.subheader("Vocabulary Analysis")
-                            st.dataframe(
-                                vocab_result,
-                                use_container_width=True,
-                                hide_index=True
-                            )
+                        page_sections = [(f"Page {page_num}", None)]
 
+                        if vocab_result is not None and not vocab_result.empty:  # Check if there are results
+                            all_vocab_results.append(vocab_result.assign(page=page_num))
+                            page_sections.append((f"Vocabulary Analysis - Page {page_num}", vocab_result))
+                        
                         if grammar_result is not None and not grammar_result.empty:
-                            st.subheader("Grammar Analysis")
-                            st.dataframe(
-                                grammar_result,
-                                use_container_width=True,
-                                hide_index=True
-                            )
-                    
-                     # Export results
-                    results_to_export = []
-                    if all_vocab_results:
-                        combined_vocab_results = pd.concat(all_vocab_results, ignore_index=True)
-                        combined_vocab_results['type'] = 'vocabulary'
-                        results_to_export.append(combined_vocab_results)
-                    if all_grammar_results:
-                        combined_grammar_results = pd.concat(all_grammar_results, ignore_index=True)
-                        combined_grammar_results['type'] = 'grammar'
-                        results_to_export.append(combined_grammar_results)
-
-                    if results_to_export:
-                        combined_results = pd.concat(results_to_export, ignore_index=True)
+                            all_grammar_results.append(grammar_result.assign(page=page_num))
+                            page_sections.append((f"Grammar Analysis - Page {page_num}", grammar_result))
                         
-                        # 다운로드 버튼 준비
-                        button_label, file_name, csv_data = download_results(
-                            combined_results, 
-                            output_language
+                        # Display results for each page
+                        render_sections(page_sections)
+                        sections.extend(page_sections)
+
+                elif user_input:
+                    # Long text is split on sentence boundaries; rows stream into the tables as they are generated
+                    vocab_result, grammar_result = stream_results_to_tables(
+                        chunk_text(user_input) or [user_input], output_language, include_vocabulary, include_grammar,
+                        all_languages
+                    )
+
+                    if vocab_result is not None and not vocab_result.empty:
+                        all_vocab_results.append(vocab_result)
+                        sections.append(("Vocabulary Analysis", vocab_result))
+                    
+                    if grammar_result is not None and not grammar_result.empty:
+                        all_grammar_results.append(grammar_result)
+                        sections.append(("Grammar Analysis", grammar_result))
+                
+                 # Export results
+                results_to_export = []
+                if all_vocab_results:
+                    # Collapse words repeated across pages into one row with occurrence counts
+                    combined_vocab_results = deduplicate_vocabulary(pd.concat(all_vocab_results, ignore_index=True))
+                    combined_vocab_results['type'] = 'vocabulary'
+                    results_to_export.append(combined_vocab_results)
+                if all_grammar_results:
+                    combined_grammar_results = pd.concat(all_grammar_results, ignore_index=True)
+                    combined_grammar_results['type'] = 'grammar'
+                    results_to_export.append(combined_grammar_results)
+
+                combined_results = pd.concat(results_to_export, ignore_index=True) if results_to_export else None
+                stored = st.session_state['analysis'] = {
+                    "key": current_key,
+                    "output_language": output_language,
+                    "sections": sections,
+                    "combined": combined_results
+                }
+            
+            except Exception as e:
+                st.error(f"An error occurred: {str(e)}")
+                if journal is not None:
+                    journal.finish_job(job_id, 'failed')
+                    # Pages finished before the failure stay downloadable; the next run only analyses the rest
+                    partial_results = journal_results_to_frame(journal.results(job_id))
+                    if not partial_results.empty:
+                        st.warning("Partial results are saved. Click Analyze again to resume from the failed page.")
+                        button_label, file_name, mime, export_data = download_results(
+                            partial_results, output_language, export_format
                         )
-                        
-                        # 다운로드 버튼 표시
                         st.download_button(
                             label=button_label,
-                            data=csv_data,
+                            data=export_data,
                             file_name=file_name,
-                            mime="text/csv",
-                            help="CSV 형식으로 분석 결과를 다운로드합니다."
+                            mime=mime,
+                            key="download_partial"
                         )
-                        
-                        # Preview result before download
-                        st.write("미리보기:")
-                        st.dataframe(combined_results)
-                
-                except Exception as e:
-                    st.error(f"An error occurred: {str(e)}")
-                else:
-                    st.success("Analysis completed successfully! 분석이 완료되었습니다!")
-        else:
-            st.warning("Please provide some text or a PDF file to analyze!")
+            else:
+                if journal is not None:
+                    journal.finish_job(job_id)
+                if stored["combined"] is not None:
+                    render_export(stored["combined"], output_language, export_format)
+                st.success("Analysis completed successfully! 분석이 완료되었습니다!")
+    elif stored:
+        # Rerun (widget change, download click, or Analyze on unchanged input): show the stored results
+        if stored["key"] != current_key:
+            st.info("Input or settings changed since the results below were produced. Click Analyze Text to update them.")
+        render_sections(stored["sections"])
+        if stored["combined"] is not None:
+            render_export(stored["combined"], stored["output_language"], export_format)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,169 @@
+import re
+from typing import Optional
+
+# 구분선 셀 (---, :---, ---:, :---:)
+_SEPARATOR_CELL = re.compile(r':?-+:?')
+# 이스케이프되지 않은 '|' (셀 안의 '\|'는 구분자가 아님)
+_CELL_DELIMITER = re.compile(r'(?<!\\)\|')
+
+# 이 개수까지 빠진 셀은 빈 칸으로 채워 복구 (더 많이 빠진 행은 버림)
+MAX_MISSING_CELLS = 1
+
+
+def is_separator(cells: list) -> bool:
+    """| --- | :---: | 형태의 헤더 구분선인지 확인"""
+    return all(_SEPARATOR_CELL.fullmatch(cell) for cell in cells)
+
+
+def repair_row(cells: list, expected_columns: int, merge_column: int = -1) -> Optional[list]:
+    """셀 개수를 expected_columns에 맞춤 (복구할 수 없으면 None)
+
+    셀이 많으면 내용에 '|'가 들어간 것으로 보고 넘친 셀을 merge_column 열에 합치고,
+    MAX_MISSING_CELLS개 이하로 모자라면 끝에 빈 칸을 채운다.
+    """
+    extra = len(cells) - expected_columns
+    if extra == 0:
+        return cells
+    if extra > 0:
+        index = merge_column % expected_columns
+        return cells[:index] + [' | '.join(cells[index:index + extra + 1])] + cells[index + extra + 1:]
+    if -extra <= MAX_MISSING_CELLS:
+        return cells + [''] * -extra
+    return None
+
+
+def _header_key(cells: list) -> list:
+    return [cell.strip('*_ ').lower() for cell in cells]
+
+
+class TableParser:
+    """응답 텍스트를 한 줄씩 한 번만 읽어 표 행을 추출하는 파서
+
+    헤더 다음 줄이 구분선이면 새 표가 시작되므로 응답 안의 여러 표를 모두 찾는다.
+    열 수가 expected_columns인 표의 행만 반환하고, 표 안에서 반복되는 헤더 행은 건너뛴다.
+    구분선 없이 출력된 표는 처음 나온 행을 헤더로 본다. 표 사이의 글(카테고리 제목, 설명) 다음에
+    열 수가 같은 행이 오면 같은 표가 이어지는 것으로 보고, 열 수가 다르면 구분선 없는 새 표로 본다.
+    값이 있는 셀이 하나 이하인 행(| **A. Core** | | | 같은 카테고리 표시)은 데이터가 아니므로 건너뛴다.
+
+    열 수가 어긋난 행은 repair_row로 복구해 repaired_rows에 세고, 복구할 수 없어 버린 행은
+    dropped_rows에 센다.
+    """
+
+    def __init__(self, expected_columns: int, merge_column: int = -1):
+        self.expected_columns = expected_columns
+        self.merge_column = merge_column
+        self.tables = 0
+        self.repaired_rows = 0
+        self.dropped_rows = 0
+        self._header: Optional[list] = None  # 현재 표의 헤더 (아직 표가 없으면 None)
+        self._after_text = False  # 마지막 표 행 이후에 표 밖의 글이 나왔는지
+        self._pending: Optional[list] = None  # 다음 줄이 구분선인지 볼 때까지 보류한 행
+
+    def _start_table(self, header: list) -> None:
+        self._header = _header_key(header)
+        if len(header) == self.expected_columns:
+            self.tables += 1
+
+    def _flush_pending(self, out: list) -> None:
+        cells, self._pending = self._pending, None
+        if cells is None:
+            return
+        header = self._header
+        after_text, self._after_text = self._after_text, False
+        if header is None or (after_text and len(cells) != len(header)):
+            self._start_table(cells)  # 구분선 없는 표: 처음 나온 행이 헤더
+            return
+        if len(header) != self.expected_columns:
+            return
+        # 대부분의 행은 앞 두 셀에 값이 있으므로 그때만 나머지 셀을 셈
+        if not (len(cells) > 1 and cells[0] and cells[1]) and sum(1 for cell in cells if cell) <= 1:
+            return
+        if len(cells) == self.expected_columns:
+            # 첫 셀이 다르면 헤더가 아니므로 대부분의 행은 전체 비교 없이 통과
+            if cells[0].strip('*_ ').lower() == header[0] and _header_key(cells) == header:
+                return  # 반복된 헤더
+            out.append(cells)
+            return
+        row = repair_row(cells, self.expected_columns, self.merge_column)
+        if row is None:
+            self.dropped_rows += 1
+        else:
+            self.repaired_rows += 1
+            out.append(row)
+
+    def _feed_line(self, line: str, out: list) -> None:
+        # 줄마다 호출되므로 셀 분리를 함수로 나누지 않고 여기서 바로 처리 (빈 셀도 자리를 유지)
+        if '|' not in line:
+            self._flush_pending(out)
+            if line and not line.isspace():
+                self._after_text = True  # 표 밖의 글 (다음 행이 어느 표에 속하는지는 열 수로 판단)
+            return
+        stripped = line.strip()
+        if stripped[0] == '|':
+            stripped = stripped[1:]
+        if stripped[-1:] == '|' and stripped[-2:] != '\\|':
+            stripped = stripped[:-1]
+        if '\\' in stripped:
+            cells = [cell.strip().replace('\\|', '|') for cell in _CELL_DELIMITER.split(stripped)]
+        else:
+            cells = [cell.strip() for cell in stripped.split('|')]
+        if '-' in line and is_separator(cells):
+            if self._pending is not None:
+                self._start_table(self._pending)
+                self._pending = None
+                self._after_text = False
+            return
+        if self._pending is not None:
+            self._flush_pending(out)
+        self._pending = cells
+
+    def feed_line(self, line: str) -> list:
+        """한 줄을 처리하고 확정된 데이터 행 목록 반환 (헤더 판별을 위해 한 줄씩 늦게 확정됨)"""
+        rows = []
+        self._feed_line(line, rows)
+        return rows
+
+    def close(self) -> list:
+        """입력 끝에서 보류 중인 마지막 행 처리"""
+        rows = []
+        self._flush_pending(rows)
+        return rows
+
+    def parse(self, text: str) -> list:
+        """전체 응답을 파싱해 데이터 행 목록 반환"""
+        rows = []
+        feed_line = self._feed_line
+        for line in text.split('\n'):
+            feed_line(line, rows)
+        self._flush_pending(rows)
+        return rows
+
+
+def parse_table(text: str, expected_columns: int) -> list:
+    """응답에서 expected_columns열 표의 데이터 행 목록 반환 (헤더 제외)"""
+    return TableParser(expected_columns).parse(text)
+
+
+class StreamingTableParser(TableParser):
+    """스트리밍 응답 조각에서 완성된 표 행을 도착하는 대로 추출 (TableParser와 같은 규칙)"""
+
+    def __init__(self, expected_columns: int, merge_column: int = -1):
+        super().__init__(expected_columns, merge_column)
+        self._buffer = ''
+
+    def feed(self, chunk: str) -> list:
+        """응답 조각을 추가하고 새로 완성된 행 목록 반환 (줄바꿈 전의 나머지는 보관)"""
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split('\n')
+        rows = []
+        for line in lines:
+            self._feed_line(line, rows)
+        return rows
+
+    def close(self) -> list:
+        """스트림 종료 시 남은 마지막 줄 처리"""
+        remaining, self._buffer = self._buffer, ''
+        rows = []
+        self._feed_line(remaining, rows)
+        self._flush_pending(rows)
+        return rows
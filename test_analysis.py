@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+import analysis
+from lexicon import Lexicon
+
+TEXT = "음악을 들으면서 공부해요."
+RESPONSE = """| Category | Korean Word | Part of Speech | English Meaning | Natural Example Sentence |
+|---|---|---|---|---|
+| Core | 음악 | 명사 | music | 음악을 들어요. |
+
+| Grammar Pattern | Usage in English | Natural Example Sentence |
+|---|---|---|
+| -면서 | while | 들으면서 공부해요. |
+"""
+
+def create_prompt(text, output_language, task_type, *args, **kwargs):
+    return task_type
+
+def test_async_analysis_keeps_lexicon_and_rules_off_the_event_loop(monkeypatch):
+    lexicon = Lexicon(':memory:')
+    threads = {}
+
+    def recorded(name, func):
+        def wrapper(*args, **kwargs):
+            threads.setdefault(name, set()).add(threading.get_ident())
+            return func(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(analysis, "get_lexicon", lambda: lexicon)
+    monkeypatch.setattr(lexicon, "add_rows", recorded("add_rows", lexicon.add_rows))
+    monkeypatch.setattr(analysis, "prefill_vocabulary", recorded("prefill_vocabulary", analysis.prefill_vocabulary))
+    monkeypatch.setattr(analysis, "prefill_grammar", recorded("prefill_grammar", analysis.prefill_grammar))
+
+    async def call_api_async(prompt):
+        threads["loop"] = {threading.get_ident()}
+        return RESPONSE
+
+    vocabulary, grammar = asyncio.run(
+        analysis.analyze_text_async(TEXT, "English", True, True, None, create_prompt, call_api_async)
+    )
+    assert vocabulary["Word"].tolist() == ["음악"]
+    assert "-면서" in grammar["Pattern"].tolist()
+    assert set(threads) == {"loop", "add_rows", "prefill_vocabulary", "prefill_grammar"}
+    for name in ("add_rows", "prefill_vocabulary", "prefill_grammar"):
+        assert threads["loop"].isdisjoint(threads[name])
+
+def test_sync_analysis_skips_api_when_lexicon_fills_every_row(monkeypatch):
+    rows = [["Core", f"단어{i}", "명사", "word", "예문"] for i in range(analysis.EXPECTED_VOCABULARY_ROWS)]
+    monkeypatch.setattr(analysis, "prefill_vocabulary", lambda *args: ([], rows))
+
+    def call_api(prompt):
+        raise AssertionError("API should not be called")
+
+    vocabulary = analysis.extract_vocabulary(TEXT, "English", None, create_prompt, call_api)
+    assert vocabulary.values.tolist() == rows
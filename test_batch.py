@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pandas as pd
+
+import batch
+
+def fake_analyze_pages(calls):
+    def analyze_pages(page_texts, output_language, include_vocabulary, include_grammar, **kwargs):
+        for page in page_texts:
+            calls.append(page["text"])
+            vocabulary = pd.DataFrame([["Core", "학교", "명사", "school", "학교에 가요."]],
+                                      columns=["Category", "Word", "Part of Speech", "Meaning", "Example"])
+            yield {"page": page["page"], "pages": page.get("pages", [page["page"]]),
+                   "vocabulary": vocabulary, "grammar": None}
+    return analyze_pages
+
+def test_iter_input_files_finds_supported_files(tmp_path, capsys):
+    (tmp_path / "docs" / "sub").mkdir(parents=True)
+    for name in ("docs/b.txt", "docs/sub/a.PDF", "docs/notes.md", "single.txt", "slides.pptx"):
+        (tmp_path / name).write_text("학교", encoding='utf-8')
+    inputs = [tmp_path / "docs", tmp_path / "single.txt", tmp_path / "slides.pptx"]
+    assert list(batch.iter_input_files(map(str, inputs))) == [
+        (tmp_path / "docs" / "b.txt", Path("b.txt")),
+        (tmp_path / "docs" / "sub" / "a.PDF", Path("sub/a.PDF")),
+        (tmp_path / "single.txt", Path("single.txt")),
+    ]
+    assert "slides.pptx" in capsys.readouterr().err
+
+def test_output_path_keeps_input_extension():
+    assert batch.output_path_for(Path("sub/a.pdf"), Path("out"), "jsonl") == Path("out/sub/a.pdf.jsonl")
+    assert batch.output_path_for(Path("a.txt"), Path("out"), "csv") == Path("out/a.txt.csv")
+
+def test_main_skips_existing_results_unless_overwrite(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(batch, "analyze_pages", fake_analyze_pages(calls))
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "a.txt").write_text("학교에 가요.", encoding='utf-8')
+    (tmp_path / "in" / "b.txt").write_text("학교가 커요.", encoding='utf-8')
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    (output_dir / "b.txt.csv").write_text("old", encoding='utf-8')
+    argv = [str(tmp_path / "in"), "-o", str(output_dir), "-f", "csv", "--no-journal"]
+
+    assert batch.main(argv) == 0
+    assert calls == ["학교에 가요."]
+    result = pd.read_csv(output_dir / "a.txt.csv", encoding='utf-8-sig')
+    assert result[["Word", "page", "occurrences", "type"]].values.tolist() == [["학교", 1, 1, "vocabulary"]]
+    assert (output_dir / "b.txt.csv").read_text(encoding='utf-8') == "old"
+    assert not list(output_dir.glob("*.tmp"))
+
+    assert batch.main(argv + ["--overwrite"]) == 0
+    assert sorted(calls) == ["학교가 커요.", "학교에 가요.", "학교에 가요."]
+    assert (output_dir / "b.txt.csv").read_text(encoding='utf-8-sig').startswith("Category,Word")
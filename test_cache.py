@@ -0,0 +1,28 @@
+from cache import ResponseCache, make_cache_key
+
+def test_make_cache_key_normalizes_whitespace():
+    assert make_cache_key("안녕  하세요\n", "gemini-pro", "v1") == make_cache_key("안녕 하세요", "gemini-pro", "v1")
+    assert make_cache_key("안녕", "gemini-pro", "v1") != make_cache_key("안녕", "gemini-pro", "v2")
+
+def test_response_cache_hit_and_miss():
+    cache = ResponseCache(":memory:")
+    assert cache.get("a") is None
+    cache.set("a", "응답")
+    assert cache.get("a") == "응답"
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(":memory:", max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+def test_response_cache_expires_old_entries():
+    cache = ResponseCache(":memory:", max_age=-1)
+    cache.set("a", "1")
+    assert cache.get("a") is None
@@ -0,0 +1,22 @@
+from chunker import chunk_text, merge_pages, split_sentences
+
+def test_split_sentences_on_korean_boundaries():
+    text = "오늘은 날씨가 좋습니다. 공원에 갈까요? 가격은 3.5달러예요!\n제목"
+    assert split_sentences(text) == ["오늘은 날씨가 좋습니다.", "공원에 갈까요?", "가격은 3.5달러예요!", "제목"]
+
+def test_chunk_text_respects_token_budget():
+    text = " ".join(["학교에 갑니다."] * 20)
+    chunks = chunk_text(text, max_tokens=20, count_tokens=len)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 20 for chunk in chunks)
+    assert "".join(chunks).replace(" ", "") == text.replace(" ", "")
+
+def test_chunk_text_splits_sentence_longer_than_budget():
+    chunks = chunk_text("가" * 50, max_tokens=20, count_tokens=len)
+    assert [len(chunk) for chunk in chunks] == [20, 20, 10]
+
+def test_merge_pages_packs_short_pages():
+    pages = [{"page": n, "text": "가" * 8} for n in range(1, 6)]
+    merged = list(merge_pages(pages, max_tokens=20, count_tokens=len))
+    assert [chunk["pages"] for chunk in merged] == [[1, 2], [3, 4], [5]]
+    assert merged[1]["page"] == 3
@@ -0,0 +1,26 @@
+from content_extractor import extract_main_content
+
+ARTICLE = "한국은행은 오늘 기준금리를 동결했다. " * 20
+HTML = f"""<html><head><title>금리 동결 - 뉴스</title><script>var tracking = 1;</script></head>
+<body>
+<nav class="gnb"><a href="/">홈</a><a href="/politics">정치</a></nav>
+<div class="container has-sidebar">
+  <div id="dic_area"><h1>금리 동결</h1><p>{ARTICLE}</p><div class="share-buttons">공유하기</div></div>
+  <aside><ul><li><a href="/1">많이 본 뉴스</a></li></ul></aside>
+</div>
+<div class="comment_area"><p>댓글입니다</p></div>
+<footer>Copyright</footer>
+</body></html>"""
+
+def test_extracts_article_body_and_heading():
+    content = extract_main_content(HTML)
+    assert content["title"] == "금리 동결"
+    assert content["text"].startswith("금리 동결\n한국은행은")
+    for boilerplate in ("tracking", "정치", "공유하기", "많이 본 뉴스", "댓글", "Copyright"):
+        assert boilerplate not in content["text"]
+
+def test_reports_character_reduction():
+    content = extract_main_content(HTML)
+    assert content["original_chars"] == len(HTML)
+    assert content["extracted_chars"] == len(content["text"])
+    assert 0 < content["reduction"] < 1
@@ -0,0 +1,49 @@
+import codecs
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from export import ResultWriter, categorical_columns, export_buffer
+
+FRAME = pd.DataFrame({
+    "Category": ["Core", "Core", "Core", "Topic"],
+    "Word": ["학교", "가다", "먹다", "경제"],
+    "page": ["1", "1", "2", "2"],
+})
+
+def test_csv_written_in_batches_has_single_header_and_bom():
+    buffer = io.BytesIO()
+    with ResultWriter(buffer, "csv") as writer:
+        writer.write(FRAME.iloc[:2])
+        writer.write(FRAME.iloc[2:])
+    data = buffer.getvalue()
+    assert data.startswith(codecs.BOM_UTF8)
+    assert data.decode('utf-8-sig').splitlines() == ["Category,Word,page", "Core,학교,1", "Core,가다,1",
+                                                     "Core,먹다,2", "Topic,경제,2"]
+
+def test_jsonl_skips_missing_cells():
+    frame = pd.concat([FRAME.iloc[:1], pd.DataFrame({"Pattern": ["-아요"], "page": ["3"]})], ignore_index=True)
+    lines = export_buffer(frame, "jsonl").getvalue().decode('utf-8').splitlines()
+    assert json.loads(lines[1]) == {"page": "3", "Pattern": "-아요"}
+
+def test_categorical_columns_pick_repetitive_strings():
+    assert categorical_columns(FRAME) == ["Category", "page"]
+
+def test_categorical_ratio_ignores_rows_from_the_other_table():
+    vocabulary = pd.DataFrame({"Category": ["Core"] * 6, "Word": [f"단어{i}" for i in range(6)]})
+    grammar = pd.DataFrame({"Pattern": ["-아요", "-고", "-지만"], "Usage": ["a", "b", "c"]})
+    frame = pd.concat([vocabulary.assign(type="vocabulary"), grammar.assign(type="grammar")], ignore_index=True)
+    assert categorical_columns(frame) == ["Category", "type"]
+
+def test_parquet_round_trip_of_combined_frame():
+    pq = pytest.importorskip("pyarrow.parquet")
+    vocabulary = FRAME.assign(occurrences=[2, 1, 1, 3], type="vocabulary")
+    grammar = pd.DataFrame({"Pattern": ["-아요"], "Usage": ["polite ending"], "page": ["2"], "type": ["grammar"]})
+    frame = pd.concat([vocabulary, grammar], ignore_index=True)
+    table = pq.read_table(export_buffer(frame, "parquet"))
+    assert str(table.schema.field("Category").type) == "dictionary<values=string, indices=int32, ordered=0>"
+    assert str(table.schema.field("occurrences").type) == "int64"
+    assert table.column("Pattern").to_pylist() == [None, None, None, None, "-아요"]
+    assert table.column("Word").to_pylist()[:2] == ["학교", "가다"]
@@ -0,0 +1,215 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+import gemini_client
+from cache import ResponseCache
+from rate_limiter import RateLimiter
+
+class FakeModel:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, str):
+            return SimpleNamespace(text=outcome, usage_metadata=None)
+        return outcome
+
+    async def generate_content_async(self, prompt):
+        return self.generate_content(prompt)
+
+class BlockedResponse:
+    usage_metadata = None
+
+    @property
+    def text(self):
+        raise ValueError("response was blocked")
+
+def use_fakes(monkeypatch, model):
+    sleeps = []
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=10 ** 9)
+    monkeypatch.setattr(gemini_client, "get_model", lambda model_name: model)
+    monkeypatch.setattr(gemini_client, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(gemini_client, "time",
+                        SimpleNamespace(time=time.time, perf_counter=time.perf_counter, sleep=sleeps.append))
+    monkeypatch.setattr(gemini_client, "token_usage", gemini_client.TokenUsageLog())
+    monkeypatch.setattr(gemini_client, "random", SimpleNamespace(uniform=lambda low, high: high))
+    return sleeps, limiter
+
+def test_only_transient_errors_are_retried():
+    assert gemini_client._is_transient(google_exceptions.ServiceUnavailable("busy"))
+    assert gemini_client._is_transient(google_exceptions.ResourceExhausted("quota"))
+    assert gemini_client._is_transient(ConnectionError())
+    assert not gemini_client._is_transient(google_exceptions.InvalidArgument("bad prompt"))
+    assert not gemini_client._is_transient(ValueError())
+
+def test_server_retry_delay_from_retry_info_or_header():
+    retry_info = SimpleNamespace(retry_delay=SimpleNamespace(seconds=2, nanos=500_000_000))
+    error = google_exceptions.ResourceExhausted("quota", details=[SimpleNamespace(), retry_info])
+    assert gemini_client._server_retry_delay(error) == 2.5
+    response = SimpleNamespace(headers={"Retry-After": "7"})
+    assert gemini_client._server_retry_delay(google_exceptions.TooManyRequests("slow", response=response)) == 7.0
+    response = SimpleNamespace(headers={"Retry-After": "Wed, 21 Oct 2026 07:28:00 GMT"})
+    assert gemini_client._server_retry_delay(google_exceptions.TooManyRequests("slow", response=response)) is None
+    assert gemini_client._server_retry_delay(google_exceptions.ServiceUnavailable("busy")) is None
+
+def test_retry_delay_prefers_server_hint_and_pauses_limiter_on_quota(monkeypatch):
+    _, limiter = use_fakes(monkeypatch, FakeModel())
+    assert gemini_client._retry_delay(google_exceptions.ServiceUnavailable("busy"), 2) == 4
+    assert gemini_client._retry_delay(google_exceptions.ServiceUnavailable("busy"), 10) == gemini_client.MAX_RETRY_DELAY
+    assert limiter.reserve() == 0.0
+
+    retry_info = SimpleNamespace(retry_delay=SimpleNamespace(seconds=20, nanos=0))
+    quota_error = google_exceptions.ResourceExhausted("quota", details=[retry_info])
+    assert gemini_client._retry_delay(quota_error, 1) == 20 + gemini_client.RETRY_DELAY
+    assert limiter.reserve() > 20
+
+def test_generate_content_retries_transient_errors(monkeypatch):
+    model = FakeModel(google_exceptions.ServiceUnavailable("busy"), google_exceptions.DeadlineExceeded("slow"), "결과")
+    sleeps, _ = use_fakes(monkeypatch, model)
+    assert gemini_client._generate_content("프롬프트", "model", "v1") == "결과"
+    assert model.calls == 3
+    assert sleeps == [2, 4]
+
+def test_generate_content_fails_fast_on_permanent_errors(monkeypatch):
+    model = FakeModel(google_exceptions.InvalidArgument("bad prompt"), "결과")
+    sleeps, _ = use_fakes(monkeypatch, model)
+    with pytest.raises(google_exceptions.InvalidArgument):
+        gemini_client._generate_content("프롬프트", "model", "v1")
+    assert model.calls == 1
+    assert sleeps == []
+
+def test_generate_content_gives_up_after_max_retries(monkeypatch):
+    model = FakeModel(*[google_exceptions.ServiceUnavailable("busy")] * gemini_client.MAX_RETRIES)
+    sleeps, _ = use_fakes(monkeypatch, model)
+    with pytest.raises(google_exceptions.ServiceUnavailable):
+        gemini_client._generate_content("프롬프트", "model", "v1")
+    assert model.calls == gemini_client.MAX_RETRIES
+    assert len(sleeps) == gemini_client.MAX_RETRIES - 1
+
+def test_empty_or_blocked_responses_are_retried_once(monkeypatch):
+    model = FakeModel("", "결과")
+    sleeps, _ = use_fakes(monkeypatch, model)
+    assert gemini_client._generate_content("프롬프트", "model", "v1") == "결과"
+    assert len(sleeps) == 1
+
+    model = FakeModel(BlockedResponse(), "", "결과")
+    use_fakes(monkeypatch, model)
+    with pytest.raises(gemini_client.EmptyResponseError):
+        gemini_client._generate_content("프롬프트", "model", "v1")
+    assert model.calls == 1 + gemini_client.EMPTY_RESPONSE_RETRIES
+
+def test_generate_content_settles_output_tokens_with_limiter(monkeypatch):
+    usage = SimpleNamespace(prompt_token_count=3, candidates_token_count=500)
+    model = FakeModel(SimpleNamespace(text="결과", usage_metadata=usage))
+    _, limiter = use_fakes(monkeypatch, model)
+    settled = []
+    monkeypatch.setattr(limiter, "settle", lambda reserved, actual: settled.append((reserved, actual)))
+    gemini_client._generate_content("프롬프트", "model", "v1")
+    assert settled == [(gemini_client.estimate_tokens("프롬프트"), 503)]
+
+class FakeGenerativeModel:
+    def __init__(self, model_name, generation_config=None):
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.warmups = 0
+
+    def count_tokens(self, text):
+        self.warmups += 1
+
+def use_fake_registry(monkeypatch):
+    monkeypatch.setattr(gemini_client, "genai", SimpleNamespace(GenerativeModel=FakeGenerativeModel))
+    monkeypatch.setattr(gemini_client, "_models", {})
+    monkeypatch.setattr(gemini_client, "_warmed_keys", set())
+
+def test_get_model_reuses_one_instance_per_model_and_config(monkeypatch):
+    use_fake_registry(monkeypatch)
+    model = gemini_client.get_model("model-a")
+    assert gemini_client.get_model("model-a") is model
+    assert gemini_client.get_model("model-a", {"temperature": 0.2, "top_p": 1}) is \
+        gemini_client.get_model("model-a", {"top_p": 1, "temperature": 0.2})
+    assert gemini_client.get_model("model-a", {"temperature": 0.2}) is not model
+    assert gemini_client.get_model("model-b") is not model
+
+def test_prewarm_opens_the_connection_only_once(monkeypatch):
+    use_fake_registry(monkeypatch)
+    model = gemini_client.prewarm("model-a")
+    assert gemini_client.prewarm("model-a") is model
+    assert model.warmups == 1
+    assert gemini_client.prewarm("model-b", open_connection=False).warmups == 0
+
+def test_generate_text_async_retries_and_caches(monkeypatch):
+    model = FakeModel(google_exceptions.ServiceUnavailable("busy"), "결과")
+    use_fakes(monkeypatch, model)
+    cache = ResponseCache(':memory:')
+    monkeypatch.setattr(gemini_client, "get_response_cache", lambda: cache)
+    sleeps = []
+    original_sleep = asyncio.sleep
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        await original_sleep(0)
+
+    monkeypatch.setattr(gemini_client.asyncio, "sleep", fake_sleep)
+    assert asyncio.run(gemini_client.generate_text_async("프롬프트", "v1")) == "결과"
+    assert model.calls == 2
+    assert sleeps == [2]
+    # 두 번째 호출은 캐시에서 응답
+    assert asyncio.run(gemini_client.generate_text_async("프롬프트", "v1")) == "결과"
+    assert model.calls == 2
+
+class FakeStream:
+    usage_metadata = None
+
+    def __init__(self, items):
+        self.items = items
+
+    def __iter__(self):
+        for item in self.items:
+            if isinstance(item, Exception):
+                raise item
+            yield SimpleNamespace(text=item, parts=[item])
+
+class FakeStreamModel(FakeModel):
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        return FakeStream(self.outcomes.pop(0))
+
+def test_stream_retries_only_before_the_first_chunk(monkeypatch):
+    model = FakeStreamModel([google_exceptions.ServiceUnavailable("busy")], ["| a ", "| b |"])
+    sleeps, _ = use_fakes(monkeypatch, model)
+    assert list(gemini_client.stream_text("프롬프트", "v1", use_cache=False)) == ["| a ", "| b |"]
+    assert model.calls == 2
+    assert sleeps == [2]
+
+    model = FakeStreamModel(["| a ", google_exceptions.ServiceUnavailable("busy")], ["| a | b |"])
+    use_fakes(monkeypatch, model)
+    chunks = []
+    with pytest.raises(google_exceptions.ServiceUnavailable):
+        for chunk in gemini_client.stream_text("프롬프트", "v1", use_cache=False):
+            chunks.append(chunk)
+    # 이미 내보낸 조각이 있으면 중복 출력을 막기 위해 다시 요청하지 않음
+    assert chunks == ["| a "]
+    assert model.calls == 1
+
+def test_token_usage_summary_totals_per_prompt_version():
+    log = gemini_client.TokenUsageLog(max_records=2)
+    log.record("html-v2", "model", 1000, 400)
+    log.record("compact-v2", "model", 300, 380)
+    log.record("compact-v2", "model", 500, 420)
+    summary = log.summary()
+    assert summary["html-v2"] == {"calls": 1, "input_tokens": 1000, "output_tokens": 400,
+                                  "avg_input_tokens": 1000.0, "avg_output_tokens": 400.0}
+    assert summary["compact-v2"]["calls"] == 2
+    assert summary["compact-v2"]["avg_input_tokens"] == 400.0
+    assert summary["compact-v2"]["avg_output_tokens"] == 400.0
+    # 최근 기록은 max_records개만 보관하지만 합계는 모든 호출 기준
+    assert [record["prompt_version"] for record in log.records()] == ["compact-v2", "compact-v2"]
@@ -0,0 +1,23 @@
+from grammar_rules import detect_patterns, prefill_grammar
+
+def test_detect_patterns_counts_positions_and_examples():
+    text = "비가 와서 집에 있었어요. 친구를 만나고 싶어서 전화했어요. 하지만 학교에서 공부해서 바빴어요."
+    results = {result["pattern"]: result for result in detect_patterns(text)}
+    assert results["-아/어서"]["count"] == 3
+    assert results["-아/어서"]["positions"][0] == text.index("와서")
+    assert results["-아/어서"]["example"] == "비가 와서 집에 있었어요."
+    assert results["-고 싶다"]["count"] == 1
+    # 접속사 '하지만'과 조사 '에서'는 패턴으로 세지 않음
+    assert "-지만" not in results
+
+def test_prefill_grammar_leaves_ambiguous_patterns_to_the_model():
+    text = "시간이 있으면 가요. 화면이 커요. 음악을 들으면서 공부해요."
+    rows = prefill_grammar(text, "English")
+    # '-(으)면'은 명사(화면)와 겹칠 수 있어 한 번만 나오면 확정하지 않음
+    assert rows == [["-(으)면서", "Two actions or states happening at the same time (\"while\"); both clauses share "
+                     "the subject.", "음악을 들으면서 공부해요."]]
+
+def test_fixed_adverbs_are_not_counted_as_patterns():
+    text = "따라서 우리는 떠났다. 따라서 그렇다. 따라서 좋다. 어서 오세요. 이어서 말했다. 나아가서 보자. 왜냐하면 비가 왔다."
+    assert detect_patterns(text) == []
+    assert prefill_grammar(text, "English") == []
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+import http_fetcher
+from cache import ResponseCache
+from http_fetcher import HttpFetcher
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None, chunks=(b"",), encoding=None):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.encoding = encoding
+        self.chunks = list(chunks)
+        self.read_chunks = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise http_fetcher.requests.HTTPError(f"{self.status_code} Error")
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            self.read_chunks += 1
+            yield chunk
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.requests.append((url, dict(headers or {})))
+        return self.responses.pop(0)
+
+def make_fetcher(*responses, **kwargs):
+    fetcher = HttpFetcher(ResponseCache(':memory:', max_age=None), **kwargs)
+    fetcher.session = FakeSession(*responses)
+    return fetcher
+
+def test_not_modified_response_is_served_from_cache():
+    first = FakeResponse(headers={"ETag": '"v1"', "Last-Modified": "Mon, 12 Oct 2026 00:00:00 GMT"},
+                         chunks=["학교".encode('utf-8'), "에 가요".encode('utf-8')])
+    fetcher = make_fetcher(first, FakeResponse(status_code=304))
+    assert fetcher.fetch("https://example.com/a") == "학교에 가요"
+    assert fetcher.fetch("https://example.com/a") == "학교에 가요"
+    assert fetcher.session.requests == [
+        ("https://example.com/a", {}),
+        ("https://example.com/a", {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 12 Oct 2026 00:00:00 GMT"}),
+    ]
+
+def test_responses_without_validators_are_not_cached():
+    fetcher = make_fetcher(FakeResponse(chunks=[b"one"]), FakeResponse(chunks=[b"two"]))
+    assert fetcher.fetch("https://example.com/a") == "one"
+    assert fetcher.fetch("https://example.com/a") == "two"
+    assert fetcher.session.requests[1] == ("https://example.com/a", {})
+
+def test_declared_content_length_over_limit_is_rejected_before_reading():
+    response = FakeResponse(headers={"Content-Length": "100"}, chunks=[b"x" * 100])
+    with pytest.raises(ValueError, match="100 bytes > 10"):
+        make_fetcher(response, max_bytes=10).fetch("https://example.com/big")
+    assert response.read_chunks == 0
+
+def test_streamed_body_over_limit_is_rejected():
+    response = FakeResponse(chunks=[b"x" * 6, b"x" * 6, b"x" * 6])
+    with pytest.raises(ValueError, match="> 10 bytes"):
+        make_fetcher(response, max_bytes=10).fetch("https://example.com/big")
+    assert response.read_chunks == 2
+
+def test_slow_body_exceeding_total_timeout_is_rejected(monkeypatch):
+    times = iter([0.0, 1.0, 6.0])
+    monkeypatch.setattr(http_fetcher, "time", SimpleNamespace(monotonic=lambda: next(times)))
+    response = FakeResponse(chunks=[b"a", b"b", b"c"])
+    with pytest.raises(ValueError, match="시간 초과"):
+        make_fetcher(response, total_timeout=5).fetch("https://example.com/slow")
+    assert response.read_chunks == 2
+
+def test_http_errors_are_raised_and_not_cached():
+    fetcher = make_fetcher(FakeResponse(status_code=404, headers={"ETag": '"x"'}))
+    with pytest.raises(http_fetcher.requests.HTTPError):
+        fetcher.fetch("https://example.com/missing")
+    assert fetcher.cache.get("https://example.com/missing") is None
+
+def test_body_decoded_with_meta_charset():
+    body = '<meta charset="euc-kr"><p>한국어</p>'.encode('euc-kr')
+    fetcher = make_fetcher(FakeResponse(headers={"Content-Type": "text/html"}, chunks=[body]))
+    assert "한국어" in fetcher.fetch("https://example.com/euc-kr")
@@ -0,0 +1,24 @@
+import pandas as pd
+
+from job_journal import JobJournal, make_job_id
+
+def test_job_id_depends_on_document_and_settings():
+    job_id = make_job_id(b"pdf", output_language="English")
+    assert job_id == make_job_id(b"pdf", output_language="English")
+    assert job_id != make_job_id(b"pdf", output_language="한국어")
+    assert job_id != make_job_id(b"other", output_language="English")
+
+def test_completed_units_round_trip():
+    journal = JobJournal(':memory:')
+    journal.start_job("job", "lecture.pdf")
+    vocabulary = pd.DataFrame([["Core", "학교", "명사", "school", "학교에 가요."]],
+                              columns=["Category", "Word", "Part of Speech", "Meaning", "Example"])
+    journal.record_unit("job", 0, {"page": 1, "pages": [1, 2], "vocabulary": vocabulary, "grammar": None})
+    journal.record_failure("job", 1, [3], RuntimeError("quota"))
+
+    units = journal.completed_units("job")
+    assert list(units) == [0]
+    assert units[0]["pages"] == [1, 2]
+    assert units[0]["grammar"] is None
+    pd.testing.assert_frame_equal(units[0]["vocabulary"], vocabulary)
+    assert journal.progress("job") == {"done": 1, "failed": 1}
@@ -0,0 +1,19 @@
+from keyword_candidates import ReferenceCorpus, rank_candidates, strip_suffixes, tokenize
+
+def test_strip_suffixes_removes_particles_and_endings():
+    assert strip_suffixes("학생들에게") == "학생"
+    assert strip_suffixes("공부했습니다") == "공부"
+    # 한 음절만 남는 경우는 떼지 않음
+    assert strip_suffixes("회의") == "회의"
+    assert tokenize("한국의 경제는, 2024년") == ["한국", "경제", "년"]
+
+def test_rank_candidates_uses_reference_corpus():
+    text = "경제 성장은 수출 덕분입니다. 경제가 좋아지면 수출도 늘어납니다. 경제 정책"
+    assert rank_candidates(text, corpus=ReferenceCorpus())[:2] == ["경제", "수출"]
+
+    corpus = ReferenceCorpus()
+    corpus.add_document("경제 뉴스")
+    corpus.add_document("오늘의 경제")
+    ranked = rank_candidates(text, corpus=corpus, exclude=["성장"])
+    assert ranked[0] == "수출"
+    assert "성장" not in ranked
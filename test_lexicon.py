@@ -0,0 +1,20 @@
+from lexicon import Lexicon, lookup_key
+
+def test_lookup_key_matches_candidate_stems():
+    assert lookup_key("공부하다") == "공부"
+    assert lookup_key(" 사람 (person) ") == "사람"
+
+def test_lexicon_serves_stored_rows_per_language():
+    lexicon = Lexicon(':memory:')
+    rows = [
+        ["Core", "공부하다", "동사", "to study", "매일 공부해요."],
+        ["Core", "사람", "명사", "person", "사람이 많아요."],
+        ["Core", "없는 의미", "명사", "", ""],
+    ]
+    assert lexicon.add_rows(rows, "English") == 2
+    lexicon.add_rows(rows[1:2], "English")
+    assert len(lexicon) == 2
+
+    assert lexicon.lookup(["사람", "학교", "공부"], "English") == [rows[1], rows[0]]
+    assert lexicon.lookup(["사람"], "Tiếng Việt") == []
+    assert lexicon.lookup(["사람", "공부"], "English", min_occurrences=2) == [rows[1]]
@@ -0,0 +1,42 @@
+import socket
+
+import metrics
+from metrics import Histogram, MetricsRegistry
+
+def test_histogram_percentiles():
+    histogram = Histogram('latency_seconds', 'test', ('outcome',))
+    for value in range(1, 101):
+        histogram.observe(value / 100, outcome='success')
+
+    assert histogram.percentile(50, outcome='success') == 0.5
+    assert histogram.percentile(99, outcome='success') == 0.99
+    assert histogram.percentile(50, outcome='error') is None
+
+def test_render_prometheus():
+    registry = MetricsRegistry()
+    counter = registry.counter('lookups_total', 'Cache lookups.', ('result',))
+    histogram = registry.histogram('call_seconds', 'Call latency.', buckets=(1, 5))
+    counter.inc(result='hit')
+    counter.inc(2, result='miss')
+    histogram.observe(3)
+
+    text = registry.render_prometheus()
+    assert 'lookups_total{result="hit"} 1.0' in text
+    assert 'lookups_total{result="miss"} 2.0' in text
+    assert 'call_seconds_bucket{le="1.0"} 0' in text
+    assert 'call_seconds_bucket{le="5.0"} 1' in text
+    assert 'call_seconds_bucket{le="+Inf"} 1' in text
+    assert 'call_seconds_count 1' in text
+
+def test_metrics_server_binds_to_localhost_by_default(monkeypatch):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    monkeypatch.setattr(metrics, "_server", None)
+    server = metrics.start_metrics_server(port)
+    try:
+        assert server.server_address == ("127.0.0.1", port)
+        assert metrics.start_metrics_server(port) is server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+
+import rate_limiter
+from rate_limiter import RateLimiter, TokenBucket, estimate_tokens
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def async_sleep(self, seconds):
+        self.sleep(seconds)
+
+def use_fake_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    monkeypatch.setattr(rate_limiter, "asyncio", SimpleNamespace(sleep=clock.async_sleep))
+    return clock
+
+def test_estimate_tokens_counts_hangul_per_character():
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("학교 ab") == 3
+
+def test_token_bucket_reserves_ahead_and_refills():
+    bucket = TokenBucket(capacity=2, refill_per_second=1)
+    assert bucket.reserve(1, now=bucket._updated_at) == 0.0
+    assert bucket.reserve(1, now=bucket._updated_at) == 0.0
+    # 예약은 먼저 차감하므로 대기 시간이 뒤 호출자에게 누적됨
+    assert bucket.reserve(1, now=bucket._updated_at) == 1.0
+    assert bucket.reserve(1, now=bucket._updated_at + 0.5) == 1.5
+
+def test_token_bucket_caps_oversized_requests_at_capacity():
+    bucket = TokenBucket(capacity=10, refill_per_second=1)
+    assert bucket.reserve(50, now=bucket._updated_at) == 0.0
+    assert bucket.reserve(1, now=bucket._updated_at) == 1.0
+
+def test_rate_limiter_waits_for_the_slower_bucket(monkeypatch):
+    clock = use_fake_clock(monkeypatch)
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=600)
+    assert limiter.reserve(300) == 0.0
+    assert limiter.reserve(400) == 10.0  # 토큰 100개 부족, 초당 10개
+    assert limiter.reserve() == 30.0  # 요청 버킷 (30초에 1건)
+    clock.now = 60.0
+    assert limiter.reserve() == 0.0
+
+def test_pause_blocks_every_caller_until_deadline(monkeypatch):
+    clock = use_fake_clock(monkeypatch)
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+    limiter.pause(5)
+    limiter.pause(2)  # 더 짧은 대기로 앞당겨지지 않음
+    assert limiter.reserve() == 5.0
+    clock.now = 3.0
+    assert limiter.reserve() == 2.0
+    clock.now = 5.0
+    assert limiter.reserve() == 0.0
+
+def test_acquire_and_acquire_async_sleep_for_reserved_delay(monkeypatch):
+    clock = use_fake_clock(monkeypatch)
+    limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=60000)
+    limiter.acquire()
+    limiter.acquire()
+    asyncio.run(limiter.acquire_async())
+    assert clock.sleeps == [60.0, 60.0]
+
+def test_settle_debits_output_tokens_and_refunds_overestimates(monkeypatch):
+    use_fake_clock(monkeypatch)
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=600)
+    assert limiter.reserve(100) == 0.0
+    limiter.settle(100, 700)  # 출력 토큰까지 600개가 더 쓰여 버킷이 100개 모자람
+    assert limiter.reserve(0) == 10.0
+    limiter.settle(300, 0)  # 추정치보다 적게 쓴 만큼 반환 (용량을 넘지 않음)
+    assert limiter.reserve(0) == 0.0
@@ -0,0 +1,62 @@
+from table_parser import StreamingTableParser, TableParser, parse_table
+
+RESPONSE = """### Core
+| Category | Korean Word | Part of Speech | Meaning | Example |
+|---|---|---|---|---|
+| Core | 학교 | 명사 | school | 학교에 가요. |
+| Core | 가다 | 동사 | go |  |
+| Core | 또는 | 부사 | or | A | B 중에 하나 |
+| Core | 짧은 |
+### Topic
+| Category | Korean Word | Part of Speech | Meaning | Example |
+| :--- | --- | --- | --- | ---: |
+| Topic | 경제 | 명사 | economy | 경제가 좋아요. |
+| **Category** | Korean Word | Part of Speech | Meaning | Example |
+| Topic | 정치 | 명사 | politics
+### Grammar
+| Grammar Pattern | Usage | Example |
+|---|---|---|
+| -아/어요 | polite ending | 가요 |
+"""
+
+def test_parses_every_table_and_repairs_ragged_rows():
+    parser = TableParser(5)
+    rows = parser.parse(RESPONSE)
+    assert [row[1] for row in rows] == ["학교", "가다", "또는", "경제", "정치"]
+    assert rows[1][4] == ""
+    assert rows[2][4] == "A | B 중에 하나"
+    assert rows[4] == ["Topic", "정치", "명사", "politics", ""]
+    assert (parser.tables, parser.repaired_rows, parser.dropped_rows) == (2, 2, 1)
+
+def test_selects_tables_by_column_count():
+    assert parse_table(RESPONSE, 3) == [["-아/어요", "polite ending", "가요"]]
+
+def test_table_without_separator_uses_first_row_as_header():
+    assert parse_table("| a | b | c |\n| 1 | 2 | 3 |\n| 4 | 5 | 6 |", 3) == [["1", "2", "3"], ["4", "5", "6"]]
+
+def test_escaped_pipe_stays_in_cell():
+    assert parse_table("| a | b |\n|---|---|\n| x \\| y | z |", 2) == [["x | y", "z"]]
+
+def test_streaming_matches_full_parse():
+    parser = StreamingTableParser(5)
+    rows = []
+    for start in range(0, len(RESPONSE), 7):
+        rows += parser.feed(RESPONSE[start:start + 7])
+    rows += parser.close()
+    assert rows == parse_table(RESPONSE, 5)
+
+def test_category_heading_inside_table_keeps_header():
+    text = ("| Category | Korean Word | Part of Speech | Meaning | Example |\n|---|---|---|---|---|\n"
+            "| Core | 학교 | 명사 | school | 학교에 가요. |\n**B. Topic**\n| Topic | 경제 | 명사 | economy | 경제가 좋아요. |\n"
+            "Grammar:\n| -아/어요 | polite ending | 가요 |\n| -고 | and | 먹고 |")
+    parser = TableParser(5)
+    assert [row[1] for row in parser.parse(text)] == ["학교", "경제"]
+    assert (parser.tables, parser.dropped_rows) == (1, 0)
+    assert parse_table(text, 3) == [["-고", "and", "먹고"]]
+
+def test_category_marker_rows_are_skipped():
+    text = ("| Category | Korean Word | Part of Speech | Meaning | Example |\n|---|---|---|---|---|\n"
+            "| **A. Core** | | | | |\n| Core | 학교 | 명사 | school | 학교에 가요. |")
+    parser = TableParser(5)
+    assert parser.parse(text) == [["Core", "학교", "명사", "school", "학교에 가요."]]
+    assert (parser.repaired_rows, parser.dropped_rows) == (0, 0)
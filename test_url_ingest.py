@@ -0,0 +1,86 @@
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+
+import url_ingest
+from url_ingest import HostThrottle, analyze_urls, output_name_for, read_url_list, result_frame
+
+def test_read_url_list_skips_comments_and_duplicates():
+    lines = ["# 뉴스", "https://a.example/1", "", "  https://b.example/2 ", "https://a.example/1", "#https://c.example"]
+    assert read_url_list(lines) == ["https://a.example/1", "https://b.example/2"]
+
+def test_host_throttle_spaces_requests_to_the_same_host(monkeypatch):
+    sleeps = []
+    original_sleep = asyncio.sleep
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        await original_sleep(0)
+
+    # 시계를 멈춰 두면 예약된 시작 시각이 그대로 대기 시간이 됨
+    monkeypatch.setattr(url_ingest, "time", SimpleNamespace(monotonic=lambda: 100.0))
+    monkeypatch.setattr(url_ingest.asyncio, "sleep", fake_sleep)
+    throttle = HostThrottle(per_host=3, delay=1.5)
+
+    async def request(host):
+        async with throttle.slot(host):
+            pass
+
+    async def main():
+        await asyncio.gather(*(request(host) for host in ["a", "a", "b", "a"]))
+
+    asyncio.run(main())
+    assert sorted(sleeps) == [1.5, 3.0]
+
+def test_host_throttle_limits_concurrency_per_host():
+    throttle = HostThrottle(per_host=2, delay=0)
+    active = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+
+    async def request(host):
+        async with throttle.slot(host):
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+            await asyncio.sleep(0.01)
+            active[host] -= 1
+
+    async def main():
+        await asyncio.gather(*(request(host) for host in ["a"] * 5 + ["b"] * 3))
+
+    asyncio.run(main())
+    assert peak == {"a": 2, "b": 2}
+
+def test_output_name_for_distinguishes_similar_urls():
+    first = output_name_for("https://news.example.com/articles/1?page=1")
+    second = output_name_for("https://news.example.com/articles/1?page=2")
+    assert first.startswith("news.example.com_articles_1-")
+    assert first != second
+    assert len(output_name_for("https://example.com/" + "가" * 200)) == 80 + 9
+
+def test_analyze_urls_reports_errors_per_url(monkeypatch):
+    def fetch_article(url):
+        if "missing" in url:
+            raise ValueError("404 Not Found")
+        text = "" if "empty" in url else f"{url} 본문"
+        return {"url": url, "text": text}
+
+    async def analyze_long_text_async(text, output_language, include_vocabulary, include_grammar):
+        if "broken" in text:
+            raise RuntimeError("quota")
+        return pd.DataFrame({"Word": ["학교"]}), None
+
+    monkeypatch.setattr(url_ingest, "fetch_article", fetch_article)
+    monkeypatch.setattr(url_ingest, "analyze_long_text_async", analyze_long_text_async)
+    urls = ["https://a.example/ok", "https://a.example/missing", "https://b.example/empty", "https://b.example/broken"]
+
+    async def collect():
+        return [result async for result in analyze_urls(urls, "English", host_delay=0)]
+
+    results = {result["url"]: result for result in asyncio.run(collect())}
+    assert results["https://a.example/missing"]["error"] == "404 Not Found"
+    assert results["https://b.example/empty"]["error"] == "본문을 찾지 못했습니다"
+    assert results["https://b.example/broken"]["error"] == "quota"
+    assert "error" not in results["https://a.example/ok"]
+    frame = result_frame(results["https://a.example/ok"])
+    assert frame.values.tolist() == [["학교", "vocabulary", "https://a.example/ok"]]
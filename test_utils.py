@@ -1,9 +1,17 @@
 import pytest
+import http_fetcher
 from utils import fetch_url_content
 
-def test_fetch_url_content_valid_url():
+def use_temporary_http_cache(tmp_path, monkeypatch):
+    # 공용 fetcher의 HTTP 캐시를 작업 디렉터리 대신 임시 디렉터리에 만듦
+    monkeypatch.setattr(http_fetcher, "HTTP_CACHE_PATH", str(tmp_path / "http_responses.sqlite3"))
+    monkeypatch.setattr(http_fetcher, "_default_fetcher", None)
+
+def test_fetch_url_content_valid_url(tmp_path, monkeypatch):
+    use_temporary_http_cache(tmp_path, monkeypatch)
     assert fetch_url_content("https://example.com") is not None
 
-def test_fetch_url_content_invalid_url():
+def test_fetch_url_content_invalid_url(tmp_path, monkeypatch):
+    use_temporary_http_cache(tmp_path, monkeypatch)
     with pytest.raises(ValueError):
         fetch_url_content("invalid-url")
@@ -0,0 +1,163 @@
+import os
+import re
+import threading
+import time
+
+import utils2
+from cache import ResponseCache
+from lexicon import Lexicon
+
+TEXT = "음악을 들으면서 공부해요."
+LANGUAGES = ["English", "Tiếng Việt"]
+RESPONSE = """| Category | Korean Word | Part of Speech | English Meaning | Tiếng Việt Meaning | Natural Example Sentence |
+|---|---|---|---|---|---|
+| Core | 음악 | 명사 | music | âm nhạc | 음악을 들어요. |
+| Core | 공부하다 | 동사 | to study | học | 매일 공부해요. |
+
+| Grammar Pattern | Usage in English | Usage in Tiếng Việt | Natural Example Sentence |
+|---|---|---|---|
+| -아/어요 | polite ending | đuôi câu lịch sự | 공부해요. |
+"""
+
+def use_memory_stores(monkeypatch):
+    cache = ResponseCache(':memory:')
+    lexicon = Lexicon(':memory:')
+    monkeypatch.setattr(utils2, "get_response_cache", lambda: cache)
+    monkeypatch.setattr(utils2, "get_lexicon", lambda: lexicon)
+    return lexicon
+
+def fake_api(monkeypatch, response):
+    prompts = []
+
+    def call_gemini_api(prompt):
+        prompts.append(prompt)
+        return response
+
+    monkeypatch.setattr(utils2, "call_gemini_api", call_gemini_api)
+    return prompts
+
+def test_multilingual_results_slice_language_columns(monkeypatch):
+    lexicon = use_memory_stores(monkeypatch)
+    known_grammar = {language: [["-(으)면서", f"while ({language})", TEXT]] for language in LANGUAGES}
+    results = utils2._multilingual_results(RESPONSE, LANGUAGES, True, known_grammar, True)
+
+    vocabulary, grammar = results["Tiếng Việt"]
+    assert list(vocabulary.columns) == utils2.VOCABULARY_COLUMN_NAMES["Tiếng Việt"]
+    assert vocabulary.values.tolist() == [["Core", "음악", "명사", "âm nhạc", "음악을 들어요."],
+                                          ["Core", "공부하다", "동사", "học", "매일 공부해요."]]
+    # 로컬 규칙으로 채운 행이 먼저 오고 응답 행은 해당 언어의 용법 열만 가짐
+    assert grammar.values.tolist() == [["-(으)면서", "while (Tiếng Việt)", TEXT],
+                                       ["-아/어요", "đuôi câu lịch sự", "공부해요."]]
+    assert results["English"][0]["Meaning"].tolist() == ["music", "to study"]
+    assert lexicon.lookup(["음악"], "English") == [["Core", "음악", "명사", "music", "음악을 들어요."]]
+
+def test_multilingual_analysis_uses_one_call_and_caches_each_language(monkeypatch):
+    use_memory_stores(monkeypatch)
+    prompts = fake_api(monkeypatch, RESPONSE)
+    results = utils2.analyze_text_multilingual(TEXT, LANGUAGES)
+    assert len(prompts) == 1
+    assert results["English"][1]["Pattern"].tolist() == ["-(으)면서", "-아/어요"]
+
+    # 언어별 결과가 JSON으로 저장되어 다시 요청하지 않음
+    for language in LANGUAGES:
+        vocabulary, grammar = utils2._cached_result(TEXT, language, True, True, None)
+        assert vocabulary.equals(results[language][0])
+        assert grammar.equals(results[language][1])
+    assert utils2.analyze_text_multilingual(TEXT, LANGUAGES)["English"][0].equals(results["English"][0])
+    assert len(prompts) == 1
+
+def test_single_missing_language_goes_through_analyze_text(monkeypatch):
+    use_memory_stores(monkeypatch)
+    english = utils2._multilingual_results(RESPONSE, LANGUAGES, True, None, False)["English"]
+    utils2._store_result(TEXT, "English", True, False, None, english)
+    calls = []
+    monkeypatch.setattr(utils2, "analyze_text", lambda *args: calls.append(args) or ("vocabulary", None))
+
+    results = utils2.analyze_text_multilingual(TEXT, LANGUAGES, include_grammar=False)
+    assert calls == [(TEXT, "Tiếng Việt", True, False, None)]
+    assert results["Tiếng Việt"] == ("vocabulary", None)
+    assert results["English"][0].equals(english[0])
+
+def test_empty_table_is_not_cached(monkeypatch):
+    use_memory_stores(monkeypatch)
+    prompts = fake_api(monkeypatch, "Sorry, I cannot analyze this text.")
+    results = utils2.analyze_text_multilingual(TEXT, LANGUAGES, include_grammar=False)
+    assert results["English"][0].empty
+    assert utils2._cached_result(TEXT, "English", True, False, None) is None
+    utils2.analyze_text_multilingual(TEXT, LANGUAGES, include_grammar=False)
+    assert len(prompts) == 2
+
+def page_inputs(count, pulled=None):
+    for number in range(1, count + 1):
+        if pulled is not None:
+            pulled.append(number)
+        yield {"page": number, "text": f"page {number}"}
+
+def test_analyze_pages_yields_in_page_order_when_later_pages_finish_first():
+    second_done = threading.Event()
+
+    def analyze(text, *args):
+        if text == "page 1":
+            assert second_done.wait(5)
+        else:
+            second_done.set()
+        return text, None
+
+    results = list(utils2.analyze_pages(page_inputs(4), "English", max_workers=2, analyze=analyze))
+    assert [result["page"] for result in results] == [1, 2, 3, 4]
+    assert [result["vocabulary"] for result in results] == ["page 1", "page 2", "page 3", "page 4"]
+
+def test_analyze_pages_bounds_in_flight_pages_and_reads_input_lazily():
+    lock = threading.Lock()
+    running = []
+    peak = []
+    pulled = []
+
+    def analyze(text, *args):
+        with lock:
+            running.append(text)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(text)
+        return None, None
+
+    results = utils2.analyze_pages(page_inputs(10, pulled), "English", max_workers=3, analyze=analyze)
+    assert next(results)["page"] == 1
+    # 첫 결과를 내보낼 때까지 읽은 페이지는 동시 분석 상한을 넘지 않음
+    assert len(pulled) <= 3
+    assert [result["page"] for result in results] == list(range(2, 11))
+    assert max(peak) <= 3
+
+PDF_PATH = os.path.join(os.path.dirname(__file__), "202192037_바오_기말.pdf")
+
+def test_iter_pdf_pages_honours_inclusive_page_range():
+    assert [page["page"] for page in utils2.iter_pdf_pages(PDF_PATH, 3, 5)] == [3, 4, 5]
+    assert [page["page"] for page in utils2.iter_pdf_pages(PDF_PATH, first_page=12)] == [12, 13]
+    assert [page["page"] for page in utils2.iter_pdf_pages(PDF_PATH, last_page=2)] == [1, 2]
+
+def test_parallel_extraction_falls_back_to_serial_for_short_ranges(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("process pool should not be used")
+
+    monkeypatch.setattr(utils2, "ProcessPoolExecutor", no_pool)
+    with open(PDF_PATH, "rb") as pdf_file:
+        pages = utils2.extract_text_from_pdf_parallel(pdf_file, 2, 4, processes=4)
+    assert pages == utils2.extract_text_from_pdf(PDF_PATH, 2, 4)
+
+def test_parallel_extraction_matches_serial_extraction():
+    serial = utils2.extract_text_from_pdf(PDF_PATH, 2, 12)
+    assert utils2.extract_text_from_pdf_parallel(PDF_PATH, 2, 12, processes=2, min_pages=1) == serial
+    with open(PDF_PATH, "rb") as pdf_file:
+        assert utils2.extract_text_from_pdf_parallel(pdf_file, 2, 12, processes=2, min_pages=1) == serial
+
+def table_headers(prompt):
+    return re.findall(r"\| (?:Category|Grammar Pattern) \|[^\n<]*\|", prompt)
+
+def test_compact_prompt_asks_for_the_same_table_columns_as_html(monkeypatch):
+    monkeypatch.setattr(utils2, "PROMPT_STYLE", "html")
+    for task_type in ("vocabulary", "grammar", "all"):
+        compact = utils2.create_compact_prompt(TEXT, "English", task_type, candidate_words=[])
+        html = utils2.create_structured_prompt(TEXT, "English", task_type, candidate_words=[])
+        assert table_headers(compact) and set(table_headers(compact)) == set(table_headers(html))
+        assert "<" not in compact and len(compact) < len(html)
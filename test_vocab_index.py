@@ -0,0 +1,46 @@
+import pandas as pd
+
+from vocab_index import VocabularyIndex, deduplicate_vocabulary, normalize_word
+
+COLUMNS = ["Category", "Word", "Part of Speech", "Meaning", "Example"]
+
+def test_normalize_word_ignores_notes_punctuation_and_spacing():
+    assert normalize_word(" 학교 (school) ") == "학교"
+    assert normalize_word("공부하다[동사]!") == "공부하다"
+    assert normalize_word("-기  때문에") == "-기 때문에"
+    # 자모가 분리된(NFD) 입력도 같은 단어로 봄
+    assert normalize_word("\u1112\u1161\u11a8\u1100\u116d") == "학교"
+
+def test_add_returns_only_new_words_and_counts_occurrences():
+    index = VocabularyIndex()
+    assert index.add(["학교", "가다"], page=1, position=0) == ["학교", "가다"]
+    assert index.add(["학교 (school)", "", "먹다"], page=2, position=1) == ["먹다"]
+    assert index.occurrences("학교") == 2
+    assert "가다" in index and "오다" not in index
+    assert len(index) == 3
+
+def test_known_words_before_excludes_units_still_in_flight():
+    index = VocabularyIndex()
+    # 완료 순서가 위치 순서와 달라도 before 이전 위치의 단어만 나옴
+    index.add(["경제"], position=2)
+    index.add(["학교"], position=0)
+    index.add(["정치"], position=1)
+    index.add(["경제"], position=1)
+    assert index.known_words(before=1) == ["학교"]
+    assert index.known_words(before=2) == ["학교", "경제", "정치"]
+    assert index.known_words(limit=1) == ["학교"]
+    assert index.known_words() == ["학교", "경제", "정치"]
+
+def test_deduplicate_vocabulary_merges_occurrences_and_pages():
+    df = pd.DataFrame([
+        ["Core", "학교", "명사", "school", "학교에 가요.", "1"],
+        ["Core", "가다", "동사", "go", "가요.", "1"],
+        ["Topic", "학교 (school)", "명사", "school", "학교가 커요.", "2"],
+        ["Core", "학교", "명사", "school", "학교에 있어요.", "2"],
+    ], columns=COLUMNS + ["page"])
+    result = deduplicate_vocabulary(df)
+    assert result["Word"].tolist() == ["학교", "가다"]
+    assert result["Example"].tolist() == ["학교에 가요.", "가요."]
+    assert result["occurrences"].tolist() == [3, 1]
+    assert result["page"].tolist() == ["1, 2", "1"]
+    assert deduplicate_vocabulary(pd.DataFrame(columns=COLUMNS)).empty
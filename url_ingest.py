@@ -0,0 +1,207 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from export import EXPORT_FORMATS, available_formats, write_frame
+from utils import analyze_long_text_async, fetch_article
+
+# 전체 동시 다운로드 수 / 같은 호스트에 대한 동시 다운로드 수
+MAX_CONCURRENT_FETCHES = int(os.getenv('MAX_CONCURRENT_FETCHES', '16'))
+MAX_FETCHES_PER_HOST = int(os.getenv('MAX_FETCHES_PER_HOST', '2'))
+# 같은 호스트에 연속으로 요청할 때 두는 최소 간격 (서버 부담을 줄이기 위한 예의상 지연)
+HOST_DELAY = float(os.getenv('HOST_DELAY', '1.0'))  # seconds
+# 동시에 분석할 문서 수 (문서 안의 청크는 analyze_texts_async가 다시 동시에 처리)
+MAX_CONCURRENT_ANALYSES = int(os.getenv('MAX_CONCURRENT_ANALYSES', '4'))
+
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w.-]+')
+
+
+def read_url_list(lines: Iterable[str]) -> list:
+    """URL 목록 정리 (빈 줄과 # 주석 제외, 순서를 유지하며 중복 제거)"""
+    urls = (line.strip() for line in lines)
+    return list(dict.fromkeys(url for url in urls if url and not url.startswith('#')))
+
+
+class HostThrottle:
+    """호스트별 동시 요청 수와 요청 간격 제한 (한 이벤트 루프 안에서 사용)"""
+
+    def __init__(self, per_host: int = MAX_FETCHES_PER_HOST, delay: float = HOST_DELAY):
+        self.per_host = max(1, per_host)
+        self.delay = delay
+        self._semaphores: dict = {}
+        self._next_start: dict = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with semaphore:
+            # 시작 시각을 먼저 예약해 같은 호스트의 요청이 delay 간격으로 퍼지게 함
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, 0.0))
+            self._next_start[host] = start + self.delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+async def _fetch(url: str, semaphore: asyncio.Semaphore, throttle: HostThrottle) -> dict:
+    """URL 하나를 가져와 본문 추출 (실패하면 {"url", "error"})"""
+    # 호스트 제한을 먼저 기다려야 다른 호스트의 요청이 전체 슬롯을 막지 않음
+    async with throttle.slot(urlsplit(url).hostname or ''):
+        async with semaphore:
+            try:
+                # 요청/파싱은 블로킹이므로 스레드에서 실행 (연결 풀과 HTTP 캐시는 공용 fetcher가 관리)
+                return await asyncio.to_thread(fetch_article, url)
+            except Exception as e:
+                return {"url": url, "error": str(e)}
+
+
+async def _as_completed(coroutines: list) -> AsyncIterator:
+    """코루틴을 동시에 실행하고 끝나는 순서대로 결과 반환 (소비를 중단하면 남은 작업 취소)"""
+    tasks = [asyncio.create_task(coroutine) for coroutine in coroutines]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def fetch_articles(urls: Iterable[str], max_concurrency: int = MAX_CONCURRENT_FETCHES,
+                         per_host: int = MAX_FETCHES_PER_HOST, host_delay: float = HOST_DELAY) -> AsyncIterator[dict]:
+    """URL들을 동시에 가져와 도착하는 순서대로 fetch_article 결과 반환"""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    throttle = HostThrottle(per_host, host_delay)
+    async for article in _as_completed([_fetch(url, semaphore, throttle) for url in urls]):
+        yield article
+
+
+async def analyze_urls(urls: Iterable[str], output_language: str, include_vocabulary: bool = True,
+                       include_grammar: bool = True, max_concurrency: int = MAX_CONCURRENT_FETCHES,
+                       per_host: int = MAX_FETCHES_PER_HOST, host_delay: float = HOST_DELAY,
+                       max_analyses: int = MAX_CONCURRENT_ANALYSES) -> AsyncIterator[dict]:
+    """URL들을 가져오는 즉시 분석하고, 분석이 끝나는 순서대로 결과 반환
+
+    각 결과는 fetch_article 결과에 "vocabulary", "grammar" DataFrame을 더한 dict이며,
+    가져오기나 분석에 실패한 URL은 "error"를 담아 반환한다 (나머지 URL은 계속 진행).
+    """
+    fetch_semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    analysis_semaphore = asyncio.Semaphore(max(1, max_analyses))
+    throttle = HostThrottle(per_host, host_delay)
+
+    async def fetch_and_analyze(url: str) -> dict:
+        article = await _fetch(url, fetch_semaphore, throttle)
+        if "error" in article:
+            return article
+        if not article["text"].strip():
+            return dict(article, error="본문을 찾지 못했습니다")
+        async with analysis_semaphore:
+            try:
+                vocab_result, grammar_result = await analyze_long_text_async(
+                    article["text"], output_language, include_vocabulary, include_grammar
+                )
+            except Exception as e:
+                return dict(article, error=str(e))
+        return dict(article, vocabulary=vocab_result, grammar=grammar_result)
+
+    async for result in _as_completed([fetch_and_analyze(url) for url in urls]):
+        yield result
+
+
+def result_frame(result: dict) -> pd.DataFrame:
+    """analyze_urls 결과 하나를 내보내기용 DataFrame으로 변환 ('type', 'url' 열 포함)"""
+    frames = []
+    if result.get("vocabulary") is not None and not result["vocabulary"].empty:
+        frames.append(result["vocabulary"].assign(type='vocabulary'))
+    if result.get("grammar") is not None and not result["grammar"].empty:
+        frames.append(result["grammar"].assign(type='grammar'))
+    if not frames:
+        return pd.DataFrame(columns=['type', 'url'])
+    return pd.concat(frames, ignore_index=True).assign(url=result["url"])
+
+
+def output_name_for(url: str) -> str:
+    """URL로 결과 파일 이름 생성 (호스트/경로 + 짧은 해시로 충돌 방지)"""
+    parts = urlsplit(url)
+    stem = _UNSAFE_FILENAME_CHARS.sub('_', f"{parts.hostname or ''}{parts.path}").strip('_')[:80]
+    return f"{stem}-{hashlib.sha256(url.encode('utf-8')).hexdigest()[:8]}"
+
+
+async def run(args: argparse.Namespace, urls: list) -> int:
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    extension, _ = EXPORT_FORMATS[args.format]
+
+    failures = 0
+    started = time.perf_counter()
+    results = analyze_urls(
+        urls, args.language, 'vocabulary' in args.tasks, 'grammar' in args.tasks,
+        args.concurrency, args.per_host, args.host_delay, args.analyses
+    )
+    done = 0
+    async for result in results:
+        done += 1
+        if "error" in result:
+            failures += 1
+            print(f"[{done}/{len(urls)}] 실패: {result['url']}: {result['error']}", file=sys.stderr)
+            continue
+        output_path = output_dir / f"{output_name_for(result['url'])}.{extension}"
+        df = result_frame(result)
+        # 쓰기는 블로킹이므로 스레드에서 실행해 다른 다운로드/분석이 멈추지 않게 함
+        await asyncio.to_thread(write_frame, df, output_path, args.format)
+        print(f"[{done}/{len(urls)}] {result['url']} -> {output_path} ({len(df)}행, "
+              f"본문 {result['extracted_chars']:,}/{result['original_chars']:,}자)", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    print(f"완료: {len(urls) - failures}개 성공, {failures}개 실패 ({elapsed:.1f}초)", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fetch Korean articles in bulk and analyze each as soon as it arrives.")
+    parser.add_argument('urls', nargs='*', help="URLs to analyze")
+    parser.add_argument('-i', '--input', help="File with one URL per line ('-' for stdin, '#' starts a comment)")
+    parser.add_argument('-o', '--output-dir', default='results', help="Directory for result files (default: results)")
+    parser.add_argument('-f', '--format', choices=available_formats(), default='jsonl', help="Output format (default: jsonl)")
+    parser.add_argument('-l', '--language', choices=("한국어", "English", "Tiếng Việt"), default="English",
+                        help="Language for meanings and explanations (default: English)")
+    parser.add_argument('-t', '--tasks', nargs='+', choices=('vocabulary', 'grammar'),
+                        default=['vocabulary', 'grammar'], help="Analyses to run (default: both)")
+    parser.add_argument('-c', '--concurrency', type=int, default=MAX_CONCURRENT_FETCHES,
+                        help=f"Concurrent downloads overall (default: {MAX_CONCURRENT_FETCHES})")
+    parser.add_argument('--per-host', type=int, default=MAX_FETCHES_PER_HOST,
+                        help=f"Concurrent downloads per host (default: {MAX_FETCHES_PER_HOST})")
+    parser.add_argument('--host-delay', type=float, default=HOST_DELAY,
+                        help=f"Seconds between requests to the same host (default: {HOST_DELAY})")
+    parser.add_argument('--analyses', type=int, default=MAX_CONCURRENT_ANALYSES,
+                        help=f"Documents analysed at the same time (default: {MAX_CONCURRENT_ANALYSES})")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list] = None) -> int:
+    args = parse_args(argv)
+    lines = list(args.urls)
+    if args.input:
+        if args.input == '-':
+            lines += sys.stdin.read().splitlines()
+        else:
+            lines += Path(args.input).read_text(encoding='utf-8-sig').splitlines()
+    urls = read_url_list(lines)
+    if not urls:
+        print("분석할 URL이 없습니다", file=sys.stderr)
+        return 2
+    return asyncio.run(run(args, urls))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
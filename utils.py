@@ -1,30 +1,46 @@
-import google.generativeai as genai
+import asyncio
 from typing import Optional
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
 import os
 from dotenv import load_dotenv
 import time
-import backoff
+
+from content_extractor import extract_main_content
+from http_fetcher import get_http_fetcher
+from keyword_candidates import vocabulary_candidates
+import analysis
+from analysis import candidate_words_note, excluded_words_note, known_patterns_note, known_words_note
+from gemini_client import configure_client, generate_text, generate_text_async
+from metrics import record_content_extraction
+from table_parser import parse_table
+from chunker import CHUNK_TOKEN_BUDGET, chunk_text
 
 load_dotenv()
 
 # Gemini Pro API 설정
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-genai.configure(api_key=GOOGLE_API_KEY)
+configure_client(GOOGLE_API_KEY)
+
+# 동시 분석 요청 수 상한 (analyze_texts_async)
+MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', '4'))
 
-# API 호출 제한을 위한 설정
-MAX_RETRIES = 3
-RETRY_DELAY = 1  # seconds
+# 프롬프트 템플릿 버전 (템플릿을 바꾸면 버전을 올려 캐시 무효화)
+PROMPT_VERSION = 'plain-v2'
 
-def create_structured_prompt(text: str, output_language: str, task_type: str) -> str:
-    """구조화된 프롬프트 생성"""
+def create_structured_prompt(text: str, output_language: str, task_type: str,
+                             exclude_words: Optional[list] = None, candidate_words: Optional[list] = None,
+                             known_words: Optional[list] = None, known_patterns: Optional[list] = None) -> str:
+    """구조화된 프롬프트 생성 (candidate_words가 None이면 어휘 후보를 로컬에서 계산)"""
+    if candidate_words is None and task_type != "grammar":
+        candidate_words = vocabulary_candidates(text, exclude_words)
+    word_notes = (excluded_words_note(exclude_words) + candidate_words_note(candidate_words)
+                  + known_words_note(known_words) + known_patterns_note(known_patterns))
     if task_type == "vocabulary":
         return f"""You are Claude, a highly capable AI assistant with expertise in Korean language analysis. Your task is to analyze Korean text and provide comprehensive vocabulary explanations.
 
 Input Text: {text}
-
+{word_notes}
 Task: Analyze this text and extract vocabulary in multiple categories, following these specific guidelines:
 
 1. Selection Categories and Quantities:
@@ -79,12 +95,40 @@ Remember:
 - Ensure comprehensive coverage of the text
 - Focus on practical usage while including advanced vocabulary
 - Provide clear learning progression from basic to advanced terms
+"""
+    elif task_type == "all":
+        return f"""You are Claude, a highly capable AI assistant with expertise in Korean language analysis. Your task is to analyze Korean text and provide both vocabulary and grammar explanations in a single response.
+
+Input Text: {text}
+{word_notes}
+Part 1 - Vocabulary:
+Extract vocabulary in four categories (10 items each):
+A. Essential Core Vocabulary - crucial, high-frequency words for the main message
+B. Topic-Specific Vocabulary - field-specific and technical terms
+C. Useful Expressions - idiomatic, common and colloquial phrases
+D. Advanced Vocabulary - academic, formal and literary words
+
+For each item give the Korean word/phrase in Hangul, its part of speech (명사, 동사, 형용사, etc.), a precise definition in {output_language} and one natural example sentence.
+
+Output a table with these exact columns, organized by categories:
+| Category | Korean Word | Part of Speech | {output_language} Meaning | Natural Example Sentence |
+
+Part 2 - Grammar:
+Identify exactly 5 most significant grammatical patterns, prioritizing importance to the text's meaning, frequency in modern Korean and practical applicability. For each pattern give the complete grammatical structure, a clear explanation in {output_language} including formation rules and usage context, and one natural example sentence.
+
+Output a second table with these exact columns:
+| Grammar Pattern | Usage in {output_language} | Natural Example Sentence |
+
+Remember:
+- Output the vocabulary table first, then the grammar table
+- Keep every table row on a single line and do not use "|" inside cells
+- Definitions and explanations must be precise, context-appropriate and written in {output_language}
 """
     else:  # grammar
         return f"""You are Claude, a highly capable AI assistant specializing in Korean grammar analysis. Your task is to analyze Korean text and explain its grammatical patterns.
 
 Input Text: {text}
-
+{word_notes}
 Task: Analyze this text and extract key grammatical patterns, following these specific guidelines:
 
 1. Pattern Selection:
@@ -116,70 +160,122 @@ Output your analysis in a clean table format with these exact columns:
 Remember: Focus on practical application and clear explanation of usage rules. Prioritize patterns that are most relevant for learners at an intermediate level.
 """
 
-@backoff.on_exception(backoff.expo, Exception, max_tries=MAX_RETRIES)
-def call_gemini_api(prompt: str) -> str:
-    """Gemini API 호출 with 재시도 로직"""
-    try:
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        if not response.text:
-            raise Exception("빈 응답 받음")
-        return response.text
-    except Exception as e:
-        print(f"API 호출 오류: {str(e)}")
-        raise
+def call_gemini_api(prompt: str, use_cache: bool = True) -> str:
+    """Gemini API 호출 (동일 프롬프트는 디스크 캐시에서 응답, 실패 시 재시도)"""
+    return generate_text(prompt, PROMPT_VERSION, use_cache=use_cache)
+
+async def call_gemini_api_async(prompt: str, use_cache: bool = True) -> str:
+    """call_gemini_api의 비동기 버전"""
+    return await generate_text_async(prompt, PROMPT_VERSION, use_cache=use_cache)
 
 def parse_table_response(response_text: str, expected_columns: int) -> list:
-    """API 응답을 테이블 형식으로 파싱"""
-    lines = [line.strip() for line in response_text.split('\n') if line.strip()]
-    data = []
-    
-    for line in lines:
-        if '|' in line and not line.startswith('|-'):
-            items = [item.strip() for item in line.split('|')]
-            items = [item for item in items if item]  # 빈 항목 제거
-            if len(items) == expected_columns:
-                data.append(items)
-    
-    return data[1:] if len(data) > 1 else []  # 헤더 제외
-
-def extract_vocabulary(text: str, output_language: str = "Tiếng Việt") -> pd.DataFrame:
+    """API 응답을 테이블 형식으로 파싱 (응답 안의 같은 열 수 표를 모두 모으고 헤더 제외)"""
+    return parse_table(response_text, expected_columns)
+
+def extract_vocabulary(text: str, output_language: str = "Tiếng Việt",
+                       exclude_words: Optional[list] = None) -> pd.DataFrame:
     """텍스트에서 어휘 분석"""
-    prompt = create_structured_prompt(text, output_language, "vocabulary")
-    response_text = call_gemini_api(prompt)
-    
-    data = parse_table_response(response_text, 5)
-    
-    column_names = {
-        "한국어": ["카테고리", "단어", "품사", "의미", "예문"],
-        "English": ["Category", "Word", "Part of Speech", "Meaning", "Example"],
-        "Tiếng Việt": ["Danh mục", "Từ vựng", "Từ loại", "Ý nghĩa", "Ví dụ"]
-    }
-    
-    df = pd.DataFrame(data, columns=column_names[output_language])
-    return df
+    return analysis.extract_vocabulary(text, output_language, exclude_words, create_structured_prompt, call_gemini_api)
 
 def extract_grammar(text: str, output_language: str = "Tiếng Việt") -> pd.DataFrame:
-    """텍스트에서 문법 패턴 분석"""
-    prompt = create_structured_prompt(text, output_language, "grammar")
-    response_text = call_gemini_api(prompt)
-    
-    data = parse_table_response(response_text, 3)
-    
-    column_names = {
-        "한국어": ["문법", "용법", "예문"],
-        "English": ["Pattern", "Usage", "Example"],
-        "Tiếng Việt": ["Mẫu câu", "Cách dùng", "Ví dụ"]
-    }
-    
-    df = pd.DataFrame(data, columns=column_names[output_language])
-    return df
-
-def fetch_url_content(url: str) -> Optional[str]:
-    """URL에서 텍스트 콘텐츠 가져오기"""
+    """텍스트에서 문법 패턴 분석 (로컬 규칙으로 찾은 패턴을 먼저 채우고 나머지만 요청)"""
+    return analysis.extract_grammar(text, output_language, create_structured_prompt, call_gemini_api)
+
+def extract_all(text: str, output_language: str = "Tiếng Việt",
+                exclude_words: Optional[list] = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """어휘와 문법 패턴을 한 번의 API 호출로 분석"""
+    return analysis.extract_all(text, output_language, exclude_words, create_structured_prompt, call_gemini_api)
+
+async def extract_vocabulary_async(text: str, output_language: str = "Tiếng Việt",
+                                   exclude_words: Optional[list] = None) -> pd.DataFrame:
+    """extract_vocabulary의 비동기 버전"""
+    return await analysis.extract_vocabulary_async(text, output_language, exclude_words, create_structured_prompt,
+                                                   call_gemini_api_async)
+
+async def extract_grammar_async(text: str, output_language: str = "Tiếng Việt") -> pd.DataFrame:
+    """extract_grammar의 비동기 버전"""
+    return await analysis.extract_grammar_async(text, output_language, create_structured_prompt, call_gemini_api_async)
+
+async def extract_all_async(text: str, output_language: str = "Tiếng Việt",
+                            exclude_words: Optional[list] = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """extract_all의 비동기 버전"""
+    return await analysis.extract_all_async(text, output_language, exclude_words, create_structured_prompt,
+                                            call_gemini_api_async)
+
+def analyze_text(text: str, output_language: str, include_vocabulary: bool = True,
+                 include_grammar: bool = True,
+                 exclude_words: Optional[list] = None) -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """선택한 분석 종류에 맞춰 실행 (둘 다 선택 시 한 번의 호출로 처리)"""
+    return analysis.analyze_text(text, output_language, include_vocabulary, include_grammar, exclude_words,
+                                 create_structured_prompt, call_gemini_api)
+
+async def analyze_text_async(text: str, output_language: str, include_vocabulary: bool = True,
+                             include_grammar: bool = True,
+                             exclude_words: Optional[list] = None) -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """analyze_text의 비동기 버전"""
+    return await analysis.analyze_text_async(text, output_language, include_vocabulary, include_grammar,
+                                             exclude_words, create_structured_prompt, call_gemini_api_async)
+
+async def analyze_texts_async(texts: list[str], output_language: str, include_vocabulary: bool = True,
+                              include_grammar: bool = True,
+                              max_concurrency: int = MAX_CONCURRENT_REQUESTS) -> list[tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]]:
+    """여러 텍스트를 동시에 분석 (동시 호출 수 제한, 결과는 입력 순서 유지)"""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(text: str):
+        async with semaphore:
+            return await analyze_text_async(text, output_language, include_vocabulary, include_grammar)
+
+    return await asyncio.gather(*(run(text) for text in texts))
+
+def analyze_long_text(text: str, output_language: str, include_vocabulary: bool = True,
+                      include_grammar: bool = True,
+                      max_tokens: int = CHUNK_TOKEN_BUDGET) -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """긴 텍스트를 문장 단위 청크(토큰 예산 이하)로 나눠 동시에 분석하고 결과를 합침"""
+    chunks = chunk_text(text, max_tokens) or [text]
+    if len(chunks) == 1:
+        return analyze_text(chunks[0], output_language, include_vocabulary, include_grammar)
+
+    results = asyncio.run(analyze_texts_async(chunks, output_language, include_vocabulary, include_grammar))
+    return _concat_results(results, include_vocabulary, include_grammar)
+
+async def analyze_long_text_async(text: str, output_language: str, include_vocabulary: bool = True,
+                                  include_grammar: bool = True,
+                                  max_tokens: int = CHUNK_TOKEN_BUDGET) -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """analyze_long_text의 비동기 버전 (이미 실행 중인 이벤트 루프 안에서 사용)"""
+    chunks = chunk_text(text, max_tokens) or [text]
+    results = await analyze_texts_async(chunks, output_language, include_vocabulary, include_grammar)
+    return _concat_results(results, include_vocabulary, include_grammar)
+
+def _concat_results(results: list, include_vocabulary: bool,
+                    include_grammar: bool) -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """청크별 (어휘, 문법) 결과를 하나로 합침"""
+    vocab_result = None
+    grammar_result = None
+    if include_vocabulary:
+        vocab_result = pd.concat([vocab for vocab, _ in results], ignore_index=True)
+    if include_grammar:
+        grammar_result = pd.concat([grammar for _, grammar in results], ignore_index=True)
+    return vocab_result, grammar_result
+
+def fetch_article(url: str) -> dict:
+    """URL의 HTML을 가져와 기사 제목/본문만 추출 (extract_main_content 결과에 "url" 추가)
+
+    공용 연결 풀, 시간/크기 제한, ETag/Last-Modified 조건부 요청을 사용한다.
+    """
+    try:
+        html = get_http_fetcher().fetch(url)
+    except requests.exceptions.RequestException as e:
+        raise ValueError(f"Failed to fetch URL content: {str(e)}")
+    content = extract_main_content(html)
+    record_content_extraction(url, content["original_chars"], content["extracted_chars"])
+    return dict(content, url=url)
+
+def fetch_url_content(url: str, extract_content: bool = True) -> Optional[str]:
+    """URL에서 텍스트 콘텐츠 가져오기 (기본은 메뉴·광고·스크립트를 뺀 기사 본문, extract_content=False면 원본 HTML)"""
+    if extract_content:
+        return fetch_article(url)["text"]
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raises an error for bad responses
-        return response.text
+        return get_http_fetcher().fetch(url)
     except requests.exceptions.RequestException as e:
         raise ValueError(f"Failed to fetch URL content: {str(e)}")
\ No newline at end of file
@@ -1,25 +1,126 @@
-import google.generativeai as genai
-from typing import Optional
+import asyncio
+from typing import Callable, Iterable, Iterator, Optional
 import pandas as pd
 import requests
 from bs4 import BeautifulSoup
+import io
+import json
+import math
 import os
+import sys
 from dotenv import load_dotenv
 import time
-import backoff
 import pdfplumber
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cache import get_response_cache, make_cache_key
+from gemini_client import MODEL_NAME, configure_client, generate_text, generate_text_async, stream_text
+from chunker import CHUNK_TOKEN_BUDGET
+from job_journal import JobJournal, make_job_id
+from keyword_candidates import vocabulary_candidates
+import analysis
+from analysis import (
+    EXPECTED_GRAMMAR_ROWS, EXPECTED_VOCABULARY_ROWS, GRAMMAR_COLUMN_NAMES, VOCABULARY_COLUMN_NAMES,
+    candidate_words_note, excluded_words_note, known_patterns_note, known_words_note, prefill_grammar_rows,
+    prefill_vocabulary_rows
+)
+from lexicon import get_lexicon, lookup_key
+from metrics import record_parse_yield
+from table_parser import StreamingTableParser, TableParser, parse_table
+from vocab_index import MAX_EXCLUDED_WORDS, VocabularyIndex
 
 load_dotenv()
 
 # Gemini Pro API 설정
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-genai.configure(api_key=GOOGLE_API_KEY)
+configure_client(GOOGLE_API_KEY)
+
+# PDF 페이지 동시 분석 개수 (동시에 진행 중인 API 호출 상한)
+MAX_CONCURRENT_PAGES = int(os.getenv('MAX_CONCURRENT_PAGES', '4'))
+
+# 이 페이지 수 미만의 PDF는 프로세스 풀 없이 순차 추출
+PARALLEL_EXTRACTION_MIN_PAGES = int(os.getenv('PARALLEL_EXTRACTION_MIN_PAGES', '30'))
+
+# 프롬프트 형식 ('html': 상세 HTML 지침, 'compact': 마크업 없이 토큰을 줄인 지침)
+PROMPT_STYLE = os.getenv('PROMPT_STYLE', 'html')
+
+# 프롬프트 템플릿 버전 (템플릿을 바꾸면 버전을 올려 캐시 무효화)
+PROMPT_VERSIONS = {"html": "html-v2", "compact": "compact-v2"}
+PROMPT_VERSION = PROMPT_VERSIONS[PROMPT_STYLE]
+
+# 한 번의 요청으로 함께 받을 수 있는 출력 언어 (결과 테이블 열 이름이 정의된 언어)
+OUTPUT_LANGUAGES = tuple(VOCABULARY_COLUMN_NAMES)
 
-# API 호출 제한을 위한 설정
-MAX_RETRIES = 3
-RETRY_DELAY = 1  # seconds
-def create_structured_prompt(text: str, output_language: str, task_type: str) -> str:
-    """구조화된 프롬프트 생성 (HTML 형식, 상세 지침, 단계별 사고 포함)"""
+def create_compact_prompt(text: str, output_language: str, task_type: str,
+                          exclude_words: Optional[list] = None, candidate_words: Optional[list] = None,
+                          known_words: Optional[list] = None, known_patterns: Optional[list] = None) -> str:
+    """간결한 프롬프트 생성 (HTML 마크업/인라인 스타일 없이 같은 표 형식만 요구)"""
+    vocabulary = (
+        "Vocabulary: 40 items, 10 per category - Core (key high-frequency words), Topic (field-specific terms), "
+        "Expression (idioms, common phrases), Advanced (formal or literary words).\n"
+        f"| Category | Korean Word | Part of Speech | {output_language} Meaning | Natural Example Sentence |\n"
+    )
+    grammar = (
+        "Grammar: exactly 5 most significant patterns in the text, with formation rules in the usage column.\n"
+        f"| Grammar Pattern | Usage in {output_language} | Natural Example Sentence |\n"
+    )
+    sections = {"vocabulary": [vocabulary], "all": [vocabulary, grammar]}.get(task_type, [grammar])
+    return (
+        f"Analyze this Korean text for learners. Write meanings and usage in {output_language}. "
+        "Output only markdown tables with the exact columns below, one row per line, no '|' inside cells.\n"
+        + excluded_words_note(exclude_words)
+        + candidate_words_note(candidate_words)
+        + known_words_note(known_words)
+        + known_patterns_note(known_patterns)
+        + "".join(sections)
+        + f"\nText:\n{text}\n"
+    )
+
+def create_multilingual_prompt(text: str, output_languages: list, task_type: str,
+                               exclude_words: Optional[list] = None, candidate_words: Optional[list] = None,
+                               known_patterns: Optional[list] = None) -> str:
+    """여러 출력 언어의 의미/용법을 언어별 열로 한 표에 받는 프롬프트 (간결한 형식)"""
+    if candidate_words is None and task_type != "grammar":
+        candidate_words = vocabulary_candidates(text, exclude_words)
+    meanings = " | ".join(f"{language} Meaning" for language in output_languages)
+    usages = " | ".join(f"Usage in {language}" for language in output_languages)
+    vocabulary = (
+        "Vocabulary: 40 items, 10 per category - Core (key high-frequency words), Topic (field-specific terms), "
+        "Expression (idioms, common phrases), Advanced (formal or literary words).\n"
+        f"| Category | Korean Word | Part of Speech | {meanings} | Natural Example Sentence |\n"
+    )
+    grammar = (
+        "Grammar: exactly 5 most significant patterns in the text, with formation rules in each usage column.\n"
+        f"| Grammar Pattern | {usages} | Natural Example Sentence |\n"
+    )
+    sections = {"vocabulary": [vocabulary], "all": [vocabulary, grammar]}.get(task_type, [grammar])
+    return (
+        f"Analyze this Korean text for learners. Write every meaning and usage in each of these languages, "
+        f"one column per language: {', '.join(output_languages)}. "
+        "Output only markdown tables with the exact columns below, one row per line, no '|' inside cells.\n"
+        + excluded_words_note(exclude_words)
+        + candidate_words_note(candidate_words)
+        + known_patterns_note(known_patterns)
+        + "".join(sections)
+        + f"\nText:\n{text}\n"
+    )
+
+def create_structured_prompt(text: str, output_language: str, task_type: str,
+                             exclude_words: Optional[list] = None, candidate_words: Optional[list] = None,
+                             known_words: Optional[list] = None, known_patterns: Optional[list] = None) -> str:
+    """구조화된 프롬프트 생성 (HTML 형식, 상세 지침, 단계별 사고 포함)
+
+    candidate_words가 None이면 어휘 후보를 로컬 빈도 분석으로 계산해 넣는다 (빈 목록이면 넣지 않음).
+    known_words와 known_patterns는 어휘집·로컬 문법 규칙으로 이미 채운 항목으로, 모델은 나머지만 출력한다.
+    """
+    if candidate_words is None and task_type != "grammar":
+        candidate_words = vocabulary_candidates(text, exclude_words)
+    if PROMPT_STYLE == "compact":
+        return create_compact_prompt(text, output_language, task_type, exclude_words, candidate_words, known_words,
+                                     known_patterns)
+    word_notes = (excluded_words_note(exclude_words, html=True) + candidate_words_note(candidate_words, html=True)
+                  + known_words_note(known_words, html=True) + known_patterns_note(known_patterns, html=True))
     if task_type == "vocabulary":
         return f"""
         <div style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
@@ -30,6 +131,7 @@ def create_structured_prompt(text: str, output_language: str, task_type: str) ->
                 <p><strong>Input Text:</strong></p>
                 <pre style="white-space: pre-wrap; font-family: monospace; padding: 10px; background-color: #e0e0e0; border-radius: 3px;">{text}</pre>
             </div>
+            {word_notes}
             
             <p><strong>Task:</strong> Analyze the text and extract vocabulary in multiple categories, following these specific guidelines:</p>
             
@@ -124,6 +226,47 @@ def create_structured_prompt(text: str, output_language: str, task_type: str) ->
             </ul>
         </div>
         """
+    elif task_type == "all":
+        return f"""
+        <div style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <h2 style="color: #0056b3;">Korean Vocabulary and Grammar Analysis Task</h2>
+            <p><strong>You are Claude, a highly capable AI assistant with expertise in Korean language analysis.</strong> Your task is to analyze the provided Korean text and provide both vocabulary and grammar explanations in a single response.</p>
+            
+            <div style="background-color: #f0f0f0; padding: 15px; border-radius: 5px; margin-bottom: 15px;">
+                <p><strong>Input Text:</strong></p>
+                <pre style="white-space: pre-wrap; font-family: monospace; padding: 10px; background-color: #e0e0e0; border-radius: 3px;">{text}</pre>
+            </div>
+            {word_notes}
+            
+            <ol>
+                <li>
+                    <p><strong>Part 1 - Vocabulary (10 items per category):</strong></p>
+                    <ul>
+                        <li><strong>A. Essential Core Vocabulary:</strong> crucial, high-frequency words for the main message</li>
+                        <li><strong>B. Topic-Specific Vocabulary:</strong> field-specific and technical terms</li>
+                        <li><strong>C. Useful Expressions:</strong> idiomatic, common and colloquial phrases</li>
+                        <li><strong>D. Advanced Vocabulary:</strong> academic, formal and literary words</li>
+                    </ul>
+                    <p>For each item give the Korean word/phrase in Hangul, its part of speech (명사, 동사, 형용사, etc.), a precise definition in {output_language} and one natural example sentence.</p>
+                    <p>Output a table with these exact columns, organized by categories:</p>
+                    <pre style="font-family: monospace; padding: 10px; background-color: #e0e0e0; border-radius: 3px;">| Category | Korean Word | Part of Speech | {output_language} Meaning | Natural Example Sentence |</pre>
+                </li>
+                <li>
+                    <p><strong>Part 2 - Grammar (exactly 5 patterns):</strong></p>
+                    <p>Select the most significant grammatical patterns based on importance to the text's meaning, frequency in modern Korean and practical applicability. For each pattern give the complete grammatical structure, a clear explanation in {output_language} including formation rules and usage context, and one natural example sentence.</p>
+                    <p>Output a second table with these exact columns:</p>
+                    <pre style="font-family: monospace; padding: 10px; background-color: #e0e0e0; border-radius: 3px;">| Grammar Pattern | Usage in {output_language} | Natural Example Sentence |</pre>
+                </li>
+            </ol>
+            
+            <p><strong>Remember:</strong></p>
+            <ul>
+                <li>Output the vocabulary table first, then the grammar table.</li>
+                <li>Keep every table row on a single line and do not use "|" inside cells.</li>
+                <li>Definitions and explanations must be precise, context-appropriate and written in {output_language}.</li>
+            </ul>
+        </div>
+        """
     else:  # grammar
         return f"""
         <div style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
@@ -134,6 +277,7 @@ def create_structured_prompt(text: str, output_language: str, task_type: str) ->
                 <p><strong>Input Text:</strong></p>
                 <pre style="white-space: pre-wrap; font-family: monospace; padding: 10px; background-color: #e0e0e0; border-radius: 3px;">{text}</pre>
             </div>
+            {word_notes}
             
             <p><strong>Task:</strong> Analyze the text and extract key grammatical patterns, following these specific guidelines:</p>
             
@@ -289,71 +433,405 @@ Output your analysis in a clean table format with these exact columns:
 Remember: Focus on practical application and clear explanation of usage rules. Prioritize patterns that are most relevant for learners at an intermediate level.
 """
 
-@backoff.on_exception(backoff.expo, Exception, max_tries=MAX_RETRIES)
-def call_gemini_api(prompt: str) -> str:
-    """Gemini API 호출 with 재시도 로직"""
-    try:
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        if not response.text:
-            raise Exception("빈 응답 받음")
-        return response.text
-    except Exception as e:
-        print(f"API 호출 오류: {str(e)}")
-        raise
+def call_gemini_api(prompt: str, use_cache: bool = True) -> str:
+    """Gemini API 호출 (동일 프롬프트는 디스크 캐시에서 응답, 실패 시 재시도)"""
+    return generate_text(prompt, PROMPT_VERSION, use_cache=use_cache)
+
+async def call_gemini_api_async(prompt: str, use_cache: bool = True) -> str:
+    """call_gemini_api의 비동기 버전"""
+    return await generate_text_async(prompt, PROMPT_VERSION, use_cache=use_cache)
+
+def stream_gemini_api(prompt: str, use_cache: bool = True) -> Iterator[str]:
+    """Gemini API 스트리밍 호출 (응답 조각을 생성되는 대로 반환)"""
+    return stream_text(prompt, PROMPT_VERSION, use_cache=use_cache)
 
 def parse_table_response(response_text: str, expected_columns: int) -> list:
-    """API 응답을 테이블 형식으로 파싱"""
-    lines = [line.strip() for line in response_text.split('\n') if line.strip()]
-    data = []
-    
-    for line in lines:
-        if '|' in line and not line.startswith('|-'):
-            items = [item.strip() for item in line.split('|')]
-            items = [item for item in items if item]  # 빈 항목 제거
-            if len(items) == expected_columns:
-                data.append(items)
-    
-    return data[1:] if len(data) > 1 else []  # 헤더 제외
-
-def extract_vocabulary(text: str, output_language: str = "Tiếng Việt") -> pd.DataFrame:
+    """API 응답을 테이블 형식으로 파싱 (응답 안의 같은 열 수 표를 모두 모으고 헤더 제외)"""
+    return parse_table(response_text, expected_columns)
+
+def extract_vocabulary(text: str, output_language: str = "Tiếng Việt",
+                       exclude_words: Optional[list] = None) -> pd.DataFrame:
     """텍스트에서 어휘 분석"""
-    prompt = create_structured_prompt(text, output_language, "vocabulary")
-    response_text = call_gemini_api(prompt)
-    
-    data = parse_table_response(response_text, 5)
-    
-    column_names = {
-        "한국어": ["카테고리", "단어", "품사", "의미", "예문"],
-        "English": ["Category", "Word", "Part of Speech", "Meaning", "Example"],
-        "Tiếng Việt": ["Danh mục", "Từ vựng", "Từ loại", "Ý nghĩa", "Ví dụ"]
-    }
-    
-    df = pd.DataFrame(data, columns=column_names[output_language])
-    return df
+    return analysis.extract_vocabulary(text, output_language, exclude_words, create_structured_prompt, call_gemini_api)
 
 def extract_grammar(text: str, output_language: str = "Tiếng Việt") -> pd.DataFrame:
-    """텍스트에서 문법 패턴 분석"""
-    prompt = create_structured_prompt(text, output_language, "grammar")
-    response_text = call_gemini_api(prompt)
-    
-    data = parse_table_response(response_text, 3)
-    
-    column_names = {
-        "한국어": ["문법", "용법", "예문"],
-        "English": ["Pattern", "Usage", "Example"],
-        "Tiếng Việt": ["Mẫu câu", "Cách dùng", "Ví dụ"]
+    """텍스트에서 문법 패턴 분석 (로컬 규칙으로 찾은 패턴을 먼저 채우고 나머지만 요청)"""
+    return analysis.extract_grammar(text, output_language, create_structured_prompt, call_gemini_api)
+
+def extract_all(text: str, output_language: str = "Tiếng Việt",
+                exclude_words: Optional[list] = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """어휘와 문법 패턴을 한 번의 API 호출로 분석"""
+    return analysis.extract_all(text, output_language, exclude_words, create_structured_prompt, call_gemini_api)
+
+async def extract_vocabulary_async(text: str, output_language: str = "Tiếng Việt",
+                                   exclude_words: Optional[list] = None) -> pd.DataFrame:
+    """extract_vocabulary의 비동기 버전"""
+    return await analysis.extract_vocabulary_async(text, output_language, exclude_words, create_structured_prompt,
+                                                   call_gemini_api_async)
+
+async def extract_grammar_async(text: str, output_language: str = "Tiếng Việt") -> pd.DataFrame:
+    """extract_grammar의 비동기 버전"""
+    return await analysis.extract_grammar_async(text, output_language, create_structured_prompt, call_gemini_api_async)
+
+async def extract_all_async(text: str, output_language: str = "Tiếng Việt",
+                            exclude_words: Optional[list] = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """extract_all의 비동기 버전"""
+    return await analysis.extract_all_async(text, output_language, exclude_words, create_structured_prompt,
+                                            call_gemini_api_async)
+
+def _result_cache_key(text: str, output_language: str, include_vocabulary: bool, include_grammar: bool,
+                      exclude_words: Optional[list]) -> str:
+    """언어별 분석 결과 캐시 키 (응답 캐시와 같은 저장소를 쓰되 프롬프트 키와 겹치지 않음)"""
+    payload = json.dumps([text, include_vocabulary, include_grammar, exclude_words or []], ensure_ascii=False)
+    return make_cache_key(payload, MODEL_NAME, f"{PROMPT_VERSION}/result/{output_language}")
+
+def _cached_result(text: str, output_language: str, include_vocabulary: bool, include_grammar: bool,
+                   exclude_words: Optional[list]) -> Optional[tuple]:
+    """캐시된 (어휘, 문법) 결과 (없으면 None)"""
+    value = get_response_cache().get(
+        _result_cache_key(text, output_language, include_vocabulary, include_grammar, exclude_words)
+    )
+    if value is None:
+        return None
+    tables = json.loads(value)
+    vocab_result = grammar_result = None
+    if tables["vocabulary"] is not None:
+        vocab_result = pd.DataFrame(tables["vocabulary"], columns=VOCABULARY_COLUMN_NAMES[output_language])
+    if tables["grammar"] is not None:
+        grammar_result = pd.DataFrame(tables["grammar"], columns=GRAMMAR_COLUMN_NAMES[output_language])
+    return vocab_result, grammar_result
+
+def _store_result(text: str, output_language: str, include_vocabulary: bool, include_grammar: bool,
+                  exclude_words: Optional[list], result: tuple) -> None:
+    """분석 결과 저장 (요청한 표가 비어 있으면 잘못된 응답일 수 있으므로 저장하지 않고 다음에 다시 요청)"""
+    vocab_result, grammar_result = result
+    if any(table is not None and table.empty for table in result):
+        return
+    tables = {
+        "vocabulary": None if vocab_result is None else vocab_result.values.tolist(),
+        "grammar": None if grammar_result is None else grammar_result.values.tolist(),
     }
-    
-    df = pd.DataFrame(data, columns=column_names[output_language])
-    return df
+    get_response_cache().set(
+        _result_cache_key(text, output_language, include_vocabulary, include_grammar, exclude_words),
+        json.dumps(tables, ensure_ascii=False)
+    )
 
-def extract_text_from_pdf(pdf_file):
-    """Extract text from PDF file, page by page."""
-    page_texts = []
-    with pdfplumber.open(pdf_file) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text()
+def analyze_text(text: str, output_language: str, include_vocabulary: bool = True,
+                 include_grammar: bool = True,
+                 exclude_words: Optional[list] = None) -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """선택한 분석 종류에 맞춰 실행 (둘 다 선택 시 한 번의 호출로 처리, 결과는 출력 언어별로 캐시)"""
+    cached = _cached_result(text, output_language, include_vocabulary, include_grammar, exclude_words)
+    if cached is not None:
+        return cached
+    result = analysis.analyze_text(text, output_language, include_vocabulary, include_grammar, exclude_words,
+                                   create_structured_prompt, call_gemini_api)
+    _store_result(text, output_language, include_vocabulary, include_grammar, exclude_words, result)
+    return result
+
+async def analyze_text_async(text: str, output_language: str, include_vocabulary: bool = True,
+                             include_grammar: bool = True,
+                             exclude_words: Optional[list] = None) -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """analyze_text의 비동기 버전"""
+    settings = (text, output_language, include_vocabulary, include_grammar, exclude_words)
+    cached = await asyncio.to_thread(_cached_result, *settings)
+    if cached is not None:
+        return cached
+    result = await analysis.analyze_text_async(text, output_language, include_vocabulary, include_grammar,
+                                               exclude_words, create_structured_prompt, call_gemini_api_async)
+    await asyncio.to_thread(_store_result, *settings, result)
+    return result
+
+def _multilingual_results(response_text: str, output_languages: list, include_vocabulary: bool,
+                          known_grammar: Optional[dict], grammar_requested: bool) -> dict:
+    """언어별 열이 있는 응답 표를 출력 언어마다 (어휘, 문법) DataFrame으로 나눔
+
+    known_grammar는 언어별로 로컬 규칙이 채운 문법 행이며 None이면 문법 분석을 하지 않은 것이다.
+    """
+    count = len(output_languages)
+    vocabulary_rows = grammar_rows = []
+    if include_vocabulary:
+        parser = TableParser(4 + count)
+        vocabulary_rows = parser.parse(response_text)
+        record_parse_yield("vocabulary", len(vocabulary_rows), EXPECTED_VOCABULARY_ROWS,
+                           parser.dropped_rows, parser.repaired_rows)
+    if grammar_requested:
+        parser = TableParser(2 + count)
+        grammar_rows = parser.parse(response_text)
+        expected_rows = max(EXPECTED_GRAMMAR_ROWS - len(known_grammar[output_languages[0]]), 0)
+        record_parse_yield("grammar", len(grammar_rows), expected_rows, parser.dropped_rows, parser.repaired_rows)
+
+    results = {}
+    for index, language in enumerate(output_languages):
+        vocab_result = grammar_result = None
+        if include_vocabulary:
+            # (카테고리, 단어, 품사, 언어별 의미..., 예문) -> 해당 언어의 5열 표
+            rows = [row[:3] + [row[3 + index], row[3 + count]] for row in vocabulary_rows]
+            get_lexicon().add_rows(rows, language)
+            vocab_result = pd.DataFrame(rows, columns=VOCABULARY_COLUMN_NAMES[language])
+        if known_grammar is not None:
+            rows = [[row[0], row[1 + index], row[1 + count]] for row in grammar_rows]
+            grammar_result = pd.DataFrame(known_grammar[language] + rows, columns=GRAMMAR_COLUMN_NAMES[language])
+        results[language] = (vocab_result, grammar_result)
+    return results
+
+def analyze_text_multilingual(text: str, output_languages: Iterable[str] = OUTPUT_LANGUAGES,
+                              include_vocabulary: bool = True, include_grammar: bool = True,
+                              exclude_words: Optional[list] = None) -> dict:
+    """여러 출력 언어의 분석 결과를 한 번의 API 호출로 받아 {언어: (어휘, 문법)} 반환
+
+    한국어 단어·패턴은 한 번만 뽑고 의미/용법 열만 언어별로 받는다. 결과는 언어별로 캐시되므로
+    이후 analyze_text로 다른 출력 언어를 선택해도 API를 다시 호출하지 않는다.
+    """
+    output_languages = list(dict.fromkeys(output_languages))
+    results = {
+        language: _cached_result(text, language, include_vocabulary, include_grammar, exclude_words)
+        for language in output_languages
+    }
+    missing = [language for language, result in results.items() if result is None]
+    if len(missing) == 1:
+        results[missing[0]] = analyze_text(text, missing[0], include_vocabulary, include_grammar, exclude_words)
+    elif missing:
+        # 패턴 감지는 언어와 무관하므로 모든 언어에서 같은 패턴이 채워짐 (용법 설명만 언어별)
+        known_grammar = None
+        grammar_requested = False
+        if include_grammar:
+            known_grammar = {language: prefill_grammar_rows(text, language)[0] for language in missing}
+            grammar_requested = len(known_grammar[missing[0]]) < EXPECTED_GRAMMAR_ROWS
+        response_text = ""
+        if include_vocabulary or grammar_requested:
+            if include_vocabulary and grammar_requested:
+                task_type = "all"
+            else:
+                task_type = "vocabulary" if include_vocabulary else "grammar"
+            known_patterns = [row[0] for row in known_grammar[missing[0]]] if known_grammar else None
+            prompt = create_multilingual_prompt(text, missing, task_type, exclude_words, known_patterns=known_patterns)
+            response_text = call_gemini_api(prompt)
+        fanned_out = _multilingual_results(response_text, missing, include_vocabulary, known_grammar, grammar_requested)
+        for language, result in fanned_out.items():
+            _store_result(text, language, include_vocabulary, include_grammar, exclude_words, result)
+            results[language] = result
+    return results
+
+async def analyze_texts_async(texts: list[str], output_language: str, include_vocabulary: bool = True,
+                              include_grammar: bool = True,
+                              max_concurrency: int = MAX_CONCURRENT_PAGES) -> list[tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]]:
+    """여러 텍스트를 동시에 분석 (동시 호출 수 제한, 결과는 입력 순서 유지)"""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(text: str):
+        async with semaphore:
+            return await analyze_text_async(text, output_language, include_vocabulary, include_grammar)
+
+    return await asyncio.gather(*(run(text) for text in texts))
+
+def stream_analysis(text: str, output_language: str, include_vocabulary: bool = True,
+                    include_grammar: bool = True,
+                    exclude_words: Optional[list] = None) -> Iterator[tuple[str, list]]:
+    """분석 결과 표 행을 모델이 생성하는 대로 반환
+
+    ("vocabulary" 또는 "grammar", 행) 튜플을 내보내므로 UI에서 표에 바로 추가할 수 있음.
+    어휘집에 있는 단어와 로컬 규칙으로 찾은 문법의 행은 API 응답을 기다리지 않고 먼저 내보낸다.
+    """
+    candidate_words, known_rows, known_grammar = None, [], []
+    if include_vocabulary:
+        candidate_words, known_rows, complete = prefill_vocabulary_rows(text, output_language, exclude_words)
+        for row in known_rows:
+            yield "vocabulary", row
+        if complete:
+            include_vocabulary = False
+    if include_grammar:
+        known_grammar, complete = prefill_grammar_rows(text, output_language)
+        for row in known_grammar:
+            yield "grammar", row
+        if complete:
+            include_grammar = False
+    if not include_vocabulary and not include_grammar:
+        return
+    if include_vocabulary and include_grammar:
+        task_type = "all"
+    else:
+        task_type = "vocabulary" if include_vocabulary else "grammar"
+    prompt = create_structured_prompt(text, output_language, task_type, exclude_words, candidate_words,
+                                      [row[1] for row in known_rows], [row[0] for row in known_grammar])
+
+    parsers = {}
+    row_counts = {}
+    if include_vocabulary:
+        parsers["vocabulary"] = StreamingTableParser(5)
+    if include_grammar:
+        parsers["grammar"] = StreamingTableParser(3)
+
+    known = {lookup_key(row[1]) for row in known_rows}
+    new_vocabulary = []
+
+    def accept(table: str, row: list) -> bool:
+        row_counts[table] = row_counts.get(table, 0) + 1
+        if table != "vocabulary":
+            return True
+        new_vocabulary.append(row)
+        return lookup_key(row[1]) not in known
+
+    for chunk in stream_gemini_api(prompt):
+        for table, parser in parsers.items():
+            for row in parser.feed(chunk):
+                if accept(table, row):
+                    yield table, row
+    for table, parser in parsers.items():
+        for row in parser.close():
+            if accept(table, row):
+                yield table, row
+
+    get_lexicon().add_rows(new_vocabulary, output_language)
+    expected_rows = {
+        "vocabulary": max(EXPECTED_VOCABULARY_ROWS - len(known_rows), 0),
+        "grammar": max(EXPECTED_GRAMMAR_ROWS - len(known_grammar), 0),
+    }
+    for table, parser in parsers.items():
+        record_parse_yield(table, row_counts.get(table, 0), expected_rows[table],
+                           parser.dropped_rows, parser.repaired_rows)
+
+def iter_pdf_pages(pdf_file, first_page: Optional[int] = None,
+                   last_page: Optional[int] = None) -> Iterator[dict]:
+    """PDF 페이지 텍스트를 한 페이지씩 지연 추출 (추출이 끝난 페이지의 캐시는 바로 해제)
+
+    first_page/last_page는 1부터 시작하는 포함 범위이며, 생략하면 처음/끝 페이지까지.
+    """
+    page_numbers = None
+    if first_page or last_page:
+        # pdfplumber는 'page_number in pages'로 거르므로 끝이 열린 범위도 range로 표현 가능
+        page_numbers = range(max(1, first_page or 1), (last_page or sys.maxsize - 1) + 1)
+
+    with pdfplumber.open(pdf_file, pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            try:
+                text = page.extract_text()
+            finally:
+                # 레이아웃 분석 결과 등 페이지별 캐시 해제
+                page.close()
             if text:
-               page_texts.append({"page": page_num, "text": text})
-    return page_texts
\ No newline at end of file
+                yield {"page": page.page_number, "text": text}
+
+def extract_text_from_pdf(pdf_file, first_page: Optional[int] = None,
+                          last_page: Optional[int] = None) -> list:
+    """Extract text from PDF file, page by page."""
+    return list(iter_pdf_pages(pdf_file, first_page, last_page))
+
+# 워커 프로세스가 추출할 PDF (경로 또는 바이트)
+_worker_pdf_source = None
+
+def _init_extraction_worker(source) -> None:
+    """(워커 프로세스) PDF 원본을 워커당 한 번만 전달받아 보관"""
+    global _worker_pdf_source
+    _worker_pdf_source = source
+
+def _extract_page_range(first_page: int, last_page: int) -> list:
+    """(워커 프로세스) 파일을 따로 열어 지정 범위의 페이지 텍스트 추출"""
+    source = _worker_pdf_source
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return list(iter_pdf_pages(source, first_page, last_page))
+
+def extract_text_from_pdf_parallel(pdf_file, first_page: Optional[int] = None, last_page: Optional[int] = None,
+                                   processes: Optional[int] = None,
+                                   min_pages: int = PARALLEL_EXTRACTION_MIN_PAGES) -> list:
+    """프로세스 풀로 PDF 텍스트 추출 (페이지 범위를 워커에 나누고, 결과는 페이지 순서)
+
+    pdf_file은 경로 또는 파일 객체(업로드 파일 등). 페이지 수가 min_pages보다 적거나
+    사용할 프로세스가 하나뿐이면 순차 추출로 처리한다.
+    """
+    if isinstance(pdf_file, (str, os.PathLike)):
+        source = os.fspath(pdf_file)
+    else:
+        source = pdf_file.read()  # 파일 객체는 프로세스 간에 넘길 수 없으므로 바이트로 전달
+
+    with pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source) as pdf:
+        total_pages = len(pdf.pages)
+    start = max(1, first_page or 1)
+    end = min(total_pages, last_page or total_pages)
+    page_count = end - start + 1
+    processes = min(processes or os.cpu_count() or 1, max(page_count, 1))
+
+    if page_count < min_pages or processes < 2:
+        serial_source = io.BytesIO(source) if isinstance(source, bytes) else source
+        return extract_text_from_pdf(serial_source, start, end)
+
+    # 워커당 2개 정도의 범위로 나눠 페이지별 처리 시간 차이를 고르게 분산
+    chunk_size = math.ceil(page_count / (processes * 2))
+    range_starts = list(range(start, end + 1, chunk_size))
+    range_ends = [min(end, range_start + chunk_size - 1) for range_start in range_starts]
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_extraction_worker,
+                             initargs=(source,)) as executor:
+        chunks = executor.map(_extract_page_range, range_starts, range_ends)
+        return [page for chunk in chunks for page in chunk]
+
+def analysis_job_id(document: bytes, output_language: str, include_vocabulary: bool, include_grammar: bool,
+                    **settings) -> str:
+    """작업 기록용 ID (프롬프트 버전/청크 예산이 바뀌면 단위 구성이 달라지므로 새 작업으로 취급)"""
+    return make_job_id(
+        document, output_language=output_language, include_vocabulary=include_vocabulary,
+        include_grammar=include_grammar, prompt_version=PROMPT_VERSION, chunk_token_budget=CHUNK_TOKEN_BUDGET,
+        **settings
+    )
+
+def analyze_pages(page_texts: Iterable[dict], output_language: str, include_vocabulary: bool = True,
+                  include_grammar: bool = True, max_workers: int = MAX_CONCURRENT_PAGES,
+                  vocabulary_index: Optional[VocabularyIndex] = None, journal: Optional[JobJournal] = None,
+                  job_id: Optional[str] = None, analyze: Optional[Callable] = None) -> Iterator[dict]:
+    """페이지들을 스레드 풀에서 동시에 분석하고 페이지 순서대로 결과 반환
+
+    page_texts로 iter_pdf_pages 생성기를 넘기면 뒤 페이지를 읽는 동안 앞 페이지 분석이 진행됨.
+    vocabulary_index를 넘기면 완료된 페이지의 어휘를 색인에 합치고, 이후 페이지 프롬프트에
+    이미 나온 단어를 제외 목록으로 넣어 새 어휘에만 출력 토큰을 쓰게 함.
+
+    각 결과는 {"page": 첫 페이지 번호, "pages": [페이지 번호], "vocabulary": DataFrame|None,
+    "grammar": DataFrame|None} 형식 (merge_pages로 합친 단위는 pages에 여러 페이지가 들어감).
+
+    journal과 job_id를 넘기면 단위마다 결과/실패를 기록하고, 이전 실행에서 완료된 단위는
+    API를 호출하지 않고 기록된 결과를 그대로 반환한다.
+    analyze는 analyze_text와 같은 인자를 받는 함수로 바꿔 끼울 때 사용 (예: UI 쪽 캐시 래퍼).
+    """
+    analyze = analyze or analyze_text
+    completed = journal.completed_units(job_id) if journal is not None else {}
+
+    def analyze_page(page_data: dict, position: int, exclude_words: Optional[list]) -> dict:
+        pages = page_data.get("pages", [page_data["page"]])
+        result = completed.get(position)
+        if result is None or result["pages"] != pages:
+            try:
+                vocab_result, grammar_result = analyze(
+                    page_data["text"], output_language, include_vocabulary, include_grammar, exclude_words
+                )
+            except Exception as e:
+                if journal is not None:
+                    journal.record_failure(job_id, position, pages, e)
+                raise
+            result = {
+                "page": page_data["page"],
+                "pages": pages,
+                "vocabulary": vocab_result,
+                "grammar": grammar_result
+            }
+            if journal is not None:
+                journal.record_unit(job_id, position, result)
+        if vocabulary_index is not None:
+            # 기록에서 불러온 단위도 색인에 넣어야 이후 단위의 제외 목록(과 캐시 키)이 처음 실행과 같아짐
+            vocabulary_index.add_frame(result["vocabulary"], page_data["page"], position)
+        return result
+
+    workers = max(1, max_workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # 입력(지연 생성기 가능)을 필요한 만큼만 읽어 진행 중 작업 수를 workers개로 제한
+        pending = deque()
+        for position, page_data in enumerate(page_texts):
+            exclude_words = None
+            if vocabulary_index is not None and include_vocabulary:
+                # 진행 중인 작업이 workers개 미만이므로 position - workers 이전 페이지는 모두 색인에 반영됨.
+                # 그 범위만 제외 목록에 쓰면 완료 순서와 무관하게 같은 프롬프트가 만들어져 캐시가 유지됨
+                exclude_words = vocabulary_index.known_words(MAX_EXCLUDED_WORDS, before=position - workers + 1)
+            pending.append(executor.submit(analyze_page, page_data, position, exclude_words))
+            # 앞 페이지가 끝났거나 상한에 도달하면 결과를 페이지 순서대로 내보냄
+            while pending and (pending[0].done() or len(pending) >= workers):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
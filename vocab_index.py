@@ -0,0 +1,100 @@
+import re
+import threading
+import unicodedata
+from typing import Iterable, Optional
+
+import pandas as pd
+
+# 어휘 테이블에서 단어가 들어 있는 열 위치 (출력 언어와 관계없이 두 번째 열)
+WORD_COLUMN_POSITION = 1
+
+# 프롬프트에 넣을 제외 단어 수 상한 (지침 토큰이 과도하게 늘지 않도록)
+MAX_EXCLUDED_WORDS = 200
+
+_PARENTHESES = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+_NON_WORD = re.compile(r'[^\w\s~-]')
+
+
+def normalize_word(word: str) -> str:
+    """단어 비교용 정규화 (NFC, 괄호 설명·문장부호 제거, 공백 정리)"""
+    word = unicodedata.normalize('NFC', str(word))
+    word = _PARENTHESES.sub(' ', word)
+    word = _NON_WORD.sub(' ', word)
+    return ' '.join(word.split())
+
+
+class VocabularyIndex:
+    """페이지(청크)별로 이미 추출한 어휘를 모아 두는 색인 (스레드 안전)
+
+    position은 분석 단위의 순서이며, known_words(before=...)로 그 이전 단위에서 나온 단어만
+    조회할 수 있다. 동시 분석에서도 프롬프트가 완료 순서와 무관하게 결정되어 캐시가 유지된다.
+    """
+
+    def __init__(self):
+        self._entries: dict = {}
+        self._lock = threading.Lock()
+
+    def add(self, words: Iterable[str], page=None, position: int = 0) -> list:
+        """단어들을 색인에 합치고 처음 보는 단어 목록 반환"""
+        new_words = []
+        with self._lock:
+            for word in words:
+                key = normalize_word(word)
+                if not key:
+                    continue
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = {"word": str(word).strip(), "count": 0, "pages": set(), "first_seen": position}
+                    self._entries[key] = entry
+                    new_words.append(entry["word"])
+                entry["count"] += 1
+                entry["first_seen"] = min(entry["first_seen"], position)
+                if page is not None:
+                    entry["pages"].add(page)
+        return new_words
+
+    def add_frame(self, df: Optional[pd.DataFrame], page=None, position: int = 0) -> list:
+        """어휘 분석 DataFrame의 단어 열을 색인에 합침"""
+        if df is None or df.empty:
+            return []
+        return self.add(df.iloc[:, WORD_COLUMN_POSITION], page, position)
+
+    def known_words(self, limit: Optional[int] = MAX_EXCLUDED_WORDS, before: Optional[int] = None) -> list:
+        """이미 추출된 단어 목록 (먼저 나온 순, before가 있으면 그 이전 단위에서 나온 단어만)"""
+        with self._lock:
+            entries = [
+                entry for entry in self._entries.values()
+                if before is None or entry["first_seen"] < before
+            ]
+        entries.sort(key=lambda entry: (entry["first_seen"], entry["word"]))
+        words = [entry["word"] for entry in entries]
+        return words[:limit] if limit else words
+
+    def occurrences(self, word: str) -> int:
+        with self._lock:
+            entry = self._entries.get(normalize_word(word))
+            return entry["count"] if entry else 0
+
+    def __contains__(self, word: str) -> bool:
+        with self._lock:
+            return normalize_word(word) in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def deduplicate_vocabulary(df: pd.DataFrame) -> pd.DataFrame:
+    """여러 페이지 결과를 합친 어휘 표에서 중복 단어를 하나로 모으고 등장 횟수/페이지 추가"""
+    if df.empty:
+        return df
+    word_column = df.columns[WORD_COLUMN_POSITION]
+    keys = df[word_column].map(normalize_word)
+    grouped = df.groupby(keys, sort=False)
+
+    deduplicated = grouped.head(1).copy()
+    deduplicated['occurrences'] = grouped[word_column].transform('size').loc[deduplicated.index]
+    if 'page' in df.columns:
+        pages = grouped['page'].agg(lambda values: ', '.join(dict.fromkeys(str(value) for value in values)))
+        deduplicated['page'] = keys.loc[deduplicated.index].map(pages)
+    return deduplicated.reset_index(drop=True)